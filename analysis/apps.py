@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AnalysisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analysis'
+
+    def ready(self):
+        # Load the sentiment model once per process instead of on the first request
+        if getattr(settings, 'SENTIMENT_WARMUP', False):
+            from .services.registry import registry
+            registry.warm_up(settings.SENTIMENT_MODEL, use_transformers=True, runtime=settings.SENTIMENT_RUNTIME)
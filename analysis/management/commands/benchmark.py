@@ -0,0 +1,187 @@
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from analysis.services.aspects import _HAS_BERTOPIC, AspectClusterer
+from analysis.services.pipeline import analyze_comments
+from analysis.services.registry import _analyzer_options, registry
+from analysis.services.sentiment import SentimentAnalyzer
+from analysis.services.synthetic import synthetic_comments
+from analysis.services.text_preprocess import PreprocessedBatch
+
+BACKENDS = ['vader', 'transformers', 'onnx']
+ALGORITHMS = ['kmeans', 'fcm', 'bertopic']
+
+
+def measure(fn, repeat: int = 1, memory: bool = True):
+    """Run fn `repeat` times for wall time, then once under tracemalloc for peak memory.
+    tracemalloc sees Python and NumPy allocations, not torch/ONNX Runtime native buffers.
+    Returns (result, {"seconds": best, "median_seconds": ..., "peak_mb": ...}).
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    stats = {"seconds": round(min(times), 6), "median_seconds": round(statistics.median(times), 6)}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            stats["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+        finally:
+            tracemalloc.stop()
+    return result, stats
+
+
+def _analyzer(backend: str) -> SentimentAnalyzer:
+    """Uncached analyzer for a backend, tuned like the registry's."""
+    if backend == 'vader':
+        return SentimentAnalyzer(use_transformers=False)
+    runtime = 'onnx' if backend == 'onnx' else 'torch'
+    options = {**_analyzer_options(settings.SENTIMENT_MODEL, runtime), "cache": None}
+    return SentimentAnalyzer(use_transformers=True, model_name=settings.SENTIMENT_MODEL, **options)
+
+
+def compare(results, baseline, threshold: float):
+    """Regressions of `results` against `baseline` (both lists of result records).
+    A metric regresses when it exceeds the baseline by more than `threshold` (0.2 = 20%).
+    """
+    reference = {(r['stage'], r['variant'], r['size']): r for r in baseline if 'seconds' in r}
+    regressions = []
+    for r in results:
+        base = reference.get((r['stage'], r['variant'], r['size']))
+        if base is None or 'seconds' not in r:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            if metric in r and base.get(metric):
+                ratio = r[metric] / base[metric]
+                if ratio > 1 + threshold:
+                    regressions.append({"stage": r['stage'], "variant": r['variant'], "size": r['size'],
+                                        "metric": metric, "baseline": base[metric], "current": r[metric],
+                                        "ratio": round(ratio, 3)})
+    return regressions
+
+
+class Command(BaseCommand):
+    help = ("Benchmark preprocessing, every sentiment backend and every clustering algorithm on "
+            "synthetic YouTube-like comments; write JSON results and optionally compare with a baseline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000,100000')
+        parser.add_argument('--backends', default=','.join(BACKENDS))
+        parser.add_argument('--algorithms', default=','.join(ALGORITHMS))
+        parser.add_argument('--clusters', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=1, help="Timed runs per measurement (best is reported).")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run.")
+        parser.add_argument('--output', default='benchmark_results.json')
+        parser.add_argument('--baseline', default=None, help="Earlier results file to compare with.")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="Allowed slowdown / memory growth before flagging a regression.")
+
+    def _record(self, results, stage, variant, size, stats=None, skipped=None):
+        record = {"stage": stage, "variant": variant, "size": size}
+        if skipped:
+            record["skipped"] = skipped
+        else:
+            record.update(stats)
+            record["per_second"] = round(size / stats["seconds"], 1) if stats["seconds"] else None
+        results.append(record)
+        self.stdout.write(json.dumps(record, ensure_ascii=False))
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        backends = [b for b in options['backends'].split(',') if b.strip()]
+        algorithms = [a for a in options['algorithms'].split(',') if a.strip()]
+        unknown = set(backends) - set(BACKENDS) | set(algorithms) - set(ALGORITHMS)
+        if unknown:
+            raise CommandError(f"Unknown backend/algorithm: {', '.join(sorted(unknown))}")
+        repeat, memory = max(1, options['repeat']), not options['no_memory']
+
+        analyzers = {}
+        for backend in backends:
+            analyzer = _analyzer(backend)
+            analyzers[backend] = analyzer if analyzer.backend == backend else None
+
+        results = []
+        for size in sizes:
+            texts = synthetic_comments(size, seed=options['seed'])
+
+            def preprocess():
+                batch = PreprocessedBatch.from_texts(texts)
+                return batch, batch.tokens
+            (batch, _), stats = measure(preprocess, repeat, memory)
+            self._record(results, 'preprocess', 'batch', size, stats)
+
+            for backend, analyzer in analyzers.items():
+                if analyzer is None:
+                    self._record(results, 'sentiment', backend, size, skipped="backend unavailable")
+                    continue
+                _, stats = measure(lambda: analyzer.batch_predict(batch.unique), repeat, memory)
+                self._record(results, 'sentiment', backend, size, stats)
+
+            weights = batch.counts if batch.has_duplicates else None
+            for algorithm in algorithms:
+                if algorithm == 'bertopic' and not _HAS_BERTOPIC:
+                    self._record(results, 'clustering', algorithm, size, skipped="bertopic not installed")
+                    continue
+                clusterer = AspectClusterer(algorithm=algorithm)
+                _, stats = measure(
+                    lambda: clusterer.cluster(batch.unique, options['clusters'], tokens=batch.tokens, weights=weights),
+                    repeat, memory
+                )
+                self._record(results, 'clustering', algorithm, size, stats)
+
+            # End to end through the request pipeline (first backend and algorithm, result caches off)
+            backend = backends[0] if backends else 'vader'
+            algorithm = algorithms[0] if algorithms else 'kmeans'
+            request_options = {"use_transformers": backend != 'vader',
+                               "sentiment_runtime": 'onnx' if backend == 'onnx' else 'torch',
+                               "clustering_algorithm": algorithm,
+                               "num_aspect_clusters": options['clusters'],
+                               "cluster_cache": False}
+            with override_settings(SENTIMENT_CACHE_SIZE=0):
+                registry.clear()
+                _, stats = measure(lambda: analyze_comments(texts, request_options), repeat, memory)
+            registry.clear()
+            self._record(results, 'end_to_end', f"{backend}+{algorithm}", size, stats)
+
+        report = {
+            "meta": {
+                "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "seed": options['seed'],
+                "repeat": repeat,
+            },
+            "results": results,
+        }
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as fh:
+                baseline = json.load(fh)
+            report["regressions"] = compare(results, baseline.get('results', []), options['threshold'])
+
+        with open(options['output'], 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if report.get("regressions"):
+            for r in report["regressions"]:
+                self.stderr.write(f"REGRESSION {r['stage']}/{r['variant']} n={r['size']} {r['metric']}: "
+                                  f"{r['baseline']} -> {r['current']} (x{r['ratio']})")
+            raise CommandError(f"{len(report['regressions'])} regression(s) against {options['baseline']}")
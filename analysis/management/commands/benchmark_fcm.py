@@ -0,0 +1,70 @@
+import json
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import adjusted_rand_score
+
+from analysis.services import fcm
+from analysis.services.synthetic import synthetic_comments
+
+
+def _legacy_fcm(x, x_red, k, error, maxiter):
+    """The previous path: scikit-fuzzy on float64 + one sparse product per cluster."""
+    import skfuzzy as fuzz
+    cntr, u, _, _, _, _, n_iter = fuzz.cluster.cmeans(
+        x_red.T, c=k, m=2.0, error=error, maxiter=maxiter, init=None
+    )
+    weights_sum = u.sum(axis=1) + 1e-9
+    centers = np.vstack([
+        (u[j, :].reshape(1, -1) @ x).A1 / float(weights_sum[j]) for j in range(k)
+    ])
+    return u, centers, n_iter
+
+
+class Command(BaseCommand):
+    help = "Benchmark the NumPy Fuzzy C-Means engine against the previous scikit-fuzzy path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000')
+        parser.add_argument('--clusters', type=int, default=5)
+        parser.add_argument('--legacy-maxiter', type=int, default=1000)
+        parser.add_argument('--skip-legacy', action='store_true')
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+        try:
+            import skfuzzy  # noqa: F401
+            has_legacy = not options['skip_legacy']
+        except Exception:
+            has_legacy = False
+            self.stderr.write("scikit-fuzzy not installed: reporting the native engine only.")
+
+        k = options['clusters']
+        rows = []
+        for n in [int(s) for s in options['sizes'].split(',') if s.strip()]:
+            texts = synthetic_comments(n)
+            x = TfidfVectorizer(min_df=1, max_df=0.9, ngram_range=(1, 2), dtype=np.float32).fit_transform(texts)
+            dim = min(100, max(2, min(x.shape[0] - 1, x.shape[1] - 1)))
+            x_red = TruncatedSVD(n_components=dim, random_state=42).fit_transform(x)
+
+            started = time.perf_counter()
+            _, u, n_iter = fcm.fuzzy_cmeans(x_red, c=k, error=settings.FCM_ERROR, maxiter=settings.FCM_MAX_ITER)
+            fcm.weighted_centroids(u, x)
+            row = {"n_comments": n, "native_seconds": round(time.perf_counter() - started, 4),
+                   "native_iterations": n_iter}
+
+            if has_legacy:
+                started = time.perf_counter()
+                u_legacy, _, legacy_iter = _legacy_fcm(
+                    x.astype(np.float64), x_red.astype(np.float64), k, 0.005, options['legacy_maxiter']
+                )
+                row["legacy_seconds"] = round(time.perf_counter() - started, 4)
+                row["legacy_iterations"] = int(legacy_iter)
+                row["speedup"] = round(row["legacy_seconds"] / row["native_seconds"], 2)
+                row["label_agreement_ari"] = round(float(adjusted_rand_score(
+                    u_legacy.argmax(axis=0), u.argmax(axis=0))), 4)
+            rows.append(row)
+            self.stdout.write(json.dumps(row))
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand
+from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
+
+from analysis.management.commands.benchmark import measure
+from analysis.services.aspects import AspectClusterer, _kmeans_fit
+from analysis.services.synthetic import synthetic_comments
+from analysis.services.text_preprocess import PreprocessedBatch
+
+
+def keyword_overlap(a, b) -> float:
+    """Mean best Jaccard overlap of each cluster's keywords in `a` with any cluster in `b`."""
+    scores = []
+    for words in a:
+        best = max((len(set(words) & set(other)) / (len(set(words) | set(other)) or 1) for other in b), default=0.0)
+        scores.append(best)
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+class Command(BaseCommand):
+    help = ("Compare the large-corpus KMeans mode with the exact path on synthetic comments: "
+            "time, peak memory and label agreement (ARI / NMI). `exact_reseeded_ari` is the exact "
+            "path against itself with another seed, i.e. the agreement to expect at best.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,50000')
+        parser.add_argument('--clusters', type=int, default=6)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run.")
+
+    def handle(self, *args, **options):
+        k, memory = options['clusters'], not options['no_memory']
+        for n in [int(s) for s in options['sizes'].split(',') if s.strip()]:
+            batch = PreprocessedBatch.from_texts(synthetic_comments(n, seed=options['seed']))
+            weights = batch.counts if batch.has_duplicates else None
+            results = {}
+            for mode in ('exact', 'large'):
+                clusterer = AspectClusterer('kmeans', mode=mode)
+                results[mode] = measure(
+                    lambda: clusterer.cluster(batch.unique, k, tokens=batch.tokens, weights=weights), 1, memory
+                )
+            (exact, exact_stats), (large, large_stats) = results['exact'], results['large']
+            reseeded = _kmeans_fit(batch.unique, k, tokens=batch.tokens, weights=weights, random_state=7)[1]
+            row = {
+                "n_comments": n,
+                "n_unique": len(batch.unique),
+                "exact": exact_stats,
+                "large": large_stats,
+                "ari": round(float(adjusted_rand_score(exact['labels'], large['labels'])), 4),
+                "nmi": round(float(normalized_mutual_info_score(exact['labels'], large['labels'])), 4),
+                "keyword_overlap": round(keyword_overlap(exact['keywords'], large['keywords']), 4),
+                "exact_reseeded_ari": round(float(adjusted_rand_score(exact['labels'], reseeded['labels'])), 4),
+            }
+            self.stdout.write(json.dumps(row))
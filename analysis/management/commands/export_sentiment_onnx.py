@@ -0,0 +1,81 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from analysis.services import sentiment
+from analysis.services.onnx_backend import _HAS_ONNX, compare_backends, export_onnx, onnx_model_dir
+from analysis.services.sentiment import SentimentAnalyzer
+from analysis.services.text_preprocess import preprocess_batch
+
+SAMPLE_COMMENTS = [
+    "Great video, very useful!",
+    "Too long, I got bored halfway.",
+    "Good editing but the audio was low.",
+    "first",
+    "this is the best tutorial on the topic, thank you so much",
+    "I don't get why people like this channel",
+    "Muy buen video, gracias por compartir",
+    "the thumbnail is misleading, clickbait",
+    "meh",
+    "Can you make a follow-up about deployment?",
+    "The music is way too loud compared to the voice",
+    "Absolutely terrible explanation, skip this one",
+]
+
+
+class Command(BaseCommand):
+    help = ("Export SENTIMENT_MODEL to ONNX (optionally int8-quantized) under SENTIMENT_ONNX_DIR, "
+            "and optionally check parity and throughput against the PyTorch backend.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default=settings.SENTIMENT_MODEL)
+        parser.add_argument('--output-dir', default=None,
+                            help="Defaults to SENTIMENT_ONNX_DIR/<model>.")
+        parser.add_argument('--quantize', action='store_true', help="Also write a dynamic int8 graph.")
+        parser.add_argument('--opset', type=int, default=17)
+        parser.add_argument('--check', action='store_true',
+                            help="Compare the exported graph(s) with PyTorch: label agreement, score deltas, throughput.")
+        parser.add_argument('--input', default=None,
+                            help="Comments for --check, one per line (defaults to a built-in sample).")
+        parser.add_argument('--repeat', type=int, default=20,
+                            help="Repeat the --check corpus this many times to measure throughput.")
+
+    def handle(self, *args, **options):
+        if not sentiment._HAS_TRANSFORMERS:
+            raise CommandError("transformers and torch are required to export the model.")
+        if options['quantize'] and not _HAS_ONNX:
+            raise CommandError("onnxruntime is required for --quantize.")
+
+        model_name = options['model']
+        output_dir = options['output_dir'] or onnx_model_dir(settings.SENTIMENT_ONNX_DIR, model_name)
+        paths = export_onnx(model_name, output_dir, quantize=options['quantize'], opset=options['opset'])
+        for kind, path in paths.items():
+            self.stdout.write(f"Exported {kind}: {path}")
+
+        if not options['check']:
+            return
+        if not _HAS_ONNX:
+            raise CommandError("onnxruntime is required for --check.")
+
+        if options['input']:
+            with open(options['input'], encoding='utf-8') as fh:
+                texts = [line.strip() for line in fh if line.strip()]
+        else:
+            texts = SAMPLE_COMMENTS
+        texts = preprocess_batch(texts) * max(1, options['repeat'])
+
+        reference = SentimentAnalyzer(
+            use_transformers=True, model_name=model_name,
+            batch_size=settings.SENTIMENT_BATCH_SIZE, num_threads=settings.SENTIMENT_NUM_THREADS
+        )
+        report = {}
+        for kind, path in paths.items():
+            candidate = SentimentAnalyzer(
+                use_transformers=True, model_name=model_name, runtime='onnx', onnx_path=path,
+                batch_size=settings.SENTIMENT_BATCH_SIZE, num_threads=settings.SENTIMENT_NUM_THREADS
+            )
+            if candidate.backend != 'onnx':
+                raise CommandError(f"Could not load {path} with ONNX Runtime.")
+            report[kind] = compare_backends(reference, candidate, texts)
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,118 @@
+import json
+import os
+import pkgutil
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+import analysis.services
+from analysis.management.commands.benchmark import compare
+from analysis.services.lazy import available
+
+# Modules that must only load on first use of their backend
+HEAVY = ('torch', 'transformers', 'bertopic', 'sentence_transformers', 'onnxruntime',
+         'sklearn', 'scipy', 'joblib', 'umap', 'hdbscan')
+STARTUP = 'analysis.urls'
+
+# Run in a fresh interpreter: Django is set up first so only the module's own cost is measured
+_PROBE = """
+import json, sys, time
+import django
+started = time.perf_counter()
+django.setup()
+setup = time.perf_counter() - started
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"seconds": seconds, "setup_seconds": setup, "heavy_modules": heavy}}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """`-X importtime` output -> [(module, self_us, cumulative_us)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def probe(module: str) -> dict:
+    """Import `module` in a new process; wall time, -X importtime breakdown and heavy modules loaded."""
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')}
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module, heavy=HEAVY)],
+                          capture_output=True, text=True, env=env, cwd=settings.BASE_DIR)
+    if proc.returncode != 0:
+        raise CommandError(f"Importing {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    rows = parse_importtime(proc.stderr)
+    result["cumulative_ms"] = next((round(c / 1000, 3) for name, _, c in rows if name == module), 0.0)
+    result["heaviest"] = [[name, round(s / 1000, 3)] for name, s, _ in sorted(rows, key=lambda r: -r[1])[:5]]
+    return result
+
+
+class Command(BaseCommand):
+    help = ("Report the import cost of every analysis.services module and of app startup, each in a "
+            "fresh interpreter; fail if a heavy backend is imported eagerly or imports regressed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modules', default=None,
+                            help="Comma-separated modules (default: every analysis.services module).")
+        parser.add_argument('--repeat', type=int, default=3, help="Fresh imports per module (best is reported).")
+        parser.add_argument('--output', default='import_report.json')
+        parser.add_argument('--baseline', default=None, help="Earlier report to compare with.")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="Allowed slowdown before flagging a regression.")
+
+    def handle(self, *args, **options):
+        if options['modules']:
+            modules = [m.strip() for m in options['modules'].split(',') if m.strip()]
+        else:
+            modules = [f'analysis.services.{m.name}' for m in pkgutil.iter_modules(analysis.services.__path__)]
+        repeat = max(1, options['repeat'])
+
+        results = []
+        for module in [STARTUP] + modules:
+            runs = [probe(module) for _ in range(repeat)]
+            best = min(runs, key=lambda r: r['seconds'])
+            seconds = best['seconds'] + (best['setup_seconds'] if module == STARTUP else 0.0)
+            record = {"stage": "startup" if module == STARTUP else "import", "variant": module, "size": None,
+                      "seconds": round(seconds, 6), "cumulative_ms": best['cumulative_ms'],
+                      "heaviest": best['heaviest'], "heavy_modules": best['heavy_modules']}
+            results.append(record)
+            self.stdout.write(f"{record['variant']:<45} {record['seconds'] * 1000:9.1f} ms"
+                              + (f"  loads: {', '.join(record['heavy_modules'])}" if record['heavy_modules'] else ''))
+
+        report = {
+            "meta": {
+                "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+                "python": sys.version.split()[0],
+                "repeat": repeat,
+                # Found by spec lookup, nothing imported
+                "available": {name: available(name) for name in HEAVY + ('vaderSentiment',)},
+            },
+            "results": results,
+        }
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as fh:
+                baseline = json.load(fh)
+            report["regressions"] = compare(results, baseline.get('results', []), options['threshold'])
+
+        with open(options['output'], 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(f"Report written to {options['output']}")
+
+        eager = results[0]['heavy_modules']
+        problems = [f"startup imports {', '.join(eager)}"] if eager else []
+        for r in report.get("regressions", []):
+            problems.append(f"{r['variant']}: {r['baseline']}s -> {r['current']}s (x{r['ratio']})")
+        if problems:
+            for problem in problems:
+                self.stderr.write(f"REGRESSION {problem}")
+            raise CommandError(f"{len(problems)} import regression(s)")
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from analysis.services.inference_server import InferenceServer
+from analysis.services.registry import ModelRegistry
+
+
+class Command(BaseCommand):
+    help = ("Serve sentiment predictions over a Unix socket from this process, so web workers "
+            "started with SENTIMENT_SERVER_SOCKET share one model copy instead of loading their own.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.SENTIMENT_SERVER_SOCKET,
+                            help="Socket path (defaults to SENTIMENT_SERVER_SOCKET).")
+        parser.add_argument('--no-warmup', action='store_true',
+                            help="Load SENTIMENT_MODEL on the first request instead of at startup.")
+
+    def handle(self, *args, **options):
+        path = options['socket']
+        if not path:
+            raise CommandError("Give --socket or set SENTIMENT_SERVER_SOCKET.")
+        # Always in-process: this is the process the clients delegate to
+        registry = ModelRegistry(remote=False)
+        if not options['no_warmup']:
+            registry.warm_up(settings.SENTIMENT_MODEL, use_transformers=True, runtime=settings.SENTIMENT_RUNTIME)
+            for status in registry.status():
+                self.stdout.write(f"{status['model_name']}: {status['state']} ({status['active_backend']})")
+        try:
+            server = InferenceServer(path, registry)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(f"Serving sentiment predictions on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,42 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .services.metrics import metrics, request_timings
+
+
+class ServerTimingMiddleware:
+    """Collects per-stage timings for every request.
+    - Adds a `Server-Timing` header (stages + total, in ms) for browser devtools / curl.
+    - Records request latency and count per URL name in the metrics registry.
+    Streaming responses only report what ran before the first byte.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_timings() as timings:
+            response = self.get_response(request)
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        with request_timings() as timings:
+            response = await self.get_response(request)
+        return self._finish(request, response, timings)
+
+    @staticmethod
+    def _finish(request, response, timings):
+        total = time.perf_counter() - timings.started
+        response['Server-Timing'] = timings.server_timing(total)
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.url_name or match.view_name) if match else 'unmatched'
+        metrics.observe('analysis_request_seconds', total, endpoint=endpoint)
+        metrics.inc('analysis_requests_total', endpoint=endpoint, status=str(response.status_code))
+        return response
@@ -0,0 +1,57 @@
+import json
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .services.metrics import timed
+
+# Optional: orjson (several times faster than the stdlib encoder on large item lists)
+try:
+    import orjson
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renders a single response body (e.g. a validation error) as one NDJSON record."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, ensure_ascii=False) + '\n').encode(self.charset)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its time as the 'serialize' stage."""
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class FastJSONRenderer(TimedJSONRenderer):
+    """TimedJSONRenderer through orjson when installed (compact UTF-8, like DRF's defaults).
+    Types orjson does not know (lazy strings, Decimal, ...) go through DRF's encoder;
+    without orjson this is the stdlib path.
+    """
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not _HAS_ORJSON:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        with timed('serialize'):
+            return orjson.dumps(data, default=self._default, option=option)
+
+
+def render_json(data) -> bytes:
+    """Response body for plain Django views, rendered like the API's default renderer."""
+    from django.conf import settings
+    renderer = FastJSONRenderer() if settings.FAST_JSON else TimedJSONRenderer()
+    return renderer.render(data)
@@ -1,17 +1,40 @@
 from rest_framework import serializers
 
+from .services.aspect_models import NAME_RE
+from .services.youtube import parse_video_id
+
 
 class AnalysisOptionsSerializer(serializers.Serializer):
     # Number of aspect clusters (only used by some algorithms)
     num_aspect_clusters = serializers.IntegerField(required=False, min_value=2, max_value=50, default=5)
     # Whether to try Transformers in this request (defaults to True)
     use_transformers = serializers.BooleanField(required=False, default=True)
+    # Transformer runtime: PyTorch or exported ONNX graph (defaults to SENTIMENT_RUNTIME)
+    sentiment_runtime = serializers.ChoiceField(choices=['torch', 'onnx'], required=False)
+    # Time allowed for transformer sentiment; what does not fit is scored truncated or with VADER
+    latency_budget_ms = serializers.IntegerField(required=False, min_value=1)
     # Clustering algorithm choice
     clustering_algorithm = serializers.ChoiceField(
         choices=['kmeans', 'fcm', 'bertopic'],
         required=False,
         default='kmeans'
     )
+    # Collapse comments at least this similar (MinHash estimate of character 5-gram Jaccard);
+    # 0 disables, default NEAR_DUPLICATE_THRESHOLD
+    near_duplicate_threshold = serializers.FloatField(required=False, min_value=0.0, max_value=1.0)
+    # KMeans path: 'large' fits a sample and assigns in chunks (bounded memory); 'auto' picks by size
+    clustering_mode = serializers.ChoiceField(choices=['auto', 'exact', 'large'], required=False, default='auto')
+    # Reuse clustering results of an identical earlier request (see CLUSTER_CACHE_*)
+    cluster_cache = serializers.BooleanField(required=False, default=True)
+    # Reuse a saved fitted aspect model (transform/predict only); latest version unless given
+    aspect_model = serializers.RegexField(NAME_RE, required=False)
+    aspect_model_version = serializers.IntegerField(required=False, min_value=1)
+    # Save the model fitted by this request under a name (creates a new version)
+    save_aspect_model = serializers.RegexField(NAME_RE, required=False)
+    # 'summary': summary with per-aspect sentiment only; items are paged from /results/<result_id>/items/
+    response = serializers.ChoiceField(choices=['full', 'summary'], required=False, default='full')
+    # Add a `timings` block (per-stage ms, batch counts, fallback events) to the response
+    timings = serializers.BooleanField(required=False, default=False)
 
 
 class CommentsAnalysisRequestSerializer(serializers.Serializer):
@@ -20,3 +43,17 @@ class CommentsAnalysisRequestSerializer(serializers.Serializer):
         allow_empty=False
     )
     options = AnalysisOptionsSerializer(required=False)
+
+
+class YouTubeAnalysisRequestSerializer(serializers.Serializer):
+    # Video URLs (watch, youtu.be, shorts, embed) or bare ids; normalized to ids
+    videos = serializers.ListField(child=serializers.CharField(), allow_empty=False, max_length=50)
+    # Comments fetched per request (capped by YOUTUBE_MAX_COMMENTS)
+    max_comments = serializers.IntegerField(required=False, min_value=1)
+    options = AnalysisOptionsSerializer(required=False)
+
+    def validate_videos(self, value):
+        try:
+            return [parse_video_id(v) for v in value]
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
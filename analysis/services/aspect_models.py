@@ -0,0 +1,118 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .lazy import LazyModule
+
+# Loaded on first save/load (sklearn: only its version is recorded here)
+sklearn = LazyModule('sklearn')
+joblib = LazyModule('joblib')
+
+# Bump when the pickled model classes change incompatibly
+MODEL_FORMAT = 1
+
+NAME_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+
+class AspectModelNotFound(LookupError):
+    pass
+
+
+class AspectModelStore:
+    """Versioned, named fitted aspect models on local disk.
+    Layout: <root>/<name>/v<version>.joblib plus v<version>.json metadata.
+    Loaded models are kept in memory, so repeated requests skip unpickling.
+    """
+    def __init__(self, root: str):
+        self.root = str(root)
+        self._lock = threading.Lock()
+        self._loaded: Dict[Tuple[str, int], object] = {}
+
+    def _dir(self, name: str) -> str:
+        if not NAME_RE.match(name or ''):
+            raise ValueError(f"Invalid aspect model name: {name!r}")
+        return os.path.join(self.root, name)
+
+    def versions(self, name: str) -> List[int]:
+        path = self._dir(name)
+        if not os.path.isdir(path):
+            return []
+        found = []
+        for fname in os.listdir(path):
+            m = re.match(r'^v(\d+)\.joblib$', fname)
+            if m:
+                found.append(int(m.group(1)))
+        return sorted(found)
+
+    def save(self, name: str, model, metadata: Optional[Dict] = None) -> int:
+        """Persist `model` as the next version of `name`; returns the version."""
+        path = self._dir(name)
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            version = (self.versions(name) or [0])[-1] + 1
+            meta = {
+                "name": name,
+                "version": version,
+                "algorithm": model.algorithm,
+                "n_clusters": model.n_clusters,
+                "format": MODEL_FORMAT,
+                "sklearn_version": sklearn.__version__,
+                "created_at": time.time(),
+                **(metadata or {}),
+            }
+            tmp = os.path.join(path, f'.v{version}.joblib.tmp')
+            joblib.dump(model, tmp)
+            os.replace(tmp, os.path.join(path, f'v{version}.joblib'))
+            with open(os.path.join(path, f'v{version}.json'), 'w', encoding='utf-8') as fh:
+                json.dump(meta, fh)
+            self._loaded[(name, version)] = model
+        return version
+
+    def metadata(self, name: str, version: int) -> Dict:
+        with open(os.path.join(self._dir(name), f'v{version}.json'), encoding='utf-8') as fh:
+            return json.load(fh)
+
+    def load(self, name: str, version: Optional[int] = None) -> Tuple[object, int]:
+        """Return (model, version); the latest version when `version` is None."""
+        available = self.versions(name)
+        if version is None and available:
+            version = available[-1]
+        if version not in available:
+            raise AspectModelNotFound(f"Aspect model '{name}' (version {version or 'latest'}) not found.")
+        key = (name, version)
+        with self._lock:
+            model = self._loaded.get(key)
+            if model is None:
+                meta = self.metadata(name, version)
+                if meta.get('format') != MODEL_FORMAT or meta.get('sklearn_version') != sklearn.__version__:
+                    raise AspectModelNotFound(
+                        f"Aspect model '{name}' v{version} was saved by an incompatible version; refit it."
+                    )
+                model = joblib.load(os.path.join(self._dir(name), f'v{version}.joblib'))
+                self._loaded[key] = model
+        return model, version
+
+    def list(self) -> List[Dict]:
+        if not os.path.isdir(self.root):
+            return []
+        models = []
+        for name in sorted(os.listdir(self.root)):
+            if NAME_RE.match(name) and os.path.isdir(os.path.join(self.root, name)):
+                models.extend(self.metadata(name, v) for v in self.versions(name))
+        return models
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_aspect_model_store() -> AspectModelStore:
+    global _store
+    from django.conf import settings
+    with _store_lock:
+        if _store is None or _store.root != str(settings.ASPECT_MODEL_DIR):
+            _store = AspectModelStore(settings.ASPECT_MODEL_DIR)
+        return _store
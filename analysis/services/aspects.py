@@ -1,86 +1,243 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from django.conf import settings
 
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.cluster import KMeans
-    from sklearn.decomposition import TruncatedSVD
-    from sklearn.metrics import pairwise_distances
-    import numpy as np
-    _HAS_SK = True
-except Exception:
-    _HAS_SK = False
-
-# Optional fuzzy C-means
-try:
-    import skfuzzy as fuzz
-    _HAS_FCM = True
-except Exception:
-    _HAS_FCM = False
-
-# Optional BERTopic
-try:
-    from bertopic import BERTopic
-    _HAS_BERTOPIC = True
-except Exception:
-    _HAS_BERTOPIC = False
-
-
-def _top_terms_from_centers(feature_names, centers, top_n=5):
-    """Pick top-n weighted terms per center row."""
-    keywords = []
-    for i in range(centers.shape[0]):
-        row = centers[i]
-        top_idx = np.argsort(row)[::-1][:top_n]
-        keywords.append([feature_names[j] for j in top_idx if row[j] > 0])
-    return keywords
+import numpy as np
 
+from . import fcm
+from .cluster_summary import summarize, top_terms
+from .lazy import LazyModule, available
+from .metrics import record_event, timed
+from .text_preprocess import PRETOKENIZED, vectorizer_docs
 
-def _kmeans_cluster(texts: List[str], n_clusters: int) -> Dict:
-    vectorizer = TfidfVectorizer(min_df=1, max_df=0.9, ngram_range=(1,2))
-    X = vectorizer.fit_transform(texts)
-    k = max(2, min(n_clusters, X.shape[0]))
-    kmeans = KMeans(n_clusters=k, n_init='auto', random_state=42)
-    labels = kmeans.fit_predict(X)
+# scikit-learn and optional BERTopic are probed without importing; they load on first clustering
+_HAS_SK = available('sklearn')
+sk_text = LazyModule('sklearn.feature_extraction.text')
+sk_cluster = LazyModule('sklearn.cluster')
+sk_decomposition = LazyModule('sklearn.decomposition')
 
-    feature_names = vectorizer.get_feature_names_out()
-    keywords = _top_terms_from_centers(feature_names, kmeans.cluster_centers_, top_n=5)
-    sizes = [int((labels == i).sum()) for i in range(k)]
-
-    # Representatives: closest to centroids (Euclidean in TF-IDF space)
-    representatives = []
-    for i in range(k):
-        idxs = np.where(labels == i)[0]
-        if len(idxs) == 0:
-            representatives.append([])
-            continue
-        center = kmeans.cluster_centers_[i].reshape(1, -1)
-        dists = pairwise_distances(X[idxs], center, metric='euclidean').ravel()
-        order = np.argsort(dists)[:settings.CLUSTER_REPRESENTATIVES]
-        reps = [texts[int(idxs[j])] for j in order]
-        representatives.append(reps)
+_HAS_BERTOPIC = available('bertopic')
+bertopic = LazyModule('bertopic')
 
+
+def _empty_result(n: int) -> Dict:
     return {
-        "labels": labels.tolist(),
-        "cluster_ids": list(range(k)),
-        "keywords": keywords,
-        "sizes": sizes,
-        "n_clusters": k,
-        "representatives": representatives
+        "labels": [None]*n,
+        "cluster_ids": [],
+        "keywords": [],
+        "sizes": [],
+        "n_clusters": 0,
+        "representatives": []
     }
 
 
-def _fcm_cluster(texts: List[str], n_clusters: int) -> Dict:
-    if not (_HAS_SK and _HAS_FCM) or len(texts) < 2:
-        # Fallback to KMeans if libs missing
-        return _kmeans_cluster(texts, n_clusters)
+class KMeansAspectModel:
+    """Fitted TF-IDF vocabulary + KMeans centroids.
+    `predict` only transforms new texts and assigns them to the fitted centroids.
+    """
+    algorithm = 'kmeans'
+
+    def __init__(self, vectorizer, kmeans):
+        self.vectorizer = vectorizer
+        self.kmeans = kmeans
+        self.keywords = top_terms(vectorizer.get_feature_names_out(), kmeans.cluster_centers_, top_n=5)
+
+    @property
+    def n_clusters(self) -> int:
+        return int(self.kmeans.n_clusters)
+
+    def summarize(self, texts: List[str], X, labels, weights=None) -> Dict:
+        # Representatives: closest to centroids (Euclidean in TF-IDF space);
+        # one transform gives the distances of every text to every centroid
+        with timed('cluster_summary'):
+            return summarize(texts, labels, self.n_clusters, self.keywords,
+                             settings.CLUSTER_REPRESENTATIVES, distances=self.kmeans.transform(X), weights=weights)
+
+    def predict(self, texts: List[str], tokens=None, weights=None) -> Dict:
+        with timed('tfidf'):
+            X = self.vectorizer.transform(vectorizer_docs(self.vectorizer, texts, tokens))
+        with timed('kmeans'):
+            labels = self.kmeans.predict(X)
+        return self.summarize(texts, X, labels, weights)
+
+
+def _kmeans_fit(texts: List[str], n_clusters: int, tokens=None, weights=None,
+                random_state: int = 42) -> Tuple[KMeansAspectModel, Dict]:
+    with timed('tfidf'):
+        vectorizer = sk_text.TfidfVectorizer(min_df=1, max_df=0.9, ngram_range=(1,2), **PRETOKENIZED)
+        X = vectorizer.fit_transform(tokens if tokens is not None else texts)
+    k = max(2, min(n_clusters, X.shape[0]))
+    with timed('kmeans'):
+        kmeans = sk_cluster.KMeans(n_clusters=k, n_init='auto', random_state=random_state)
+        labels = kmeans.fit_predict(X, sample_weight=weights)
+
+    model = KMeansAspectModel(vectorizer, kmeans)
+    return model, model.summarize(texts, X, labels, weights)
+
+
+def _kmeans_cluster(texts: List[str], n_clusters: int) -> Dict:
+    return _kmeans_fit(texts, n_clusters)[1]
+
+
+def stratified_sample(lengths, size: int, weights=None, seed: int = 42) -> np.ndarray:
+    """Sorted indices of about `size` rows that keep the corpus mix of comment lengths.
+    Strata are log2 length bins, each gets a share proportional to its (weighted) size;
+    within a stratum frequent texts (`weights`) are more likely to be drawn.
+    """
+    lengths = np.asarray(lengths)
+    n = len(lengths)
+    if n <= size:
+        return np.arange(n)
+    w = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)
+    strata = np.floor(np.log2(lengths + 1)).astype(np.int64)
+    totals = np.bincount(strata, weights=w)
+    # Largest-remainder split of `size` across strata
+    shares = size * totals / totals.sum()
+    quotas = np.floor(shares).astype(np.int64)
+    quotas[np.argsort(quotas - shares)[:size - quotas.sum()]] += 1
+
+    rng = np.random.default_rng(seed)
+    chosen = []
+    for s in np.flatnonzero(quotas):
+        members = np.flatnonzero(strata == s)
+        p = w[members] / w[members].sum()
+        chosen.append(rng.choice(members, size=min(len(members), quotas[s]), replace=False, p=p))
+    return np.sort(np.concatenate(chosen))
+
+
+def _unit_rows(x):
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+class LargeKMeansAspectModel:
+    """Memory-bounded TF-IDF -> SVD -> MiniBatchKMeans, fitted on a sample.
+    - vocabulary capped at CLUSTER_LARGE_MAX_FEATURES, float32 sparse rows
+    - clustering runs on L2-normalized SVD components (CLUSTER_LARGE_DIM)
+    - every text is assigned chunk by chunk (CLUSTER_LARGE_CHUNK), so only one
+      chunk's TF-IDF rows are held at a time
+    """
+    algorithm = 'kmeans'
+
+    def __init__(self, vectorizer, svd, kmeans, chunk_size: int, keywords=None):
+        self.vectorizer = vectorizer
+        self.svd = svd
+        self.kmeans = kmeans
+        self.chunk_size = max(1, int(chunk_size))
+        self.keywords = keywords or []
+
+    @property
+    def n_clusters(self) -> int:
+        return int(self.kmeans.n_clusters)
+
+    def assign(self, docs, weights=None, term_sums: bool = False):
+        """Labels and distance to the own centroid of every doc; with `term_sums`, also the
+        (weighted) per-cluster sums of TF-IDF rows, shape (k, n_features), for keywords.
+        """
+        n, k = len(docs), self.n_clusters
+        labels = np.empty(n, dtype=np.int64)
+        own = np.empty(n, dtype=np.float32)
+        sums = np.zeros((k, len(self.vectorizer.vocabulary_)), dtype=np.float32) if term_sums else None
+        for start in range(0, n, self.chunk_size):
+            stop = min(start + self.chunk_size, n)
+            with timed('tfidf'):
+                X = self.vectorizer.transform(docs[start:stop])
+            with timed('svd'):
+                x = _unit_rows(self.svd.transform(X))
+            with timed('kmeans'):
+                distances = self.kmeans.transform(x)
+                chunk_labels = distances.argmin(axis=1)
+            labels[start:stop] = chunk_labels
+            own[start:stop] = distances[np.arange(stop - start), chunk_labels]
+            if sums is not None:
+                members = np.zeros((stop - start, k), dtype=np.float32)
+                members[np.arange(stop - start), chunk_labels] = 1.0 if weights is None else weights[start:stop]
+                sums += np.asarray(X.T @ members).T
+        return labels, own, sums
+
+    def summarize(self, texts: List[str], labels, own, weights=None) -> Dict:
+        with timed('cluster_summary'):
+            return summarize(texts, labels, self.n_clusters, self.keywords,
+                             settings.CLUSTER_REPRESENTATIVES, distances=own, weights=weights)
+
+    def predict(self, texts: List[str], tokens=None, weights=None) -> Dict:
+        labels, own, _ = self.assign(vectorizer_docs(self.vectorizer, texts, tokens))
+        return self.summarize(texts, labels, own, weights)
+
+
+def _large_kmeans_fit(texts: List[str], n_clusters: int, tokens=None, weights=None) -> Tuple[object, Dict]:
+    docs = tokens if tokens is not None else texts
+    lengths = np.fromiter((len(d) if isinstance(d, list) else len(d.split()) for d in docs),
+                          dtype=np.int64, count=len(docs))
+    sample = stratified_sample(lengths, settings.CLUSTER_LARGE_SAMPLE, weights)
+    with timed('tfidf'):
+        vectorizer = sk_text.TfidfVectorizer(min_df=1, max_df=0.9, ngram_range=(1,2), dtype=np.float32,
+                                             max_features=settings.CLUSTER_LARGE_MAX_FEATURES, **PRETOKENIZED)
+        X = vectorizer.fit_transform([docs[i] for i in sample])
+    dim = min(settings.CLUSTER_LARGE_DIM, X.shape[0] - 1, X.shape[1] - 1)
+    if dim < 2:
+        return _kmeans_fit(texts, n_clusters, tokens, weights)
+    with timed('svd'):
+        svd = sk_decomposition.TruncatedSVD(n_components=dim, random_state=42)
+        x = _unit_rows(svd.fit_transform(X))
+    del X
+    k = max(2, min(n_clusters, len(sample)))
+    with timed('kmeans'):
+        # Sampling already favours frequent texts, so the sample is fitted unweighted
+        kmeans = sk_cluster.MiniBatchKMeans(n_clusters=k, n_init=3, random_state=42, batch_size=2048).fit(x)
+
+    model = LargeKMeansAspectModel(vectorizer, svd, kmeans, settings.CLUSTER_LARGE_CHUNK)
+    labels, own, sums = model.assign(docs, weights, term_sums=True)
+    model.keywords = top_terms(vectorizer.get_feature_names_out(), sums, top_n=5)
+    return model, model.summarize(texts, labels, own, weights)
+
+
+class FCMAspectModel:
+    """Fitted TF-IDF + SVD projection and Fuzzy C-Means centers.
+    Keywords come from membership-weighted centroids in TF-IDF space at fit time;
+    `predict` computes memberships of new texts against the fitted centers.
+    """
+    algorithm = 'fcm'
+
+    def __init__(self, vectorizer, svd, centers, keywords, m=2.0):
+        self.vectorizer = vectorizer
+        self.svd = svd
+        self.centers = centers     # (k, dim) in reduced space
+        self.keywords = keywords
+        self.m = m
+
+    @property
+    def n_clusters(self) -> int:
+        return int(self.centers.shape[0])
+
+    def summarize(self, texts: List[str], x_red, u, weights=None) -> Dict:
+        # Hard labels from memberships; representatives closest to FCM centers in reduced space
+        with timed('cluster_summary'):
+            labels = np.argmax(u, axis=0)            # shape: (n_samples,)
+            distances = fcm.sq_distances(np.asarray(x_red, dtype=np.float32), self.centers).T
+            return summarize(texts, labels, self.n_clusters, self.keywords,
+                             settings.CLUSTER_REPRESENTATIVES, distances=distances, weights=weights)
+
+    def predict(self, texts: List[str], tokens=None, weights=None) -> Dict:
+        with timed('tfidf'):
+            X = self.vectorizer.transform(vectorizer_docs(self.vectorizer, texts, tokens))
+        with timed('svd'):
+            x_red = self.svd.transform(X).astype(np.float32)
+        with timed('fcm'):
+            u = fcm.memberships(x_red, self.centers, self.m)
+        return self.summarize(texts, x_red, u, weights)
+
+
+def _fcm_fit(texts: List[str], n_clusters: int, tokens=None, weights=None) -> Tuple[object, Dict]:
+    if len(texts) < 2:
+        return _kmeans_fit(texts, n_clusters, tokens, weights)
 
     # TF-IDF + dimensionality reduction for FCM stability
-    vectorizer = TfidfVectorizer(min_df=1, max_df=0.9, ngram_range=(1,2))
-    x = vectorizer.fit_transform(texts)
+    with timed('tfidf'):
+        vectorizer = sk_text.TfidfVectorizer(min_df=1, max_df=0.9, ngram_range=(1,2), dtype=np.float32, **PRETOKENIZED)
+        x = vectorizer.fit_transform(tokens if tokens is not None else texts)
     n = x.shape[0]
     if n < 2:
-        return {
+        return None, {
             "labels": [0]*n,
             "cluster_ids": [0],
             "keywords": [[]],
@@ -91,148 +248,172 @@ def _fcm_cluster(texts: List[str], n_clusters: int) -> Dict:
     k = max(2, min(n_clusters, n))
 
     dim = min(100, max(2, min(x.shape[0]-1, x.shape[1]-1)))
-    svd = TruncatedSVD(n_components=dim, random_state=42)
-    x_red = svd.fit_transform(x)             # shape: (n_samples, dim)
-    data = x_red.T                           # shape: (dim, n_samples) for skfuzzy
-
-    # Run FCM
-    cntr, u, _, _, _, _, _ = fuzz.cluster.cmeans(
-        data, c=k, m=2.0, error=0.005, maxiter=1000, init=None
-    )
-    # Hard labels from memberships
-    labels = np.argmax(u, axis=0)            # shape: (n_samples,)
-
-    # Keywords via weighted centroids in TF-IDF space
-    # centroid_j = (sum_i u[j,i] * X[i]) / sum_i u[j,i]
-    weights_sum = u.sum(axis=1) + 1e-9       # (k,)
-    centers_tfidf = []
-    for j in range(k):
-        w = u[j, :].reshape(-1, 1)           # (n_samples, 1)
-        # Weighted sum in TF-IDF space using sparse ops
-        weighted = (w.T @ x).A1 / float(weights_sum[j])  # dense 1D
-        centers_tfidf.append(weighted)
-    centers_tfidf = np.vstack(centers_tfidf) # (k, n_features)
+    with timed('svd'):
+        svd = sk_decomposition.TruncatedSVD(n_components=dim, random_state=42)
+        x_red = svd.fit_transform(x).astype(np.float32)   # shape: (n_samples, dim)
+
+    # Run FCM (float32, stops early once memberships settle)
+    with timed('fcm'):
+        cntr, u, _ = fcm.fuzzy_cmeans(
+            x_red, c=k, m=2.0, error=settings.FCM_ERROR, maxiter=settings.FCM_MAX_ITER, sample_weight=weights
+        )
 
+        # Keywords via weighted centroids in TF-IDF space (one sparse-dense product)
+        centers_tfidf = fcm.weighted_centroids(u, x, weights)     # (k, n_features)
     feature_names = vectorizer.get_feature_names_out()
-    keywords = _top_terms_from_centers(feature_names, centers_tfidf, top_n=5)
-
-    sizes = [int((labels == i).sum()) for i in range(k)]
-
-    # Representatives: closest to FCM centers in reduced space
-    representatives = []
-    for i in range(k):
-        idxs = np.where(labels == i)[0]
-        if len(idxs) == 0:
-            representatives.append([])
-            continue
-        center = cntr[i].reshape(1, -1)      # (1, dim)
-        dists = np.linalg.norm(x_red[idxs] - center, axis=1)
-        order = np.argsort(dists)[:settings.CLUSTER_REPRESENTATIVES]
-        reps = [texts[int(idxs[j])] for j in order]
-        representatives.append(reps)
+    keywords = top_terms(feature_names, centers_tfidf, top_n=5)
 
-    return {
-        "labels": labels.tolist(),
-        "cluster_ids": list(range(k)),
-        "keywords": keywords,
-        "sizes": sizes,
-        "n_clusters": k,
-        "representatives": representatives
-    }
+    model = FCMAspectModel(vectorizer, svd, cntr, keywords, m=2.0)
+    return model, model.summarize(texts, x_red, u, weights)
 
 
-def _bertopic_cluster(texts: List[str]) -> Dict:
+def _fcm_cluster(texts: List[str], n_clusters: int) -> Dict:
+    return _fcm_fit(texts, n_clusters)[1]
+
+
+def _embedding_store():
+    """Shared embedding store, or None to let BERTopic encode texts itself."""
+    try:
+        from .embeddings import get_embedding_store
+        return get_embedding_store()
+    except Exception:
+        return None
+
+
+class BERTopicAspectModel:
+    """Fitted BERTopic pipeline; `predict` runs `transform` on new texts.
+    When the model was fitted on precomputed embeddings (`embedding_model` set),
+    new texts are embedded through the same store, so only unseen texts are encoded.
+    """
+    algorithm = 'bertopic'
+
+    def __init__(self, topic_model, topic_ids: List[int], embedding_model: str = None):
+        self.topic_model = topic_model
+        self.topic_ids = topic_ids           # fitted topic ids, outliers (-1) excluded
+        self.embedding_model = embedding_model
+        self.keywords = [
+            [term for term, _ in (topic_model.get_topic(t) or [])[:5]]
+            for t in topic_ids
+        ]
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.topic_ids)
+
+    def summarize(self, texts: List[str], topics, fitted: bool = False, weights=None) -> Dict:
+        # Map arbitrary topic IDs to consecutive cluster_ids (-1 / unknown -> None)
+        topics = np.asarray(topics)
+        topic_ids = np.asarray(self.topic_ids)
+        pos = np.clip(np.searchsorted(topic_ids, topics), 0, len(topic_ids) - 1)
+        labels = np.where(topic_ids[pos] == topics, pos, -1)
+
+        with timed('cluster_summary'):
+            result = summarize(texts, labels, self.n_clusters, self.keywords, settings.CLUSTER_REPRESENTATIVES,
+                               weights=weights)
+        if fitted:
+            # Representatives: use representative docs of the fit if available
+            for i, t in enumerate(self.topic_ids):
+                try:
+                    result["representatives"][i] = \
+                        self.topic_model.get_representative_docs(t)[:settings.CLUSTER_REPRESENTATIVES]
+                except Exception:
+                    pass
+        return result
+
+    def predict(self, texts: List[str], tokens=None, weights=None) -> Dict:
+        embeddings = None
+        if self.embedding_model is not None and self.embedding_model == settings.EMBEDDING_MODEL:
+            store = _embedding_store()
+            if store is not None:
+                with timed('embeddings'):
+                    embeddings = store.encode(texts)
+        with timed('bertopic'):
+            topics, _ = self.topic_model.transform(texts, embeddings=embeddings)
+        return self.summarize(texts, list(topics), weights=weights)
+
+
+def _bertopic_fit(texts: List[str], tokens=None, weights=None) -> Tuple[object, Dict]:
     if not _HAS_BERTOPIC or len(texts) < 2:
         # Fallback to KMeans
-        return _kmeans_cluster(texts, n_clusters=5)
+        if not _HAS_BERTOPIC:
+            record_event("bertopic not installed; clustered with kmeans")
+        return _kmeans_fit(texts, n_clusters=5, tokens=tokens, weights=weights)
 
-    # Fit BERTopic (default multilingual config)
-    topic_model = BERTopic(verbose=False)
-    topics, _ = topic_model.fit_transform(texts)
+    # Fit BERTopic on cached embeddings when the store is available (only new texts get encoded)
+    store = _embedding_store()
+    if store is not None:
+        with timed('embeddings'):
+            embeddings = store.encode(texts)
+        with timed('bertopic'):
+            topic_model = bertopic.BERTopic(embedding_model=store.encoder, verbose=False)
+            topics, _ = topic_model.fit_transform(texts, embeddings=embeddings)
+        embedding_model = settings.EMBEDDING_MODEL
+    else:
+        # Default config: BERTopic encodes every text itself
+        with timed('bertopic'):
+            topic_model = bertopic.BERTopic(verbose=False)
+            topics, _ = topic_model.fit_transform(texts)
+        embedding_model = None
 
-    # Map arbitrary topic IDs to consecutive cluster_ids
     unique_topics = [t for t in sorted(set(topics)) if t != -1]
     if not unique_topics:
-        return {
-            "labels": [None]*len(texts),
-            "cluster_ids": [],
-            "keywords": [],
-            "sizes": [],
-            "n_clusters": 0,
-            "representatives": []
-        }
-    id_map = {t: i for i, t in enumerate(unique_topics)}
-    labels = [id_map.get(t, None) for t in topics]
-
-    # Keywords per topic
-    keywords = []
-    sizes = []
-    representatives = []
-    for t in unique_topics:
-        # Top terms
-        topic_terms = topic_model.get_topic(t) or []
-        kw = [term for term, _ in topic_terms[:5]]
-        keywords.append(kw)
-
-        # Size
-        idxs = [i for i, tt in enumerate(topics) if tt == t]
-        sizes.append(len(idxs))
-
-        # Representatives: use representative docs if available
-        reps = []
-        try:
-            reps = topic_model.get_representative_docs(t)[:settings.CLUSTER_REPRESENTATIVES]
-        except Exception:
-            reps = [texts[i] for i in idxs[:settings.CLUSTER_REPRESENTATIVES]]
-        representatives.append(reps)
+        return None, _empty_result(len(texts))
+
+    model = BERTopicAspectModel(topic_model, unique_topics, embedding_model=embedding_model)
+    return model, model.summarize(texts, topics, fitted=True, weights=weights)
 
-    return {
-        "labels": labels,
-        "cluster_ids": list(range(len(unique_topics))),
-        "keywords": keywords,
-        "sizes": sizes,
-        "n_clusters": len(unique_topics),
-        "representatives": representatives
-    }
+
+def _bertopic_cluster(texts: List[str]) -> Dict:
+    return _bertopic_fit(texts)[1]
 
 
 class AspectClusterer:
     """Cluster comments into aspects with selectable algorithm.
     - 'kmeans' (default): TF-IDF + KMeans
-    - 'fcm'            : TF-IDF (+ SVD) + Fuzzy C-Means (if scikit-fuzzy available)
+    - 'fcm'            : TF-IDF (+ SVD) + Fuzzy C-Means (NumPy implementation in fcm.py)
     - 'bertopic'       : BERTopic (if installed)
     Returns labels, keywords, sizes, representatives.
+    After `cluster` fits, the fitted model is available as `self.model` (None
+    when nothing was fitted). Passing a fitted `model` skips fitting: texts are
+    only transformed and assigned to the model's clusters.
+    `cluster` can take the distinct texts of a PreprocessedBatch: `tokens` are reused
+    by TF-IDF and `weights` (occurrences per text) weigh the fit and the sizes.
+    `mode` selects the KMeans path: 'exact', 'large' (LargeKMeansAspectModel) or
+    'auto' (large from CLUSTER_LARGE_MIN_TEXTS texts).
     """
-    def __init__(self, algorithm='kmeans'):
-        self.algorithm = algorithm
+    def __init__(self, algorithm='kmeans', model=None, mode='auto'):
+        self.algorithm = model.algorithm if model is not None else algorithm
+        self.model = model
+        self.mode = mode
+        self.fitted = False          # True when `cluster` fitted a new model
+
+    def _large(self, n: int) -> bool:
+        return self.mode == 'large' or (self.mode == 'auto' and n >= settings.CLUSTER_LARGE_MIN_TEXTS)
+
+    def _fit(self, texts: List[str], n_clusters: int, tokens=None, weights=None) -> Tuple[object, Dict]:
+        if self.algorithm == 'kmeans':
+            if self._large(len(texts)):
+                return _large_kmeans_fit(texts, n_clusters=n_clusters, tokens=tokens, weights=weights)
+            return _kmeans_fit(texts, n_clusters=n_clusters, tokens=tokens, weights=weights)
+        elif self.algorithm == 'fcm':
+            return _fcm_fit(texts, n_clusters=n_clusters, tokens=tokens, weights=weights)
+        elif self.algorithm == 'bertopic':
+            # n_clusters is ignored by BERTopic (determines topics automatically)
+            return _bertopic_fit(texts, tokens=tokens, weights=weights)
+        else:
+            # Unknown algorithm -> fallback
+            return _kmeans_fit(texts, n_clusters=n_clusters, tokens=tokens, weights=weights)
 
-    def cluster(self, texts: List[str], n_clusters: int = 5) -> Dict:
+    def cluster(self, texts: List[str], n_clusters: int = 5, tokens=None, weights=None) -> Dict:
         if not _HAS_SK or len(texts) < 2:
-            return {
-                "labels": [None]*len(texts),
-                "cluster_ids": [],
-                "keywords": [],
-                "sizes": [],
-                "n_clusters": 0,
-                "representatives": []
-            }
+            return _empty_result(len(texts))
         try:
-            if self.algorithm == 'kmeans':
-                return _kmeans_cluster(texts, n_clusters=n_clusters)
-            elif self.algorithm == 'fcm':
-                return _fcm_cluster(texts, n_clusters=n_clusters)
-            elif self.algorithm == 'bertopic':
-                # n_clusters is ignored by BERTopic (determines topics automatically)
-                return _bertopic_cluster(texts)
-            else:
-                # Unknown algorithm -> fallback
-                return _kmeans_cluster(texts, n_clusters=n_clusters)
-        except Exception:
-            return {
-                "labels": [None]*len(texts),
-                "cluster_ids": [],
-                "keywords": [],
-                "sizes": [],
-                "n_clusters": 0,
-                "representatives": []
-            }
+            if self.model is not None and not self.fitted:
+                return self.model.predict(texts, tokens=tokens, weights=weights)
+            self.model, result = self._fit(texts, n_clusters, tokens=tokens, weights=weights)
+            self.fitted = True
+            return result
+        except Exception as exc:
+            record_event(f"clustering failed ({self.algorithm}): {type(exc).__name__}",
+                         counter='analysis_clustering_errors_total', algorithm=self.algorithm)
+            return _empty_result(len(texts))
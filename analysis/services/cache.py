@@ -0,0 +1,263 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+
+def text_hash(text: str) -> str:
+    """Stable content hash used in cache keys."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _json_default(value):
+    # NumPy scalars/arrays in results (e.g. BERTopic topic ids)
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class LRUCache:
+    """Bounded, thread-safe in-memory LRU map."""
+    def __init__(self, maxsize: int):
+        self.maxsize = max(0, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+        return found
+
+    def set_many(self, items: Dict):
+        if not self.maxsize:
+            return
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteStore:
+    """Persistent key -> JSON value table in a local SQLite file.
+    With `max_entries`, the least recently written rows beyond it are deleted on write."""
+    _CHUNK = 500  # stay well below SQLite's bound-parameter limit
+
+    def __init__(self, path: str, table: str = 'cache', max_entries: Optional[int] = None):
+        self.path = str(path)
+        self.table = table
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict:
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), self._CHUNK):
+                chunk = keys[start:start + self._CHUNK]
+                marks = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key, value FROM {self.table} WHERE key IN ({marks})', chunk
+                )
+                for key, value in rows:
+                    found[key] = json.loads(value)
+        return found
+
+    def set_many(self, items: Dict):
+        if not items:
+            return
+        rows = [(key, json.dumps(value, default=_json_default)) for key, value in items.items()]
+        with self._lock:
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)', rows
+            )
+            if self.max_entries is not None:
+                # REPLACE assigns a new rowid, so rowid order is write order
+                self._conn.execute(
+                    f'DELETE FROM {self.table} WHERE rowid NOT IN '
+                    f'(SELECT rowid FROM {self.table} ORDER BY rowid DESC LIMIT ?)', (self.max_entries,)
+                )
+            self._conn.commit()
+
+    def delete_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        with self._lock:
+            for start in range(0, len(keys), self._CHUNK):
+                chunk = keys[start:start + self._CHUNK]
+                marks = ','.join('?' * len(chunk))
+                self._conn.execute(f'DELETE FROM {self.table} WHERE key IN ({marks})', chunk)
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f'DELETE FROM {self.table}')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """In-memory LRU in front of an optional persistent store.
+    Disk hits are promoted to memory. Hit/miss counters are kept per tier.
+    With `ttl` (seconds) values are stored with their write time and expire in both
+    tiers; expired entries count as misses and are dropped when found.
+    """
+    def __init__(self, maxsize: int, store: Optional[SQLiteStore] = None, ttl: Optional[float] = None):
+        self.memory = LRUCache(maxsize)
+        self.store = store
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict:
+        keys = list(keys)
+        found = self.memory.get_many(keys)
+        memory_hits = len(found)
+        disk_found = {}
+        if self.store is not None and len(found) < len(keys):
+            disk_found = self.store.get_many(k for k in keys if k not in found)
+            if disk_found:
+                self.memory.set_many(disk_found)
+                found.update(disk_found)
+        if self.ttl is not None:
+            found, memory_hits, disk_found = self._unexpired(found, memory_hits, disk_found)
+        with self._lock:
+            self.hits += memory_hits
+            self.disk_hits += len(disk_found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _unexpired(self, found: Dict, memory_hits: int, disk_found: Dict):
+        """Unwrap [written_at, value] entries, dropping the expired ones."""
+        oldest = time.time() - self.ttl
+        expired = {key for key, (written_at, _) in found.items() if written_at < oldest}
+        if expired:
+            self.memory.delete_many(expired)
+            if self.store is not None:
+                self.store.delete_many(expired)
+            memory_hits -= sum(1 for key in expired if key not in disk_found)
+            disk_found = {key: v for key, v in disk_found.items() if key not in expired}
+        found = {key: value for key, (_, value) in found.items() if key not in expired}
+        return found, memory_hits, disk_found
+
+    def set_many(self, items: Dict):
+        if self.ttl is not None:
+            now = time.time()
+            items = {key: [now, value] for key, value in items.items()}
+        self.memory.set_many(items)
+        if self.store is not None:
+            self.store.set_many(items)
+
+    def clear(self):
+        self.memory.clear()
+        if self.store is not None:
+            self.store.clear()
+        with self._lock:
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self.memory),
+                "maxsize": self.memory.maxsize,
+                "persistent": self.store is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+class SentimentCache(TieredCache):
+    """Sentiment results keyed by (backend, model name, preprocessed-text hash)."""
+    @staticmethod
+    def key(backend: str, model_name: str, text: str) -> str:
+        return f"{backend}:{model_name}:{text_hash(text)}"
+
+
+class ClusterCache(TieredCache):
+    """Clustering results keyed by a fingerprint of the clustered texts and their weights
+    plus every option that changes the result."""
+    @staticmethod
+    def fingerprint(texts: Sequence[str], weights=None) -> str:
+        digest = hashlib.sha1('\0'.join(texts).encode('utf-8'))
+        digest.update(f"|{len(texts)}|".encode())
+        if weights is not None:
+            digest.update(np.asarray(weights, dtype=np.int64).tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(fingerprint: str, algorithm: str, mode: str, n_clusters: int, n_reps: int,
+            params: Sequence = ()) -> str:
+        """`params`: settings the result depends on (large-corpus sizes, embedding model, ...)."""
+        extra = ''.join(f"{p}:" for p in params)
+        return f"{algorithm}:{mode}:{n_clusters}:{n_reps}:{extra}{fingerprint}"
+
+
+_sentiment_cache = None
+_sentiment_cache_lock = threading.Lock()
+_cluster_cache = None
+_cluster_cache_lock = threading.Lock()
+
+
+def get_sentiment_cache() -> Optional[SentimentCache]:
+    """Process-wide sentiment cache built from settings (None when disabled)."""
+    global _sentiment_cache
+    from django.conf import settings
+    size = getattr(settings, 'SENTIMENT_CACHE_SIZE', 0)
+    if size <= 0:
+        return None
+    with _sentiment_cache_lock:
+        if _sentiment_cache is None:
+            path = getattr(settings, 'SENTIMENT_CACHE_PATH', '')
+            store = SQLiteStore(path, table='sentiment') if path else None
+            _sentiment_cache = SentimentCache(size, store=store)
+        return _sentiment_cache
+
+
+def get_cluster_cache() -> Optional[ClusterCache]:
+    """Process-wide clustering result cache built from settings (None when disabled)."""
+    global _cluster_cache
+    from django.conf import settings
+    size = getattr(settings, 'CLUSTER_CACHE_SIZE', 0)
+    if size <= 0:
+        return None
+    with _cluster_cache_lock:
+        if _cluster_cache is None:
+            path = getattr(settings, 'CLUSTER_CACHE_PATH', '')
+            store = SQLiteStore(path, table='clusters', max_entries=settings.CLUSTER_CACHE_DISK_SIZE) if path else None
+            _cluster_cache = ClusterCache(size, store=store, ttl=settings.CLUSTER_CACHE_TTL or None)
+        return _cluster_cache
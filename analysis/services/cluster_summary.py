@@ -0,0 +1,94 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def top_terms(feature_names, centers, top_n: int = 5) -> List[List[str]]:
+    """Top-n positively weighted terms per center row.
+    argpartition selects the candidates in O(n_features) per row; only those are sorted.
+    """
+    centers = np.asarray(centers)
+    n_features = centers.shape[1]
+    if n_features == 0 or top_n <= 0:
+        return [[] for _ in range(centers.shape[0])]
+    top_n = min(top_n, n_features)
+    candidates = np.argpartition(-centers, top_n - 1, axis=1)[:, :top_n]
+    values = np.take_along_axis(centers, candidates, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    top_idx = np.take_along_axis(candidates, order, axis=1)
+    top_val = np.take_along_axis(values, order, axis=1)
+    return [
+        [feature_names[j] for j, v in zip(idx_row, val_row) if v > 0]
+        for idx_row, val_row in zip(top_idx, top_val)
+    ]
+
+
+def cluster_sizes(labels: np.ndarray, k: int, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Members per cluster; labels < 0 (outliers/unassigned) are ignored.
+    `weights` counts a row as that many members (e.g. how often a unique text occurred).
+    """
+    labels = np.asarray(labels)
+    valid = labels >= 0
+    if weights is None:
+        return np.bincount(labels[valid], minlength=k)[:k]
+    sizes = np.bincount(labels[valid], weights=np.asarray(weights)[valid], minlength=k)[:k]
+    return np.rint(sizes).astype(np.int64)
+
+
+def representatives(texts: Sequence[str], labels: np.ndarray, k: int, n_reps: int,
+                    distances: Optional[np.ndarray] = None) -> List[List[str]]:
+    """Up to n_reps texts per cluster.
+    With `distances` (n_samples, k) — e.g. KMeans.transform(X) — or (n_samples,) distances
+    to the own centroid, members closest to their centroid come first; otherwise members
+    keep input order.
+    One lexsort groups all clusters at once instead of a search per cluster.
+    """
+    labels = np.asarray(labels)
+    valid = np.flatnonzero(labels >= 0)
+    valid_labels = labels[valid]
+    if distances is not None:
+        distances = np.asarray(distances)
+        own = distances[valid] if distances.ndim == 1 else distances[valid, valid_labels]
+        order = valid[np.lexsort((own, valid_labels))]
+    else:
+        order = valid[np.argsort(valid_labels, kind='stable')]
+    counts = np.bincount(valid_labels, minlength=k)[:k]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return [
+        [texts[int(i)] for i in order[start:start + min(count, n_reps)]]
+        for start, count in zip(starts, counts)
+    ]
+
+
+def summarize(texts: Sequence[str], labels, k: int, keywords: List[List[str]], n_reps: int,
+              distances: Optional[np.ndarray] = None, weights: Optional[np.ndarray] = None) -> Dict:
+    """Standard clustering result shared by all algorithms.
+    `labels` uses -1 (or None) for texts outside every cluster; those map to None.
+    `weights` (occurrences per text) only affects sizes.
+    """
+    if isinstance(labels, np.ndarray):
+        labels = labels.astype(np.int64, copy=False)
+    else:
+        labels = np.array([-1 if label is None else label for label in labels], dtype=np.int64)
+    return {
+        "labels": [int(label) if label >= 0 else None for label in labels.tolist()],
+        "cluster_ids": list(range(k)),
+        "keywords": keywords,
+        "sizes": cluster_sizes(labels, k, weights).tolist(),
+        "n_clusters": k,
+        "representatives": representatives(texts, labels, k, n_reps, distances),
+    }
+
+
+def label_counts(labels, classes, k: int, n_classes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Class counts overall and per cluster in two bincounts.
+    `labels` are cluster ids (< 0 or None: no cluster), `classes` class indices per row
+    (e.g. sentiment). Returns (overall (n_classes,), per_cluster (k, n_classes)).
+    """
+    classes = np.asarray(classes, dtype=np.int64)
+    if not isinstance(labels, np.ndarray):
+        labels = np.fromiter((-1 if label is None else label for label in labels), dtype=np.int64, count=len(classes))
+    overall = np.bincount(classes, minlength=n_classes)[:n_classes]
+    valid = labels >= 0
+    per_cluster = np.bincount(labels[valid] * n_classes + classes[valid], minlength=k * n_classes)
+    return overall, per_cluster[:k * n_classes].reshape(k, n_classes)
@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+from typing import List
+
+import numpy as np
+
+from .cache import text_hash
+from .lazy import LazyModule, available
+
+# Optional: sentence-transformers (BERTopic's embedding backend), loaded with the first store
+_HAS_SENTENCE_TRANSFORMERS = available('sentence_transformers')
+sentence_transformers = LazyModule('sentence_transformers')
+
+
+class EmbeddingStore:
+    """Sentence embeddings cached per text hash on local disk.
+    - vectors.f32: row-major float32 matrix, appended to and read through np.memmap.
+    - index.sqlite3: text hash -> row, plus the embedding dimension.
+    Appends happen inside an IMMEDIATE SQLite transaction, which doubles as the
+    cross-process lock, so several workers can share one store.
+    `encoder` is any object with `encode(list_of_texts) -> array`; it is only
+    called for texts that are not in the store yet.
+    """
+    _CHUNK = 500
+
+    def __init__(self, directory: str, encoder, batch_size: int = 64):
+        self.directory = str(directory)
+        self.encoder = encoder
+        self.batch_size = batch_size
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, 'vectors.f32')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'),
+                                     check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS rows (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def dim(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        return int(row[0]) if row else None
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM rows').fetchone()[0]
+
+    def _lookup(self, hashes: List[str]) -> dict:
+        found = {}
+        for start in range(0, len(hashes), self._CHUNK):
+            chunk = hashes[start:start + self._CHUNK]
+            marks = ','.join('?' * len(chunk))
+            found.update(self._conn.execute(f'SELECT hash, row FROM rows WHERE hash IN ({marks})', chunk))
+        return found
+
+    def _append(self, hashes: List[str], vectors: np.ndarray):
+        """Append vectors for hashes that are still missing (another process may have added some)."""
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            present = self._lookup(hashes)
+            dim = self.dim
+            if dim is None:
+                dim = vectors.shape[1]
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('dim', ?)", (str(dim),))
+            elif dim != vectors.shape[1]:
+                raise ValueError(f"Embedding dimension changed ({dim} -> {vectors.shape[1]}); use a new store.")
+            keep = [i for i, h in enumerate(hashes) if h not in present]
+            if keep:
+                size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+                first_row = size // (dim * 4)
+                with open(self.vectors_path, 'ab') as fh:
+                    fh.write(np.ascontiguousarray(vectors[keep], dtype=np.float32).tobytes())
+                self._conn.executemany(
+                    'INSERT INTO rows (hash, row) VALUES (?, ?)',
+                    [(hashes[i], first_row + n) for n, i in enumerate(keep)]
+                )
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embeddings for texts, shape (len(texts), dim), float32; only new texts are encoded."""
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        hashes = [text_hash(t) for t in texts]
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            rows = self._lookup(unique)
+            missing = [h for h in unique if h not in rows]
+            self.hits += len(unique) - len(missing)
+            self.misses += len(missing)
+            if missing:
+                first_text = {}
+                for h, t in zip(hashes, texts):
+                    first_text.setdefault(h, t)
+                vectors = np.asarray(
+                    self.encoder.encode([first_text[h] for h in missing], batch_size=self.batch_size),
+                    dtype=np.float32
+                )
+                self._append(missing, vectors)
+                rows = self._lookup(unique)
+
+            dim = self.dim
+            n_rows = os.path.getsize(self.vectors_path) // (dim * 4)
+            matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(n_rows, dim))
+            return np.asarray(matrix[[rows[h] for h in hashes]])
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self), "dim": self.dim, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self._conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store():
+    """Process-wide store for EMBEDDING_MODEL (None if sentence-transformers is unavailable)."""
+    from django.conf import settings
+    model_name = settings.EMBEDDING_MODEL
+    directory = os.path.join(str(settings.EMBEDDING_STORE_DIR), model_name.replace('/', '__'))
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            if not _HAS_SENTENCE_TRANSFORMERS:
+                return None
+            store = EmbeddingStore(directory, sentence_transformers.SentenceTransformer(model_name),
+                                   batch_size=settings.EMBEDDING_BATCH_SIZE)
+            _stores[directory] = store
+        return store
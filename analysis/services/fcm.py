@@ -0,0 +1,60 @@
+from typing import Tuple
+
+import numpy as np
+
+_EPS = np.finfo(np.float32).eps
+
+
+def sq_distances(x, centers):
+    """Squared Euclidean distances, shape (k, n_samples), via one matmul."""
+    x_sq = np.einsum('ij,ij->i', x, x)
+    c_sq = np.einsum('ij,ij->i', centers, centers)
+    d2 = c_sq[:, None] + x_sq[None, :] - 2.0 * (centers @ x.T)
+    return np.maximum(d2, _EPS)
+
+
+def memberships(x, centers, m: float = 2.0):
+    """Fuzzy memberships of the rows of x for fixed centers, shape (k, n_samples).
+    u_ij = 1 / sum_l (d_ij / d_lj)^(2/(m-1)), computed as normalized d^(-2/(m-1)).
+    """
+    x = np.asarray(x, dtype=np.float32)
+    centers = np.asarray(centers, dtype=np.float32)
+    inv = sq_distances(x, centers) ** np.float32(-1.0 / (m - 1.0))
+    return inv / inv.sum(axis=0, keepdims=True)
+
+
+def fuzzy_cmeans(x, c: int, m: float = 2.0, error: float = 0.005, maxiter: int = 300,
+                 random_state: int = 42, sample_weight=None) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Fit Fuzzy C-Means on x of shape (n_samples, dim).
+    Stops when the Frobenius norm of the membership change drops below `error`
+    (the same criterion as skfuzzy.cluster.cmeans).
+    `sample_weight` (n_samples,) weighs rows in the center update, e.g. by duplicate count.
+    Returns (centers (c, dim), memberships (c, n_samples), iterations run), float32.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    rng = np.random.default_rng(random_state)
+    u = rng.random((c, x.shape[0]), dtype=np.float32)
+    u /= u.sum(axis=0, keepdims=True)
+
+    m = np.float32(m)
+    w = None if sample_weight is None else np.asarray(sample_weight, dtype=np.float32)[None, :]
+    n_iter = 0
+    for n_iter in range(1, maxiter + 1):
+        um = u ** m if w is None else (u ** m) * w
+        centers = (um @ x) / np.maximum(um.sum(axis=1, keepdims=True), _EPS)
+        u_new = memberships(x, centers, m)
+        delta = float(np.linalg.norm(u_new - u))
+        u = u_new
+        if delta < error:
+            break
+    return centers, u, n_iter
+
+
+def weighted_centroids(u, X, sample_weight=None):
+    """Membership-weighted centroids of the rows of X (sparse or dense), shape (k, n_features).
+    centroid_j = (sum_i u[j,i] * X[i]) / sum_i u[j,i], as a single sparse-dense product.
+    """
+    if sample_weight is not None:
+        u = u * np.asarray(sample_weight, dtype=u.dtype)[None, :]
+    sums = (X.T @ u.T).T                     # (k, n_features)
+    return np.asarray(sums) / (u.sum(axis=1, keepdims=True) + 1e-9)
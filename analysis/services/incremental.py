@@ -0,0 +1,310 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: updates are serialized within the process only
+    fcntl = None
+
+import numpy as np
+from django.conf import settings
+
+from .aspect_models import NAME_RE
+from .aspects import _HAS_SK, sk_cluster, sk_text
+from .cache import text_hash
+from .cluster_summary import top_terms
+from .lazy import LazyModule
+from .metrics import record_event, timed
+from .pipeline import SENTIMENT_LABELS
+from .registry import get_analyzer
+from .text_preprocess import PRETOKENIZED, PreprocessedBatch, tokenize, vectorizer_docs
+
+# Loaded on the first state load/save
+joblib = LazyModule('joblib')
+
+
+class InvalidCorpusId(ValueError):
+    pass
+
+
+class CorpusState:
+    """Everything kept between calls for one video/corpus.
+    Only hashes, per-comment results, centroids/counts and a few representative
+    texts per cluster are stored; the full comment texts are not.
+    Texts wait in `pending` until at least `min_fit_texts` distinct texts have
+    arrived; the TF-IDF vocabulary is then fitted on all of them and frozen, and
+    later comments are transformed with it and folded in with MiniBatchKMeans.partial_fit.
+    A failed first fit leaves the texts pending; `assign` changes nothing until the
+    clustering step has succeeded.
+    Sizes and sentiment counts count every comment (a text posted three times in one
+    request counts three times) under the cluster it was assigned when it arrived;
+    texts seen in an earlier request are not counted again.
+    """
+    def __init__(self, corpus_id: str, n_clusters: int, min_fit_texts: int = 2):
+        self.corpus_id = corpus_id
+        self.n_clusters = n_clusters
+        self.min_fit_texts = max(2, int(min_fit_texts))
+        self.vectorizer = None
+        self.kmeans = None
+        self.seen: Dict[str, tuple] = {}     # text hash -> (cluster_id | None, sentiment)
+        self.pending: List[str] = []         # cleaned texts waiting for the first fit
+        self.pending_counts: List[int] = []  # comments per pending text
+        self.n_comments = 0                  # comments counted so far (not distinct texts)
+        self.overall = np.zeros(len(SENTIMENT_LABELS), dtype=np.int64)
+        self.sizes = None                    # (k,) comments per cluster
+        self.sentiment_counts = None         # (k, 3) negative/neutral/positive per cluster
+        self.representatives = None          # per cluster: [(distance, cleaned text)]
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+
+    @property
+    def k(self) -> int:
+        return int(self.kmeans.n_clusters) if self.kmeans is not None else 0
+
+    def _fit(self, docs):
+        """(vectorizer, kmeans, X) fitted on docs, or None when they have no usable terms.
+        Does not touch the state."""
+        for max_df in (0.9, 1.0):
+            vectorizer = sk_text.TfidfVectorizer(min_df=1, max_df=max_df, ngram_range=(1,2), **PRETOKENIZED)
+            try:
+                X = vectorizer.fit_transform(docs)
+            except ValueError:
+                # Every term pruned (e.g. near-identical texts): keep shared terms
+                continue
+            k = max(2, min(self.n_clusters, X.shape[0]))
+            kmeans = sk_cluster.MiniBatchKMeans(n_clusters=k, n_init=3, random_state=42, batch_size=1024)
+            kmeans.fit(X)
+            return vectorizer, kmeans, X
+        return None
+
+    def assign(self, hashes: List[str], texts: List[str], sentiments: List[Dict], tokens=None, counts=None):
+        """Add new (unseen, unique) cleaned texts with their sentiment (and cached tokens).
+        `counts`: comments per text in this request (default 1 each)."""
+        counts = np.ones(len(texts), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        new_hashes, new_sentiments, new_counts = hashes, sentiments, counts
+
+        if self.kmeans is None:
+            # Pending texts (already in `seen`) are fitted together with the new ones
+            pending_hashes = [text_hash(t) for t in self.pending]
+            waiting = self.pending + texts
+            waiting_counts = np.concatenate((np.asarray(self.pending_counts, dtype=np.int64), counts))
+            fitted = None
+            if len(waiting) >= self.min_fit_texts:
+                docs = [tokenize(d) for d in self.pending] + (tokens if tokens is not None else [tokenize(t) for t in texts])
+                fitted = self._fit(docs)
+                if fitted is None:
+                    record_event("incremental clustering: no usable terms yet; texts kept pending",
+                                 counter='analysis_clustering_errors_total', algorithm='incremental')
+            if fitted is None:
+                self._count(new_sentiments, new_counts)
+                self.pending, self.pending_counts = waiting, waiting_counts.tolist()
+                for h, s in zip(new_hashes, new_sentiments):
+                    self.seen[h] = (None, s)
+                return
+            hashes = pending_hashes + hashes
+            sentiments = [self.seen[h][1] for h in pending_hashes] + sentiments
+            texts, counts = waiting, waiting_counts
+            vectorizer, kmeans, X = fitted
+            distances = kmeans.transform(X)
+            self.vectorizer, self.kmeans = vectorizer, kmeans
+            self.sizes = np.zeros(self.k, dtype=np.int64)
+            self.sentiment_counts = np.zeros((self.k, len(SENTIMENT_LABELS)), dtype=np.int64)
+            self.representatives = [[] for _ in range(self.k)]
+            self.pending, self.pending_counts = [], []
+        else:
+            X = self.vectorizer.transform(vectorizer_docs(self.vectorizer, texts, tokens))
+            self.kmeans.partial_fit(X)
+            distances = self.kmeans.transform(X)
+        self._count(new_sentiments, new_counts)
+
+        labels = distances.argmin(axis=1)
+        own = distances[np.arange(len(labels)), labels]
+        label_idx = np.array([SENTIMENT_LABELS.index(s['label']) for s in sentiments], dtype=np.int64)
+
+        self.sizes += np.bincount(labels, weights=counts, minlength=self.k).astype(np.int64)
+        np.add.at(self.sentiment_counts, (labels, label_idx), counts)
+        for h, label, s in zip(hashes, labels.tolist(), sentiments):
+            self.seen[h] = (label, s)
+
+        n_reps = settings.CLUSTER_REPRESENTATIVES
+        for c in np.unique(labels):
+            members = np.flatnonzero(labels == c)
+            closest = members[np.argsort(own[members])[:n_reps]]
+            merged = self.representatives[c] + [(float(own[i]), texts[i]) for i in closest]
+            self.representatives[c] = sorted(merged)[:n_reps]
+
+    def _count(self, sentiments: List[Dict], counts: np.ndarray):
+        label_idx = np.array([SENTIMENT_LABELS.index(s['label']) for s in sentiments], dtype=np.int64)
+        self.n_comments += int(counts.sum())
+        np.add.at(self.overall, label_idx, counts)
+
+    def summary(self) -> Dict:
+        overall = dict(zip(SENTIMENT_LABELS, self.overall.tolist()))
+        aspects = []
+        if self.kmeans is not None:
+            keywords = top_terms(self.vectorizer.get_feature_names_out(), self.kmeans.cluster_centers_, top_n=5)
+            for c in range(self.k):
+                aspects.append({
+                    "cluster_id": c,
+                    "keywords": keywords[c],
+                    "size": int(self.sizes[c]),
+                    "representatives": [t for _, t in self.representatives[c]],
+                    "sentiment": dict(zip(SENTIMENT_LABELS, self.sentiment_counts[c].tolist())),
+                })
+        return {
+            "n_comments": self.n_comments,
+            "n_clusters": self.k,
+            "sentiment": overall,
+            "aspects": aspects,
+            "updated_at": self.updated_at,
+        }
+
+
+class CorpusStore:
+    """Corpus states on local disk (<root>/<corpus_id>.joblib), cached in memory.
+    - the cached copy is reused only while the file's mtime/size are unchanged, so
+      saves from other processes (e.g. other gunicorn workers) are picked up
+    - `lock(corpus_id)` serializes load-update-save across threads and, through an
+      fcntl lock on <root>/<corpus_id>.lock, across processes
+    """
+    def __init__(self, root: str):
+        self.root = str(root)
+        self._lock = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._states: Dict[str, tuple] = {}  # corpus_id -> (file signature, state)
+
+    def _path(self, corpus_id: str) -> str:
+        if not NAME_RE.match(corpus_id or ''):
+            raise InvalidCorpusId(f"Invalid corpus id: {corpus_id!r}")
+        return os.path.join(self.root, f'{corpus_id}.joblib')
+
+    @staticmethod
+    def _signature(path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    @contextmanager
+    def lock(self, corpus_id: str):
+        path = self._path(corpus_id)
+        with self._lock:
+            thread_lock = self._locks.setdefault(corpus_id, threading.Lock())
+        with thread_lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.root, exist_ok=True)
+            with open(path[:-len('.joblib')] + '.lock', 'a') as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def load(self, corpus_id: str) -> Optional[CorpusState]:
+        path = self._path(corpus_id)
+        signature = self._signature(path)
+        if signature is None:
+            self._states.pop(corpus_id, None)
+            return None
+        cached = self._states.get(corpus_id)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        state = joblib.load(path)
+        self._states[corpus_id] = (signature, state)
+        return state
+
+    def save(self, state: CorpusState):
+        path = self._path(state.corpus_id)
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        joblib.dump(state, tmp)
+        os.replace(tmp, path)
+        self._states[state.corpus_id] = (self._signature(path), state)
+
+    def discard(self, corpus_id: str):
+        """Forget the in-memory copy (the file on disk is kept)."""
+        self._states.pop(corpus_id, None)
+
+    def delete(self, corpus_id: str) -> bool:
+        path = self._path(corpus_id)
+        with self.lock(corpus_id):
+            self._states.pop(corpus_id, None)
+            if os.path.exists(path):
+                os.remove(path)
+                return True
+            return False
+
+
+def update_corpus(store: CorpusStore, corpus_id: str, comments: List[str], options: Dict,
+                  warnings: List[str]) -> Dict:
+    """Score and cluster only the comments this corpus has not seen before.
+    Returns the refreshed aggregate summary plus per-item results for this request.
+    """
+    if not _HAS_SK:
+        raise RuntimeError("Incremental analysis requires scikit-learn.")
+    if options.get('clustering_algorithm', 'kmeans') != 'kmeans':
+        warnings.append("Incremental analysis always clusters with TF-IDF + mini-batch KMeans.")
+
+    with timed('preprocess'):
+        batch = PreprocessedBatch.from_texts(comments)
+        hashes = [text_hash(t) for t in batch.unique]
+
+    with store.lock(corpus_id):
+        state = store.load(corpus_id)
+        if state is None:
+            n_clusters = options.get('num_aspect_clusters', 3)
+            state = CorpusState(corpus_id, n_clusters=n_clusters,
+                                min_fit_texts=settings.CORPUS_MIN_FIT_TEXTS or 5 * n_clusters)
+
+        # Delta: unique texts this corpus has not seen
+        new = [i for i, h in enumerate(hashes) if h not in state.seen]
+        if new:
+            analyzer = get_analyzer(
+                use_transformers=options.get('use_transformers', True),
+                model_name=settings.SENTIMENT_MODEL,
+                runtime=options.get('sentiment_runtime')
+            )
+            new_texts = [batch.unique[i] for i in new]
+            with timed('sentiment'):
+                sentiments = analyzer.batch_predict(new_texts)
+            try:
+                with timed('clustering'):
+                    state.assign([hashes[i] for i in new], new_texts, sentiments,
+                                 tokens=[batch.tokens[i] for i in new], counts=batch.counts[new])
+                state.updated_at = time.time()
+                with timed('state_save'):
+                    store.save(state)
+            except Exception:
+                # The cached copy may be half-updated; the next call reloads the saved one
+                store.discard(corpus_id)
+                raise
+
+        items = []
+        for original_text, i in zip(comments, batch.inverse.tolist()):
+            label, sentiment = state.seen[hashes[i]]
+            items.append({"text": original_text, "sentiment": dict(sentiment), "cluster_id": label})
+        return {
+            "corpus_id": corpus_id,
+            "n_new": len(new),
+            "summary": state.summary(),
+            "items": items,
+            "warnings": warnings,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_corpus_store() -> CorpusStore:
+    global _store
+    with _store_lock:
+        if _store is None or _store.root != str(settings.CORPUS_STATE_DIR):
+            _store = CorpusStore(settings.CORPUS_STATE_DIR)
+        return _store
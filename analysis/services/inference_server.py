@@ -0,0 +1,155 @@
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+from typing import Dict, Optional
+
+# Frames are a 4-byte big-endian length followed by a UTF-8 JSON object
+_HEADER = struct.Struct('>I')
+MAX_MESSAGE = 256 * 1024 * 1024
+
+
+def send_message(sock: socket.socket, message: Dict):
+    payload = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer.")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock: socket.socket) -> Optional[Dict]:
+    """Next message, or None when the peer closed the connection between messages."""
+    header = sock.recv(_HEADER.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < _HEADER.size:
+        raise ConnectionError("Connection closed by peer.")
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_MESSAGE:
+        raise ValueError(f"Message of {size} bytes exceeds the limit.")
+    return json.loads(_recv_exact(sock, size).decode('utf-8'))
+
+
+class InferenceClient:
+    """Connection to an inference server; one request/response at a time.
+    `timeout` bounds every socket operation, i.e. also the wait for one reply."""
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._sock = None
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+        return self._sock
+
+    def request(self, message: Dict) -> Dict:
+        """Send one message and return the reply; raises OSError/ValueError on transport
+        problems and RuntimeError when the server reports an error."""
+        sock = self._connect()
+        try:
+            send_message(sock, message)
+            reply = recv_message(sock)
+            if reply is None:
+                raise ConnectionError("Inference server closed the connection.")
+        except (OSError, ValueError):
+            self.close()
+            raise
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (OSError, ValueError):
+                return
+            if message is None:
+                return
+            try:
+                reply = self.server.dispatch(message)
+            except Exception as exc:
+                reply = {"error": f"{type(exc).__name__}: {exc}"}
+            try:
+                send_message(self.request, reply)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves sentiment predictions over a Unix socket from one process, so web workers
+    share its models instead of loading a copy each.
+    - {"op": "predict", "texts": [...], "model_name", "runtime", "budget"} ->
+      {"results": [...], "backend"}; analyzers come from `registry` (loaded on first use)
+    - {"op": "ping"} -> {"pid", "models": registry.status()}
+    One thread per client connection; connections are kept open across requests.
+    """
+    daemon_threads = True
+
+    def __init__(self, path: str, registry):
+        self.registry = registry
+        if os.path.exists(path):
+            # Left over from a previous run; refuse to steal a live server's socket
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)
+            else:
+                raise OSError(f"An inference server is already listening on {path}.")
+            finally:
+                probe.close()
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o600)
+
+    def dispatch(self, message: Dict) -> Dict:
+        op = message.get('op')
+        if op == 'ping':
+            return {"pid": os.getpid(), "models": self.registry.status()}
+        if op == 'predict':
+            analyzer = self.registry.get(message['model_name'], use_transformers=True,
+                                         runtime=message.get('runtime') or 'torch')
+            results = analyzer.batch_predict(message['texts'], budget=message.get('budget'))
+            return {"results": results, "backend": analyzer.backend}
+        raise ValueError(f"Unknown op {op!r}.")
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def serve_in_thread(server: InferenceServer) -> threading.Thread:
+    """Run `server` on a daemon thread (tests and embedded use)."""
+    thread = threading.Thread(target=server.serve_forever, name='inference-server', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,342 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .pipeline import analyze_comments
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+# Runs of one job before a job whose worker keeps disappearing is failed instead of requeued
+MAX_ATTEMPTS = 3
+
+
+def _new_record(job_id: str, n_comments: int) -> Dict:
+    return {
+        "job_id": job_id,
+        "status": QUEUED,
+        "stage": None,
+        "progress": 0.0,
+        "n_comments": n_comments,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "error": None,
+    }
+
+
+class MemoryJobStore:
+    """In-process job queue and records (lost on restart)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict] = {}
+        self._payloads: Dict[str, Dict] = {}
+        self._results: Dict[str, Dict] = {}
+        self._queue = deque()
+
+    def create(self, payload: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._records[job_id] = _new_record(job_id, len(payload['comments']))
+            self._payloads[job_id] = payload
+            self._queue.append(job_id)
+        return job_id
+
+    def claim(self, stale_before: Optional[float] = None) -> Optional[Tuple[str, Dict]]:
+        """Next queued job. Running jobs belong to this process's live workers, so
+        `stale_before` has nothing to requeue here."""
+        with self._lock:
+            if not self._queue:
+                return None
+            job_id = self._queue.popleft()
+            self._records[job_id].update(status=RUNNING, started_at=time.time())
+            return job_id, self._payloads.pop(job_id)
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            self._records[job_id].update(fields)
+
+    def finish(self, job_id: str, result: Dict):
+        with self._lock:
+            self._results[job_id] = result
+            self._records[job_id].update(status=DONE, stage='done', progress=1.0, finished_at=time.time())
+
+    def fail(self, job_id: str, error: str):
+        with self._lock:
+            self._records[job_id].update(status=FAILED, error=error, finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            record = self._records.get(job_id)
+            return dict(record) if record is not None else None
+
+    def result(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._results.get(job_id)
+
+    def purge(self, finished_before: float):
+        with self._lock:
+            expired = [job_id for job_id, r in self._records.items()
+                       if r['finished_at'] is not None and r['finished_at'] < finished_before]
+            for job_id in expired:
+                del self._records[job_id]
+                self._results.pop(job_id, None)
+
+
+class SQLiteJobStore:
+    """Job queue and records in a local SQLite file (survive restarts, shareable by processes).
+    A running job's payload is kept until it finishes; jobs whose worker stopped
+    sending progress (crashed or restarted process) are requeued by `claim`.
+    """
+    _FIELDS = ('job_id', 'status', 'stage', 'progress', 'n_comments',
+               'created_at', 'started_at', 'finished_at', 'error')
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS analysis_jobs ('
+            ' job_id TEXT PRIMARY KEY, status TEXT NOT NULL, stage TEXT, progress REAL NOT NULL,'
+            ' n_comments INTEGER NOT NULL, created_at REAL NOT NULL, started_at REAL,'
+            ' finished_at REAL, error TEXT, payload TEXT, result TEXT,'
+            ' heartbeat_at REAL, attempts INTEGER NOT NULL DEFAULT 0)'
+        )
+        # Files created before heartbeats/attempts were tracked
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(analysis_jobs)')}
+        if 'heartbeat_at' not in columns:
+            self._conn.execute('ALTER TABLE analysis_jobs ADD COLUMN heartbeat_at REAL')
+        if 'attempts' not in columns:
+            self._conn.execute('ALTER TABLE analysis_jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS analysis_jobs_queue ON analysis_jobs (status, created_at)'
+        )
+
+    def create(self, payload: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        record = _new_record(job_id, len(payload['comments']))
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO analysis_jobs (job_id, status, progress, n_comments, created_at, payload)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, QUEUED, 0.0, record['n_comments'], record['created_at'], json.dumps(payload))
+            )
+        return job_id
+
+    def _requeue_stale(self, stale_before: float):
+        """Running jobs without progress since `stale_before` go back to the queue
+        (or fail after MAX_ATTEMPTS runs)."""
+        stale = 'status = ? AND COALESCE(heartbeat_at, started_at) < ?'
+        self._conn.execute(
+            f'UPDATE analysis_jobs SET status = ?, error = ?, finished_at = ?, payload = NULL'
+            f' WHERE {stale} AND attempts >= ?',
+            (FAILED, f"Worker stopped responding ({MAX_ATTEMPTS} attempts).", time.time(),
+             RUNNING, stale_before, MAX_ATTEMPTS)
+        )
+        self._conn.execute(
+            f'UPDATE analysis_jobs SET status = ?, stage = NULL, progress = 0, started_at = NULL,'
+            f' heartbeat_at = NULL WHERE {stale}',
+            (QUEUED, RUNNING, stale_before)
+        )
+
+    def claim(self, stale_before: Optional[float] = None) -> Optional[Tuple[str, Dict]]:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front so two processes never claim the same job
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                if stale_before is not None:
+                    self._requeue_stale(stale_before)
+                row = self._conn.execute(
+                    'SELECT job_id, payload FROM analysis_jobs WHERE status = ? ORDER BY created_at LIMIT 1',
+                    (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    now = time.time()
+                    self._conn.execute(
+                        'UPDATE analysis_jobs SET status = ?, started_at = ?, heartbeat_at = ?,'
+                        ' attempts = attempts + 1 WHERE job_id = ?',
+                        (RUNNING, now, now, row[0])
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def update(self, job_id: str, **fields):
+        fields['heartbeat_at'] = time.time()
+        columns = ', '.join(f'{name} = ?' for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f'UPDATE analysis_jobs SET {columns} WHERE job_id = ?', (*fields.values(), job_id)
+            )
+
+    def finish(self, job_id: str, result: Dict):
+        with self._lock:
+            self._conn.execute(
+                'UPDATE analysis_jobs SET status = ?, stage = ?, progress = ?, finished_at = ?, result = ?,'
+                ' payload = NULL WHERE job_id = ?',
+                (DONE, 'done', 1.0, time.time(), json.dumps(result), job_id)
+            )
+
+    def fail(self, job_id: str, error: str):
+        self.update(job_id, status=FAILED, error=error, finished_at=time.time(), payload=None)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT {", ".join(self._FIELDS)} FROM analysis_jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+        return dict(zip(self._FIELDS, row)) if row is not None else None
+
+    def result(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT result FROM analysis_jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None and row[0] is not None else None
+
+    def purge(self, finished_before: float):
+        with self._lock:
+            self._conn.execute('DELETE FROM analysis_jobs WHERE finished_at < ?', (finished_before,))
+
+
+class JobManager:
+    """Runs submitted analysis jobs on a small pool of local worker threads.
+    Workers pull from the store, so jobs queued by another process sharing
+    the same SQLite file are picked up too (checked every `poll_interval` s).
+    Finished jobs are dropped `result_ttl` seconds after completion; running jobs
+    without a heartbeat for `stale_after` seconds are requeued (their worker is gone).
+    A heartbeat thread per running job refreshes it every `stale_after / 4` seconds,
+    whatever stage the job is in.
+    Store errors (e.g. a locked database) are logged and retried with backoff.
+    Jobs always keep their full items: options.response='summary' is turned into
+    'full', since its result_id would only be readable in the worker's process.
+    """
+    def __init__(self, store, workers: int = 2, poll_interval: float = 1.0, result_ttl: float = 3600,
+                 stale_after: float = 1800, max_backoff: float = 30.0):
+        self.store = store
+        self.workers = max(1, int(workers))
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self.stale_after = stale_after
+        self.heartbeat_interval = stale_after / 4
+        self.max_backoff = max_backoff
+        self._wakeup = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._started:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f'analysis-job-{i}', daemon=True)
+                t.start()
+                self._threads.append(t)
+            self._started = True
+
+    def submit(self, comments: List[str], options: Dict, warnings: List[str] = None) -> str:
+        self._ensure_started()
+        self.store.purge(time.time() - self.result_ttl)
+        warnings = list(warnings or [])
+        if options.get('response') == 'summary':
+            options = dict(options, response='full')
+            warnings.append("options.response='summary' is ignored for jobs; the job result contains every item.")
+        job_id = self.store.create({"comments": comments, "options": options, "warnings": warnings})
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def result(self, job_id: str) -> Optional[Dict]:
+        return self.store.result(job_id)
+
+    def _worker(self):
+        backoff = self.poll_interval
+        while True:
+            try:
+                claimed = self.store.claim(stale_before=time.time() - self.stale_after)
+                if claimed is not None:
+                    self._run(*claimed)
+                    backoff = self.poll_interval
+                    continue
+                wait = self.poll_interval
+            except Exception:
+                logger.exception("Analysis job worker error; retrying in %.1f s", backoff)
+                wait, backoff = backoff, min(backoff * 2, self.max_backoff)
+            with self._wakeup:
+                self._wakeup.wait(wait)
+
+    def _heartbeat(self, job_id: str, stop: threading.Event):
+        while not stop.wait(self.heartbeat_interval):
+            try:
+                # An update without fields only refreshes the heartbeat
+                self.store.update(job_id)
+            except Exception:
+                logger.warning("Heartbeat for job %s failed", job_id, exc_info=True)
+
+    def _fail(self, job_id: str, exc: Exception):
+        try:
+            self.store.fail(job_id, f"{type(exc).__name__}: {exc}")
+        except Exception:
+            # Left running: requeued once its heartbeat is stale (SQLite)
+            logger.exception("Could not mark job %s failed", job_id)
+
+    def _run(self, job_id: str, payload: Dict):
+        def progress(stage, fraction):
+            try:
+                self.store.update(job_id, stage=stage, progress=round(fraction, 4))
+            except Exception:
+                logger.warning("Progress update for job %s failed", job_id, exc_info=True)
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, stop),
+                                     name=f'analysis-job-heartbeat-{job_id[:8]}', daemon=True)
+        heartbeat.start()
+        try:
+            try:
+                result = analyze_comments(payload['comments'], payload['options'],
+                                          warnings=payload['warnings'], progress=progress)
+            except Exception as exc:
+                self._fail(job_id, exc)
+                return
+            try:
+                self.store.finish(job_id, result)
+            except Exception as exc:
+                logger.exception("Could not store the result of job %s", job_id)
+                self._fail(job_id, exc)
+        finally:
+            stop.set()
+            heartbeat.join()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide job manager built from settings."""
+    global _manager
+    from django.conf import settings
+    with _manager_lock:
+        if _manager is None:
+            if settings.JOB_BACKEND == 'sqlite':
+                store = SQLiteJobStore(settings.JOB_DB_PATH)
+            else:
+                store = MemoryJobStore()
+            _manager = JobManager(store, workers=settings.JOB_WORKERS, result_ttl=settings.JOB_RESULT_TTL,
+                                  stale_after=settings.JOB_STALE_AFTER)
+        return _manager
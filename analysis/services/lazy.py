@@ -0,0 +1,64 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+from typing import Dict
+
+from .metrics import timed
+
+_lock = threading.Lock()
+# module name -> seconds its first import took (through a LazyModule)
+_import_times: Dict[str, float] = {}
+
+
+def available(*modules: str) -> bool:
+    """True if every module can be found, without importing it (spec lookup only).
+    Pass top-level package names: a dotted name imports its parent packages.
+    """
+    for name in modules:
+        if name in sys.modules:
+            continue
+        try:
+            if importlib.util.find_spec(name) is None:
+                return False
+        except (ImportError, ValueError):
+            return False
+    return True
+
+
+class LazyModule:
+    """Stand-in for a heavy optional module, imported on first attribute access.
+    Import errors surface at that point, inside the caller's usual try/except fallback.
+    """
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def _load(self):
+        with _lock:
+            if self._module is None:
+                already = self._name in sys.modules
+                started = time.perf_counter()
+                with timed('import'):
+                    module = importlib.import_module(self._name)
+                if not already:
+                    _import_times[self._name] = time.perf_counter() - started
+                self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self):
+        return f"<LazyModule {self._name!r} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def import_times() -> Dict[str, float]:
+    """First-use import cost of the lazily loaded modules so far (seconds)."""
+    with _lock:
+        return dict(_import_times)
@@ -0,0 +1,214 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Seconds; covers sub-millisecond stages up to long model loads
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot: +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Process-local counters, gauges and histograms rendered in the Prometheus text format.
+    Metric families are created on first use; labels are passed as keyword arguments.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}     # name -> (type, help)
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._gauges: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+        self._buckets: Dict[str, tuple] = {}
+
+    def describe(self, name: str, kind: str, help_text: str, buckets=None):
+        with self._lock:
+            self._help[name] = (kind, help_text)
+            if buckets is not None:
+                self._buckets[name] = tuple(buckets)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._counters.setdefault(name, {})
+            family[key] = family.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._histograms.setdefault(name, {})
+            hist = family.get(key)
+            if hist is None:
+                hist = family[key] = Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+            hist.observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _labels(key: Tuple, extra: Optional[Tuple] = None) -> str:
+        items = list(key) + ([extra] if extra else [])
+        if not items:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + '}'
+
+    def _header(self, lines: List[str], name: str, default_kind: str):
+        kind, help_text = self._help.get(name, (default_kind, ''))
+        if help_text:
+            lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                self._header(lines, name, 'counter')
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f'{name}{self._labels(key)} {value:g}')
+            for name in sorted(self._gauges):
+                self._header(lines, name, 'gauge')
+                for key, value in sorted(self._gauges[name].items()):
+                    lines.append(f'{name}{self._labels(key)} {value:g}')
+            for name in sorted(self._histograms):
+                self._header(lines, name, 'histogram')
+                for key, hist in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets + (float('inf'),), hist.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                        lines.append(f'{name}_bucket{self._labels(key, ("le", le))} {cumulative}')
+                    lines.append(f'{name}_sum{self._labels(key)} {hist.sum:.6f}')
+                    lines.append(f'{name}_count{self._labels(key)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+metrics.describe('analysis_stage_seconds', 'histogram', 'Time spent per analysis stage.')
+metrics.describe('analysis_request_seconds', 'histogram', 'Request latency per endpoint.')
+metrics.describe('analysis_requests_total', 'counter', 'Requests per endpoint and status code.')
+metrics.describe('analysis_sentiment_batch_size', 'histogram', 'Texts per sentiment forward pass.',
+                 buckets=SIZE_BUCKETS)
+metrics.describe('analysis_remote_batch_size', 'histogram', 'Texts per inference server request.',
+                 buckets=SIZE_BUCKETS)
+metrics.describe('analysis_sentiment_fallback_total', 'counter',
+                 'Sentiment analyzers that could not load the requested backend.')
+metrics.describe('analysis_sentiment_routed_total', 'counter',
+                 'Texts scored per backend under a latency budget.')
+metrics.describe('analysis_microbatch_queue_depth', 'gauge', 'Texts waiting for a shared sentiment batch.')
+metrics.describe('analysis_microbatch_fill_ratio', 'histogram', 'Shared batch size relative to its maximum.',
+                 buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0))
+metrics.describe('analysis_microbatch_requests', 'histogram', 'Requests merged into one shared batch.',
+                 buckets=SIZE_BUCKETS)
+metrics.describe('analysis_microbatch_wait_seconds', 'histogram', 'Time a request waited for its shared batch.')
+
+
+class Timings:
+    """Per-request stage durations, counters and events (thread-safe).
+    Repeated stages accumulate, e.g. one 'forward' entry for all mini-batches.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.events: List[str] = []
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def event(self, message: str):
+        with self._lock:
+            if message not in self.events:
+                self.events.append(message)
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()},
+                "counts": dict(self.counts),
+                "events": list(self.events),
+            }
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Server-Timing header value (durations in ms)."""
+        with self._lock:
+            parts = [f'{name.replace(" ", "_")};dur={seconds * 1000:.1f}' for name, seconds in self.stages.items()]
+        if total is not None:
+            parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar('analysis_timings', default=None)
+
+
+def current_timings() -> Optional[Timings]:
+    return _current.get()
+
+
+@contextmanager
+def request_timings():
+    """Collect stage timings for the code run inside the block (and threads started with its context)."""
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(stage: str):
+    """Time a hot-path stage: global histogram plus the current request's Timings, if any."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe('analysis_stage_seconds', elapsed, stage=stage)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(stage, elapsed)
+
+
+def record_batch(name: str, size: int):
+    """Count a batch and its size (e.g. texts per forward pass)."""
+    metrics.observe(f'analysis_{name}_batch_size', size)
+    timings = _current.get()
+    if timings is not None:
+        timings.count(f'{name}_batches')
+        timings.count(f'{name}_texts', size)
+
+
+def record_event(message: str, counter: Optional[str] = None, **labels):
+    """Note a notable event (e.g. a backend fallback) on the request and in a counter."""
+    if counter:
+        metrics.inc(counter, **labels)
+    timings = _current.get()
+    if timings is not None:
+        timings.event(message)
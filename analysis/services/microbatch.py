@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from .metrics import current_timings, metrics
+
+
+class _Pending:
+    __slots__ = ('texts', 'enqueued', 'started', 'results', 'error', 'done')
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.enqueued = time.perf_counter()
+        self.started = None
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Coalesces small concurrent `batch_predict` calls into shared batches for one analyzer.
+    - Callers queue their texts and block; one worker thread takes queued requests
+      whole, up to `max_batch` texts, once the batch is full or the oldest request has
+      waited `max_wait_ms`, scores them in one call and hands each caller its slice.
+    - Calls of `max_batch` texts or more, and calls with a latency budget, go straight
+      to the analyzer: they fill their own batches or plan their own work.
+    - Queue depth, batch fill ratio and wait time go to the metrics registry, each
+      caller's wait to its request timings ('batch_wait').
+    Other attributes (backend, fallback, ...) are the wrapped analyzer's.
+    """
+    def __init__(self, analyzer, max_batch: int = 32, max_wait_ms: float = 5.0):
+        self.analyzer = analyzer
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._queued_texts = 0
+        self._worker = None
+        self._closed = False
+        self._batches = 0
+        self._filled = 0
+        self._waited = 0.0
+        self._requests = 0
+
+    def __getattr__(self, name):
+        return getattr(self.analyzer, name)
+
+    def batch_predict(self, texts: List[str], budget: Optional[float] = None) -> List[Dict]:
+        if not texts:
+            return []
+        if budget is not None or len(texts) >= self.max_batch:
+            return self.analyzer.batch_predict(texts, budget=budget)
+
+        pending = _Pending(list(texts))
+        with self._cond:
+            queued = not self._closed
+            if queued:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='sentiment-microbatch', daemon=True)
+                    self._worker.start()
+                self._queue.append(pending)
+                self._queued_texts += len(pending.texts)
+                metrics.set('analysis_microbatch_queue_depth', self._queued_texts)
+                self._cond.notify()
+        if not queued:
+            return self.analyzer.batch_predict(texts)
+        pending.done.wait()
+
+        wait = pending.started - pending.enqueued
+        metrics.observe('analysis_microbatch_wait_seconds', wait)
+        timings = current_timings()
+        if timings is not None:
+            timings.add('batch_wait', wait)
+        if pending.error is not None:
+            raise pending.error
+        return pending.results
+
+    def _take(self) -> List[_Pending]:
+        """Block until a batch is due; whole requests in arrival order, up to max_batch texts."""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return []
+            deadline = self._queue[0].enqueued + self.max_wait
+            while self._queued_texts < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, size = [], 0
+            while self._queue and size + len(self._queue[0].texts) <= self.max_batch:
+                pending = self._queue.popleft()
+                batch.append(pending)
+                size += len(pending.texts)
+            self._queued_texts -= size
+            metrics.set('analysis_microbatch_queue_depth', self._queued_texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            started = time.perf_counter()
+            texts = [t for pending in batch for t in pending.texts]
+            fill = len(texts) / self.max_batch
+            metrics.observe('analysis_microbatch_fill_ratio', fill)
+            metrics.observe('analysis_microbatch_requests', len(batch))
+            with self._cond:
+                self._batches += 1
+                self._filled += len(texts)
+                self._requests += len(batch)
+                self._waited += sum(started - p.enqueued for p in batch)
+            try:
+                results = self.analyzer.batch_predict(texts)
+            except Exception as exc:
+                for pending in batch:
+                    pending.error = exc
+            else:
+                offset = 0
+                for pending in batch:
+                    pending.results = results[offset:offset + len(pending.texts)]
+                    offset += len(pending.texts)
+            for pending in batch:
+                pending.started = started
+                pending.done.set()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self._queued_texts,
+                "batches": self._batches,
+                "mean_fill_ratio": round(self._filled / (self._batches * self.max_batch), 4) if self._batches else None,
+                "mean_wait_ms": round(self._waited / self._requests * 1000, 3) if self._requests else None,
+            }
+
+    def close(self):
+        """Score what is queued, then stop the worker; later calls go straight to the analyzer."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join()
@@ -0,0 +1,133 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+def _mix64(h: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spreads polynomial k-gram hashes over all 64 bits."""
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def shingle_hashes(texts: Sequence[str], k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """64-bit hashes of the character k-grams of every text, computed over one array.
+    Texts shorter than k are padded, so each has at least one shingle.
+    Returns (hashes, offsets): text i owns hashes[offsets[i]:offsets[i + 1]].
+    """
+    k = max(1, int(k))
+    padded = [t if len(t) >= k else t + '\0' * (k - len(t)) for t in texts]
+    codes = np.frombuffer(''.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    lengths = np.fromiter((len(t) for t in padded), dtype=np.int64, count=len(padded))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    # Polynomial hash of every window of the concatenation (uint64 arithmetic wraps)
+    n_windows = len(codes) - k + 1
+    h = np.zeros(max(n_windows, 0), dtype=np.uint64)
+    for j in range(k):
+        h = h * np.uint64(1000003) + codes[j:j + n_windows]
+
+    # Keep the windows that lie inside one text
+    n_shingles = lengths - k + 1
+    offsets = np.concatenate(([0], np.cumsum(n_shingles)))
+    within = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, n_shingles)
+    return _mix64(h[within]), offsets
+
+
+def minhash_signatures(texts: Sequence[str], num_perm: int = 64, k: int = 5) -> np.ndarray:
+    """MinHash signatures, shape (n_texts, num_perm), uint32, by one-permutation hashing:
+    each shingle hash picks one of `num_perm` bins (high bits) and every bin keeps its
+    minimum (low bits), so all shingles are hashed once and minimized in one sort instead
+    of once per permutation. Empty bins borrow the next non-empty bin to the right,
+    salted by the distance (rotation densification); estimates match classic MinHash.
+    """
+    hashes, offsets = shingle_hashes(texts, k)
+    n, size = len(texts), np.uint64(num_perm)
+    text_ids = np.repeat(np.arange(n, dtype=np.uint64), np.diff(offsets))
+    slots = text_ids * size + (hashes >> np.uint64(32)) % size
+    keys = np.sort((slots << np.uint64(32)) | (hashes & _MASK32))
+    slots = keys >> np.uint64(32)
+    first = np.concatenate(([True], slots[1:] != slots[:-1]))
+
+    empty_value = np.uint64(1 << 32)
+    signatures = np.full(n * num_perm, empty_value, dtype=np.uint64)
+    signatures[slots[first]] = keys[first] & _MASK32
+    signatures = signatures.reshape(n, num_perm)
+    empty = signatures == empty_value
+    if empty.any():
+        # Index of the next non-empty bin, wrapping around (every text has one)
+        cols = np.arange(2 * num_perm)
+        nearest = np.where(np.tile(~empty, 2), cols, 2 * num_perm)
+        nearest = np.minimum.accumulate(nearest[:, ::-1], axis=1)[:, ::-1][:, :num_perm]
+        distance = (nearest - cols[:num_perm]).astype(np.uint64)
+        borrowed = np.take_along_axis(signatures, nearest % num_perm, axis=1) ^ (distance * np.uint64(0x9E3779B9))
+        signatures = np.where(empty, borrowed & _MASK32, signatures)
+    return signatures.astype(np.uint32)
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) with bands * rows <= num_perm that minimize the false positive plus
+    false negative probability mass around `threshold` (the datasketch criterion)."""
+    s = np.linspace(0.0, 1.0, 201)
+    best, best_error = (1, num_perm), np.inf
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        candidate = 1.0 - (1.0 - s ** rows) ** bands
+        error = (candidate[s < threshold].sum() + (1.0 - candidate[s >= threshold]).sum()) / len(s)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def near_duplicate_groups(texts: Sequence[str], threshold: float = 0.8, weights=None,
+                          num_perm: int = 64, k: int = 5) -> np.ndarray:
+    """Representative index for every text: texts whose estimated Jaccard similarity of
+    character k-gram sets reaches `threshold` end up in one group.
+    - LSH bands of the MinHash signatures propose candidates; each candidate is kept only
+      if its signature agrees with its bucket head's on at least `threshold` of the values
+    - groups are connected components of kept pairs
+    - the representative is the member with the largest weight (e.g. exact-duplicate
+      count), the first one on ties
+    """
+    n = len(texts)
+    if n < 2:
+        return np.arange(n)
+    signatures = minhash_signatures(texts, num_perm, k)
+    bands, rows = lsh_params(threshold, num_perm)
+
+    parent = list(range(n))
+    # Band rows are folded into one key; a rare key collision is caught by the agreement check
+    multipliers = np.random.default_rng(42).integers(1, 2 ** 63, size=rows, dtype=np.uint64) | np.uint64(1)
+    for band in range(bands):
+        keys = (signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) * multipliers).sum(axis=1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        new_bucket = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        heads = order[np.flatnonzero(new_bucket)[np.cumsum(new_bucket) - 1]]
+        members = order[~new_bucket]
+        if not len(members):
+            continue
+        heads = heads[~new_bucket]
+        agreement = (signatures[members] == signatures[heads]).mean(axis=1)
+        for i, j in zip(members[agreement >= threshold].tolist(), heads[agreement >= threshold].tolist()):
+            ri, rj = _find(parent, i), _find(parent, j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+    roots = np.fromiter((_find(parent, i) for i in range(n)), dtype=np.int64, count=n)
+    weights = np.ones(n) if weights is None else np.asarray(weights)
+    # Per root: heaviest member first, then lowest index
+    order = np.lexsort((np.arange(n), -weights, roots))
+    first = np.concatenate(([True], roots[order][1:] != roots[order][:-1]))
+    representative = np.empty(n, dtype=np.int64)
+    representative[roots[order][first]] = order[first]
+    return representative[roots]
@@ -0,0 +1,120 @@
+import os
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .lazy import LazyModule, available
+
+# Optional: ONNX Runtime inference, loaded with the first session
+_HAS_ONNX = available('onnxruntime')
+ort = LazyModule('onnxruntime')
+
+FP32_FILE = 'model.onnx'
+INT8_FILE = 'model.int8.onnx'
+
+
+def onnx_model_dir(base_dir: str, model_name: str) -> str:
+    """Export directory for a model: <base_dir>/<org>__<name>/"""
+    return os.path.join(str(base_dir), model_name.replace('/', '__'))
+
+
+def onnx_model_path(base_dir: str, model_name: str, quantized: bool = True) -> str:
+    return os.path.join(onnx_model_dir(base_dir, model_name), INT8_FILE if quantized else FP32_FILE)
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = False, opset: int = 17) -> Dict[str, str]:
+    """Export a sequence-classification model (and its tokenizer) to ONNX.
+    Batch and sequence axes are dynamic. With `quantize`, an int8 copy with
+    dynamically quantized weights is written next to the fp32 graph.
+    Returns {"fp32": path, "int8": path?}.
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.config.return_dict = False  # plain tuple outputs for tracing
+    model.eval()
+
+    sample = tokenizer(["export sample", "a second, longer export sample"], padding=True, return_tensors='pt')
+    fp32_path = os.path.join(output_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample['input_ids'], sample['attention_mask']),
+            fp32_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'},
+            },
+            opset_version=opset,
+        )
+    tokenizer.save_pretrained(output_dir)
+
+    paths = {"fp32": fp32_path}
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_path = os.path.join(output_dir, INT8_FILE)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        paths["int8"] = int8_path
+    return paths
+
+
+class OnnxSentimentModel:
+    """ONNX Runtime session for an exported sentiment classifier (CPU)."""
+    def __init__(self, path: str, num_threads: int = None):
+        if not _HAS_ONNX:
+            raise RuntimeError("onnxruntime is not installed")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"ONNX model not found: {path} (run `manage.py export_sentiment_onnx`)")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+        self.path = path
+        self.session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def predict(self, features: Dict) -> Tuple[List[int], List[float]]:
+        """Arg-max label index and its softmax probability for each row of a padded batch."""
+        feeds = {k: np.asarray(v, dtype=np.int64) for k, v in features.items() if k in self.input_names}
+        logits = self.session.run(None, feeds)[0].astype(np.float32)
+        logits -= logits.max(axis=-1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=-1, keepdims=True)
+        idx = probs.argmax(axis=-1)
+        return idx.tolist(), probs[np.arange(len(idx)), idx].tolist()
+
+
+def compare_backends(reference, candidate, texts: List[str]) -> Dict:
+    """Parity and throughput of two SentimentAnalyzers over the same texts.
+    Bypasses dedup and caching so both backends score every text.
+    """
+    def timed(analyzer):
+        started = time.perf_counter()
+        results = analyzer._score(texts)
+        elapsed = time.perf_counter() - started
+        return results, {
+            "backend": analyzer.backend,
+            "seconds": round(elapsed, 4),
+            "comments_per_second": round(len(texts) / elapsed, 1) if elapsed else None,
+        }
+
+    ref_results, ref_stats = timed(reference)
+    cand_results, cand_stats = timed(candidate)
+    agree = [a['label'] == b['label'] for a, b in zip(ref_results, cand_results)]
+    deltas = np.abs(np.array([a['score'] for a in ref_results]) - np.array([b['score'] for b in cand_results]))
+    return {
+        "n_comments": len(texts),
+        "label_agreement": float(np.mean(agree)) if agree else None,
+        "mean_score_delta": float(deltas.mean()) if len(deltas) else None,
+        "max_score_delta": float(deltas.max()) if len(deltas) else None,
+        "reference": ref_stats,
+        "candidate": cand_stats,
+        "speedup": round(ref_stats['seconds'] / cand_stats['seconds'], 2) if cand_stats['seconds'] else None,
+    }
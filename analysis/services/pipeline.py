@@ -0,0 +1,321 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .text_preprocess import PreprocessedBatch
+from .registry import get_analyzer
+from .aspects import AspectClusterer
+from .aspect_models import AspectModelNotFound, get_aspect_model_store
+from .cache import get_cluster_cache
+from .cluster_summary import label_counts
+from .metrics import timed
+from .near_duplicates import near_duplicate_groups
+from .results import get_result_store
+
+SENTIMENT_LABELS = ['negative', 'neutral', 'positive']
+_SENTIMENT_INDEX = {label: i for i, label in enumerate(SENTIMENT_LABELS)}
+
+
+def limit_comments(comments: List[str], max_comments: int,
+                   limit_name: str = 'MAX_COMMENTS') -> Tuple[List[str], List[str]]:
+    """Apply the comment-count and per-comment length limits.
+    Returns (limited_comments, warnings); overlong input is truncated, never rejected.
+    """
+    warnings = []
+
+    # Validate number of comments
+    if len(comments) > max_comments:
+        comments = comments[:max_comments]
+        warnings.append(f"Too many comments provided; truncated to {limit_name}.")
+
+    # Validate per-comment length (truncate, do not reject)
+    limited_comments = []
+    truncated_count = 0
+    for c in comments:
+        if len(c) > settings.MAX_COMMENT_LENGTH:
+            limited_comments.append(c[:settings.MAX_COMMENT_LENGTH])
+            truncated_count += 1
+        else:
+            limited_comments.append(c)
+    if truncated_count:
+        warnings.append(f"{truncated_count} comments were truncated due to MAX_COMMENT_LENGTH.")
+
+    return limited_comments, warnings
+
+
+def sentiment_indices(sentiments: Sequence[Dict]) -> np.ndarray:
+    """Index into SENTIMENT_LABELS of every sentiment result."""
+    return np.fromiter((_SENTIMENT_INDEX[s['label']] for s in sentiments), dtype=np.int64, count=len(sentiments))
+
+
+def near_duplicate_threshold(options: Dict) -> float:
+    return options.get('near_duplicate_threshold', settings.NEAR_DUPLICATE_THRESHOLD) or 0.0
+
+
+def preprocess(comments: List[str], options: Dict) -> PreprocessedBatch:
+    """Clean and deduplicate comments. With a near-duplicate threshold, distinct texts whose
+    similarity reaches it are folded into one representative: only it is scored and clustered,
+    weighted by its group size, and its results are mapped back to every member."""
+    batch = PreprocessedBatch.from_texts(comments)
+    threshold = near_duplicate_threshold(options)
+    if threshold and len(batch.unique) > 1:
+        with timed('near_duplicates'):
+            batch = batch.merge(near_duplicate_groups(
+                batch.unique, threshold, weights=batch.counts,
+                num_perm=settings.NEAR_DUPLICATE_NUM_PERM, k=settings.NEAR_DUPLICATE_SHINGLE
+            ))
+    return batch
+
+
+def sentiment_budget(options: Dict) -> Optional[float]:
+    """Seconds allowed for sentiment scoring (options.latency_budget_ms), or None."""
+    ms = options.get('latency_budget_ms')
+    return ms / 1000 if ms else None
+
+
+def build_summary(n_comments: int, clusters: Dict, aspect_model: Optional[Dict] = None,
+                  sentiment_idx: Optional[np.ndarray] = None) -> Dict:
+    """Response summary. With `sentiment_idx` (one SENTIMENT_LABELS index per comment, aligned
+    with clusters['labels']) it adds sentiment counts overall and per aspect."""
+    summary = {
+        "n_comments": n_comments,
+        "n_clusters": clusters.get('n_clusters', 0),
+        "aspects": [
+            {
+                "cluster_id": int(cid),
+                "keywords": kw,
+                "size": int(sz),
+                "representatives": reps
+            }
+            for cid, kw, sz, reps in zip(clusters.get('cluster_ids', []),
+                                         clusters.get('keywords', []),
+                                         clusters.get('sizes', []),
+                                         clusters.get('representatives', []))
+        ]
+    }
+    if sentiment_idx is not None:
+        k = len(summary["aspects"])
+        overall, per_aspect = label_counts(clusters['labels'], sentiment_idx, k, len(SENTIMENT_LABELS))
+        summary["sentiment"] = dict(zip(SENTIMENT_LABELS, overall.tolist()))
+        for aspect, counts in zip(summary["aspects"], per_aspect.tolist()):
+            aspect["sentiment"] = dict(zip(SENTIMENT_LABELS, counts))
+    if aspect_model is not None:
+        summary["aspect_model"] = aspect_model
+    if clusters.get('cache'):
+        summary["cluster_cache"] = clusters['cache']
+    return summary
+
+
+def build_items(comments: List[str], sentiments: List[Dict], labels: List) -> List[Dict]:
+    items = []
+    for i, original_text in enumerate(comments):
+        label = labels[i]
+        items.append({
+            "text": original_text,
+            "sentiment": sentiments[i],
+            "cluster_id": int(label) if label is not None else None
+        })
+    return items
+
+
+def build_response(comments: List[str], batch: PreprocessedBatch, unique_sentiments: List[Dict],
+                   clusters: Dict, aspect_model: Optional[Dict], options: Dict, warnings: List[str]) -> Dict:
+    """Response body of one analysis.
+    - options.response == 'summary': summary plus a `result_id` whose items are read
+      page by page from the result store (nothing per item is built here)
+    - otherwise summary, items and warnings
+    Under a latency budget the summary counts comments per sentiment backend; with
+    near-duplicate collapsing it reports how many texts were analyzed and merged.
+    """
+    with timed('summary'):
+        sentiment_idx = sentiment_indices(unique_sentiments)[batch.inverse]
+        summary = build_summary(len(comments), clusters, aspect_model, sentiment_idx)
+        if near_duplicate_threshold(options):
+            summary["near_duplicates"] = {"threshold": near_duplicate_threshold(options),
+                                          "n_analyzed": len(batch.unique), "n_merged": batch.n_merged}
+        if sentiment_budget(options) is not None:
+            backends = {}
+            for s, count in zip(unique_sentiments, batch.counts):
+                backends[s['backend']] = backends.get(s['backend'], 0) + int(count)
+            summary["sentiment_backends"] = backends
+    if options.get('response') == 'summary':
+        result_id = get_result_store().put(comments, unique_sentiments, batch.inverse, clusters['labels'])
+        return {"summary": summary, "result_id": result_id, "warnings": warnings}
+    with timed('items'):
+        sentiments = [dict(s) for s in batch.expand(unique_sentiments)]
+        items = build_items(comments, sentiments, clusters['labels'])
+    return {"summary": summary, "items": items, "warnings": warnings}
+
+
+def cluster_cache_params(algorithm: str) -> Tuple:
+    """Settings a clustering result depends on besides the request options; part of the
+    cluster cache key so changing them never serves stale clusters."""
+    params = (settings.CLUSTER_LARGE_MIN_TEXTS, settings.CLUSTER_LARGE_SAMPLE,
+              settings.CLUSTER_LARGE_MAX_FEATURES, settings.CLUSTER_LARGE_DIM, settings.CLUSTER_LARGE_CHUNK)
+    if algorithm == 'fcm':
+        params += (settings.FCM_ERROR, settings.FCM_MAX_ITER)
+    elif algorithm == 'bertopic':
+        params += (settings.EMBEDDING_MODEL,)
+    return params
+
+
+def run_clustering(batch: PreprocessedBatch, options: Dict, warnings: List[str]) -> Tuple[Dict, Optional[Dict]]:
+    """Cluster a preprocessed batch, reusing or saving a named fitted aspect model.
+    Only the distinct texts are clustered (duplicates weigh the fit through their counts);
+    labels are mapped back to every input.
+    - options['aspect_model'] (+ 'aspect_model_version'): transform/predict only with a saved model.
+    - options['save_aspect_model']: save the freshly fitted model under that name (new version).
+    - otherwise results are reused from the cluster cache for identical texts, weights and
+      options (unless options['cluster_cache'] is false); clusters['cache'] is 'hit' or 'miss'.
+    Returns (clusters, aspect_model info for the summary or None).
+    """
+    store = get_aspect_model_store()
+    model, info = None, None
+    name = options.get('aspect_model')
+    save_name = options.get('save_aspect_model')
+    weights = batch.counts if batch.has_duplicates else None
+    algorithm = options.get('clustering_algorithm', 'kmeans')
+    mode = options.get('clustering_mode', 'auto')
+    n_clusters = options.get('num_aspect_clusters', 3)
+
+    cache = get_cluster_cache() if options.get('cluster_cache', True) and not name and not save_name else None
+    if cache is not None:
+        with timed('cluster_cache'):
+            key = cache.key(cache.fingerprint(batch.unique, weights), algorithm, mode, n_clusters,
+                            settings.CLUSTER_REPRESENTATIVES, cluster_cache_params(algorithm))
+            cached = cache.get_many([key]).get(key)
+        if cached is not None:
+            clusters = dict(cached, cache='hit')
+            clusters['labels'] = batch.expand(clusters['labels'])
+            return clusters, None
+
+    if name:
+        try:
+            model, version = store.load(name, options.get('aspect_model_version'))
+            info = {"name": name, "version": version, "mode": "predict"}
+        except (AspectModelNotFound, ValueError) as exc:
+            warnings.append(f"{exc} Clustering was fitted from scratch.")
+
+    clusterer = AspectClusterer(algorithm=algorithm, model=model, mode=mode)
+    clusters = clusterer.cluster(batch.unique, n_clusters=n_clusters, tokens=batch.tokens, weights=weights)
+    if cache is not None:
+        # Failed or trivial runs are not worth keeping
+        if clusterer.fitted:
+            cache.set_many({key: clusters})
+        clusters = dict(clusters, cache='miss')
+    clusters['labels'] = batch.expand(clusters['labels'])
+
+    if save_name:
+        if clusterer.fitted and clusterer.model is not None:
+            version = store.save(save_name, clusterer.model, metadata={"n_texts": len(batch)})
+            info = {"name": save_name, "version": version, "mode": "fit"}
+        else:
+            warnings.append("Aspect model was not saved (nothing was fitted for this input).")
+    return clusters, info
+
+
+def analyze_comments(comments: List[str], options: Dict, warnings: Optional[List[str]] = None,
+                     progress: Optional[Callable[[str, float], None]] = None,
+                     progress_chunk: int = 1000) -> Dict:
+    """Run preprocess -> sentiment -> aspects over already-limited comments.
+    `progress(stage, fraction)` is called as stages advance; when it is given,
+    sentiment is scored in chunks of `progress_chunk` so progress moves smoothly.
+    Returns the response body (see build_response).
+    """
+    report = progress or (lambda stage, fraction: None)
+    warnings = list(warnings or [])
+
+    # 1) Preprocess
+    report('preprocess', 0.0)
+    with timed('preprocess'):
+        batch = preprocess(comments, options)
+
+    # 2) Sentiment (default try Transformers)
+    sentiment_analyzer = get_analyzer(
+        use_transformers=options.get('use_transformers', True),
+        model_name=settings.SENTIMENT_MODEL,
+        runtime=options.get('sentiment_runtime')
+    )
+    unique = batch.unique
+    with timed('sentiment'):
+        if progress is None:
+            unique_sentiments = sentiment_analyzer.batch_predict(unique, budget=sentiment_budget(options))
+        else:
+            # The budget is shared out over chunks by their size
+            budget = sentiment_budget(options)
+            unique_sentiments = []
+            for start in range(0, len(unique), progress_chunk):
+                chunk_budget = budget * min(progress_chunk, len(unique) - start) / len(unique) if budget else None
+                report('sentiment', 0.05 + 0.65 * start / len(unique))
+                unique_sentiments.extend(sentiment_analyzer.batch_predict(unique[start:start + progress_chunk],
+                                                                          budget=chunk_budget))
+
+    # 3) Aspects (algorithm param)
+    report('clustering', 0.7)
+    with timed('clustering'):
+        clusters, aspect_model = run_clustering(batch, options, warnings)
+
+    report('done', 1.0)
+    return build_response(comments, batch, unique_sentiments, clusters, aspect_model, options, warnings)
+
+
+_stage_executor = None
+_stage_executor_lock = threading.Lock()
+
+
+def get_stage_executor() -> ThreadPoolExecutor:
+    """Process-wide thread pool for the CPU-bound stages of async requests (ANALYSIS_STAGE_WORKERS)."""
+    global _stage_executor
+    with _stage_executor_lock:
+        if _stage_executor is None:
+            _stage_executor = ThreadPoolExecutor(max_workers=settings.ANALYSIS_STAGE_WORKERS,
+                                                 thread_name_prefix='analysis-stage')
+        return _stage_executor
+
+
+def _stage(stage: Optional[str], fn, *args, **kwargs):
+    """Callable for run_in_executor that keeps the caller's context (request timings)
+    and times `stage`. Each call gets its own context copy so stages can overlap."""
+    context = contextvars.copy_context()
+
+    def run():
+        if stage is None:
+            return fn(*args, **kwargs)
+        with timed(stage):
+            return fn(*args, **kwargs)
+    return functools.partial(context.run, run)
+
+
+async def analyze_comments_async(comments: List[str], options: Dict,
+                                 warnings: Optional[List[str]] = None) -> Dict:
+    """Async counterpart of analyze_comments for ASGI views.
+    Sentiment and clustering only depend on the cleaned texts, so both run at the
+    same time on the stage executor while the event loop keeps serving other requests;
+    latency approaches the slower stage instead of the sum of both.
+    (torch, ONNX Runtime, NumPy and scikit-learn release the GIL for their heavy work.)
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_stage_executor()
+    warnings = list(warnings or [])
+
+    batch = await loop.run_in_executor(executor, _stage('preprocess', preprocess, comments, options))
+    # The first call may load the model, so it is kept off the event loop too
+    sentiment_analyzer = await loop.run_in_executor(executor, _stage(
+        None,
+        get_analyzer,
+        use_transformers=options.get('use_transformers', True),
+        model_name=settings.SENTIMENT_MODEL,
+        runtime=options.get('sentiment_runtime')
+    ))
+    unique_sentiments, (clusters, aspect_model) = await asyncio.gather(
+        loop.run_in_executor(executor, _stage('sentiment', sentiment_analyzer.batch_predict, batch.unique,
+                                              budget=sentiment_budget(options))),
+        loop.run_in_executor(executor, _stage('clustering', run_clustering, batch, options, warnings)),
+    )
+    return build_response(comments, batch, unique_sentiments, clusters, aspect_model, options, warnings)
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .cache import get_sentiment_cache
+from .metrics import record_event, timed
+from .microbatch import MicroBatcher
+from .sentiment import RemoteSentimentAnalyzer, SentimentAnalyzer
+
+
+def _analyzer_options(model_name: str, runtime: str) -> Dict:
+    """Inference tuning knobs and shared cache from settings."""
+    from django.conf import settings
+    if not settings.configured:
+        return {"runtime": runtime}
+    options = {
+        "batch_size": getattr(settings, 'SENTIMENT_BATCH_SIZE', 32),
+        "max_length": getattr(settings, 'SENTIMENT_MAX_LENGTH', None),
+        "num_threads": getattr(settings, 'SENTIMENT_NUM_THREADS', None),
+        "cache": get_sentiment_cache(),
+        "vader_workers": getattr(settings, 'VADER_WORKERS', 0),
+        "vader_min_batch": getattr(settings, 'VADER_PARALLEL_MIN_BATCH', 1000),
+        "tokens_per_second": getattr(settings, 'SENTIMENT_TOKENS_PER_SECOND', 4000),
+        "budget_truncate": getattr(settings, 'SENTIMENT_BUDGET_TRUNCATE', 64),
+        "runtime": runtime,
+    }
+    if runtime == 'onnx':
+        from .onnx_backend import onnx_model_path
+        quantized = settings.SENTIMENT_ONNX_QUANTIZED
+        path = onnx_model_path(settings.SENTIMENT_ONNX_DIR, model_name, quantized=quantized)
+        other = onnx_model_path(settings.SENTIMENT_ONNX_DIR, model_name, quantized=not quantized)
+        if not os.path.exists(path) and os.path.exists(other):
+            # e.g. exported without --quantize: serve the graph that exists rather than PyTorch
+            record_event(f"ONNX graph {os.path.basename(path)} not found; using {os.path.basename(other)}")
+            path = other
+        options["onnx_path"] = path
+    return options
+
+
+def _remote_options() -> Optional[Dict]:
+    """Client settings when transformer inference is delegated to an inference server."""
+    from django.conf import settings
+    if not settings.configured or not getattr(settings, 'SENTIMENT_SERVER_SOCKET', ''):
+        return None
+    return {
+        "socket_path": settings.SENTIMENT_SERVER_SOCKET,
+        "timeout": settings.SENTIMENT_SERVER_TIMEOUT,
+        "chunk_size": settings.SENTIMENT_SERVER_CHUNK,
+        "retry_after": settings.SENTIMENT_SERVER_RETRY,
+    }
+
+
+def _microbatch_options() -> Optional[Dict]:
+    """Micro-batching settings, or None when SENTIMENT_MICROBATCH is off."""
+    from django.conf import settings
+    if not settings.configured or not getattr(settings, 'SENTIMENT_MICROBATCH', False):
+        return None
+    return {
+        "max_batch": settings.SENTIMENT_MICROBATCH_MAX_SIZE or settings.SENTIMENT_BATCH_SIZE,
+        "max_wait_ms": settings.SENTIMENT_MICROBATCH_MAX_WAIT_MS,
+    }
+
+
+class _Entry:
+    """One registry slot: the analyzer plus its load bookkeeping."""
+    def __init__(self, backend: str, model_name: str):
+        self.backend = backend
+        self.model_name = model_name
+        self.lock = threading.Lock()
+        self.analyzer: Optional[SentimentAnalyzer] = None
+        self.state = 'unloaded'      # unloaded -> loading -> ready | failed
+        self.load_time = None        # seconds spent building the analyzer
+        self.loaded_at = None        # epoch seconds
+        self.error = None
+
+
+class ModelRegistry:
+    """Process-wide cache of SentimentAnalyzer instances.
+    - Keyed by (backend, model_name); each key is loaded at most once.
+    - Loading is serialized per key, so concurrent first requests share one load.
+    - Analyzers are read-only after load and safe to share between threads.
+    - With SENTIMENT_SERVER_SOCKET set, transformer keys get a RemoteSentimentAnalyzer
+      client instead of a model copy; `remote=False` (the inference server's own
+      registry) always loads models in-process.
+    - With SENTIMENT_MICROBATCH on, transformer analyzers (local or remote) are wrapped
+      in a MicroBatcher that merges small concurrent requests into shared batches.
+    """
+    def __init__(self, remote: bool = True):
+        self.remote = remote
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+
+    @staticmethod
+    def backend_for(use_transformers: bool, runtime: str = 'torch') -> str:
+        if not use_transformers:
+            return 'vader'
+        return 'onnx' if runtime == 'onnx' else 'transformers'
+
+    def _entry(self, backend: str, model_name: str) -> _Entry:
+        key = (backend, model_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(backend, model_name)
+                self._entries[key] = entry
+            return entry
+
+    def get(self, model_name: str, use_transformers: bool = True, runtime: str = 'torch') -> SentimentAnalyzer:
+        """Return the shared analyzer for this key, loading it on first use."""
+        entry = self._entry(self.backend_for(use_transformers, runtime), model_name)
+        if entry.analyzer is not None:
+            return entry.analyzer
+        with entry.lock:
+            if entry.analyzer is None:
+                entry.state = 'loading'
+                started = time.perf_counter()
+                remote = _remote_options() if self.remote and use_transformers else None
+                try:
+                    if remote is not None:
+                        analyzer = RemoteSentimentAnalyzer(model_name=model_name, runtime=runtime, **remote)
+                    else:
+                        with timed('model_load'):
+                            analyzer = SentimentAnalyzer(
+                                use_transformers=use_transformers,
+                                model_name=model_name,
+                                **_analyzer_options(model_name, runtime)
+                            )
+                except Exception as exc:
+                    entry.state = 'failed'
+                    entry.error = str(exc)
+                    raise
+                # Nothing to gain for VADER (e.g. a transformers key that fell back to it)
+                batching = _microbatch_options() if analyzer.backend not in ('vader', 'neutral') else None
+                if batching is not None:
+                    analyzer = MicroBatcher(analyzer, **batching)
+                entry.load_time = time.perf_counter() - started
+                entry.loaded_at = time.time()
+                entry.state = 'ready'
+                entry.error = None
+                entry.analyzer = analyzer
+        return entry.analyzer
+
+    def warm_up(self, model_name: str, use_transformers: bool = True, runtime: str = 'torch') -> SentimentAnalyzer:
+        """Eagerly load a model (used at startup). Failures are recorded, not raised."""
+        try:
+            return self.get(model_name, use_transformers=use_transformers, runtime=runtime)
+        except Exception:
+            return None
+
+    def status(self) -> List[Dict]:
+        """Load state of every known key."""
+        with self._lock:
+            entries = list(self._entries.values())
+        return [
+            {
+                "backend": e.backend,
+                "model_name": e.model_name,
+                "state": e.state,
+                # Actual backend in use (a transformers key may have fallen back to VADER)
+                "active_backend": e.analyzer.backend if e.analyzer is not None else None,
+                "load_time": e.load_time,
+                "loaded_at": e.loaded_at,
+                "error": e.error,
+                "microbatch": e.analyzer.stats() if isinstance(e.analyzer, MicroBatcher) else None,
+            }
+            for e in entries
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+registry = ModelRegistry()
+
+
+def get_analyzer(use_transformers: bool = True, model_name: str = None, runtime: str = None) -> SentimentAnalyzer:
+    """Borrow the process-wide analyzer for the configured model and runtime."""
+    from django.conf import settings
+    return registry.get(
+        model_name or settings.SENTIMENT_MODEL,
+        use_transformers=use_transformers,
+        runtime=runtime or settings.SENTIMENT_RUNTIME,
+    )
@@ -0,0 +1,97 @@
+import base64
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def encode_cursor(offset: int) -> str:
+    """Opaque page cursor (urlsafe base64, like DRF's CursorPagination)."""
+    return base64.urlsafe_b64encode(f"o={offset}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    """Offset of a cursor from encode_cursor; ValueError when it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    except Exception:
+        raise ValueError("Invalid cursor.")
+    if not raw.startswith('o=') or not raw[2:].isdigit():
+        raise ValueError("Invalid cursor.")
+    return int(raw[2:])
+
+
+class _StoredResult:
+    __slots__ = ('created_at', 'comments', 'sentiments', 'inverse', 'labels')
+
+    def __init__(self, comments, sentiments, inverse, labels):
+        self.created_at = time.time()
+        self.comments = comments
+        self.sentiments = sentiments
+        self.inverse = inverse
+        self.labels = labels
+
+
+class ResultStore:
+    """Items of summary-only responses, kept so they can be fetched page by page.
+    Stored columnar as the pipeline produced them (originals, per-unique sentiments,
+    inverse index, labels): nothing is copied or serialized until a page is read.
+    In-process, like JOB_BACKEND=memory: pages must be read from the same worker.
+    Entries expire after `ttl` seconds; beyond `max_results` the oldest are dropped.
+    """
+    def __init__(self, max_results: int = 100, ttl: float = 600):
+        self.max_results = max(1, int(max_results))
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._results: 'OrderedDict[str, _StoredResult]' = OrderedDict()
+
+    def _expire(self, now: float):
+        while self._results:
+            result_id, stored = next(iter(self._results.items()))
+            if now - stored.created_at < self.ttl and len(self._results) <= self.max_results:
+                break
+            del self._results[result_id]
+
+    def put(self, comments: List[str], sentiments: Sequence[Dict], inverse: np.ndarray, labels: List) -> str:
+        """Store one result: `sentiments` per unique text, `inverse` maps each comment to it."""
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._results[result_id] = _StoredResult(comments, sentiments, inverse, labels)
+            self._expire(time.time())
+        return result_id
+
+    def page(self, result_id: str, offset: int, limit: int) -> Optional[Tuple[List[Dict], int]]:
+        """(items[offset:offset + limit], total), or None when unknown or expired."""
+        with self._lock:
+            self._expire(time.time())
+            stored = self._results.get(result_id)
+        if stored is None:
+            return None
+        stop = min(offset + limit, len(stored.comments))
+        items = [
+            {"text": stored.comments[i], "sentiment": dict(stored.sentiments[j]),
+             "cluster_id": int(stored.labels[i]) if stored.labels[i] is not None else None}
+            for i, j in zip(range(offset, stop), stored.inverse[offset:stop].tolist())
+        ]
+        return items, len(stored.comments)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """Process-wide result store built from settings."""
+    global _store
+    from django.conf import settings
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore(settings.RESULT_STORE_SIZE, settings.RESULT_TTL)
+        return _store
@@ -1,5 +1,13 @@
-from typing import List, Dict
-import math
+from typing import List, Dict, Optional, Sequence, Tuple
+import atexit
+import os
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .lazy import LazyModule, available
+from .metrics import current_timings, metrics, record_batch, record_event, timed
 
 # Lightweight fallback: VADER
 try:
@@ -8,13 +16,146 @@ try:
 except Exception:
     _HAS_VADER = False
 
-# Optional: Transformers sentiment
-try:
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
-    import torch
-    _HAS_TRANSFORMERS = True
-except Exception:
-    _HAS_TRANSFORMERS = False
+# Optional: Transformers sentiment. Probed without importing; torch/transformers
+# load when the first transformer-backed analyzer is built. The ONNX runtime
+# only needs the tokenizer from transformers, not torch.
+_HAS_TRANSFORMERS = available('transformers', 'torch')
+_HAS_ONNX_RUNTIME = available('transformers', 'onnxruntime')
+transformers = LazyModule('transformers')
+torch = LazyModule('torch')
+
+# Output order of the CardiffNLP sentiment head
+_LABELS = ['negative', 'neutral', 'positive']
+
+
+def _vader_result(compound: float) -> Dict:
+    """Map a VADER compound score in [-1, 1] to label/score (±0.05 thresholds)."""
+    if compound >= 0.05:
+        return {"label": "positive", "score": float((compound+1)/2)}
+    elif compound <= -0.05:
+        return {"label": "negative", "score": float((1-compound)/2)}
+    else:
+        return {"label": "neutral", "score": float(1-abs(compound))}
+
+
+# Per-process VADER instance for pool workers (built once by the initializer)
+_worker_vader = None
+
+
+def _init_vader_worker():
+    global _worker_vader
+    _worker_vader = SentimentIntensityAnalyzer()
+
+
+def _vader_chunk(texts: List[str]) -> List[Dict]:
+    return [_vader_result(_worker_vader.polarity_scores(t)['compound']) for t in texts]
+
+
+class VaderPool:
+    """Persistent process pool that scores large VADER batches in parallel.
+    Each worker builds its own SentimentIntensityAnalyzer once; batches are
+    split into a few chunks per worker so stragglers even out.
+    """
+    def __init__(self, workers: int):
+        self.workers = max(1, int(workers))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: never fork a process that may hold torch threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_vader_worker,
+                )
+            return self._executor
+
+    def map(self, texts: List[str]) -> List[Dict]:
+        n_chunks = self.workers * 4
+        size = max(1, -(-len(texts) // n_chunks))
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        results = []
+        for part in self._get_executor().map(_vader_chunk, chunks):
+            results.extend(part)
+        return results
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_vader_pools: Dict[int, VaderPool] = {}
+_vader_pools_lock = threading.Lock()
+
+
+def get_vader_pool(workers: int) -> VaderPool:
+    """Process-wide VADER pool for the given worker count."""
+    with _vader_pools_lock:
+        pool = _vader_pools.get(workers)
+        if pool is None:
+            pool = VaderPool(workers)
+            _vader_pools[workers] = pool
+        return pool
+
+
+@atexit.register
+def _shutdown_vader_pools():
+    for pool in list(_vader_pools.values()):
+        pool.shutdown()
+
+
+class RateEstimate:
+    """Work units per second (padded tokens through the transformer, texts through VADER),
+    an exponentially weighted average of measured runs starting from a prior."""
+    def __init__(self, rate: float, alpha: float = 0.2):
+        self.rate = float(rate)
+        self.alpha = alpha
+        self.observed = 0
+
+    def observe(self, units: float, seconds: float):
+        if units > 0 and seconds > 0:
+            self.rate += self.alpha * (units / seconds - self.rate)
+            self.observed += 1
+
+    def seconds(self, units: float) -> float:
+        return units / self.rate
+
+    def units(self, seconds: float) -> float:
+        return max(0.0, seconds) * self.rate
+
+
+def _prefix_within(lengths: Sequence[int], budget: float, batch_size: int) -> Tuple[int, float]:
+    """Longest prefix of ascending `lengths` whose length-sorted, padded mini-batches
+    fit in `budget` tokens. Returns (prefix size, its cost in padded tokens)."""
+    done, n, cost = 0.0, 0, 0.0
+    for i, length in enumerate(lengths):
+        # Sorted ascending: the newest item sets the padding of its batch
+        batch_cost = done + length * (i % batch_size + 1)
+        if batch_cost > budget:
+            break
+        n, cost = i + 1, batch_cost
+        if i % batch_size == batch_size - 1:
+            done = batch_cost
+    return n, cost
+
+
+def plan_budget(lengths: Sequence[int], budget_tokens: float, batch_size: int,
+                truncate: int) -> Tuple[List[int], List[int], List[int]]:
+    """Split texts by token length into (full, truncated, rest) index lists.
+    Shortest texts are scored at full length while the padded-token cost fits the budget;
+    of the others, as many as still fit are scored truncated to `truncate` tokens."""
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    n_full, cost = _prefix_within([lengths[i] for i in order], budget_tokens, batch_size)
+    others = order[n_full:]
+    n_truncated = 0
+    if truncate > 0:
+        n_truncated, _ = _prefix_within([min(lengths[i], truncate) for i in others],
+                                        budget_tokens - cost, batch_size)
+    return order[:n_full], others[:n_truncated], others[n_truncated:]
 
 
 class SentimentAnalyzer:
@@ -22,17 +163,63 @@ class SentimentAnalyzer:
     - Tries Transformers if requested (and libs/models available).
     - Falls back to VADER (lexicon-based).
     - If neither available, returns neutral.
+    Transformer inference is batched: texts are sorted by token length and
+    scored in mini-batches of `batch_size`, each padded only to its longest item.
+    `batch_predict` scores each distinct text once and consults `cache`
+    (a SentimentCache) before running the backend.
+    VADER batches of at least `vader_min_batch` texts are spread over a
+    process pool of `vader_workers` (0 keeps VADER in-process).
+    With runtime='onnx' the exported graph at `onnx_path` is run with ONNX
+    Runtime instead of PyTorch (falls back to PyTorch if it cannot be loaded).
+    `fallback` is "<requested>-><active>" when the requested backend could not be loaded.
+    `batch_predict(texts, budget=...)` routes by a cost model (see `_score_within`):
+    `throughput` starts at `tokens_per_second` and follows measured forward passes.
     """
-    def __init__(self, use_transformers: bool = True, model_name: str = None):
-        self.use_transformers = use_transformers and _HAS_TRANSFORMERS
+    def __init__(self, use_transformers: bool = True, model_name: str = None,
+                 batch_size: int = 32, max_length: int = None, num_threads: int = None,
+                 cache=None, vader_workers: int = 0, vader_min_batch: int = 1000,
+                 runtime: str = 'torch', onnx_path: str = None,
+                 tokens_per_second: float = 4000, budget_truncate: int = 64):
+        use_onnx = runtime == 'onnx' and bool(onnx_path)
+        self.use_transformers = use_transformers and (_HAS_TRANSFORMERS or (use_onnx and _HAS_ONNX_RUNTIME))
         self._transformers_ready = False
         self.model_name = model_name or 'cardiffnlp/twitter-xlm-roberta-base-sentiment'
+        self.batch_size = max(1, int(batch_size))
+        self.max_length = max_length or None  # None -> tokenizer's model_max_length
+        self.cache = cache
+        self.vader_workers = int(vader_workers or 0)
+        self.vader_min_batch = max(1, int(vader_min_batch))
+        self.onnx_model = None
+        self.throughput = RateEstimate(tokens_per_second)
+        self.vader_rate = RateEstimate(5000)     # texts per second
+        self.budget_truncate = int(budget_truncate or 0)
+        self._router_vader = None
+        # Namespace for cached results (distinct graphs may score differently)
+        self.cache_model_key = self.model_name
 
-        if self.use_transformers:
+        self.vader = None
+        if self.use_transformers and use_onnx and _HAS_ONNX_RUNTIME:
             try:
-                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-                self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+                from .onnx_backend import OnnxSentimentModel
+                self.onnx_model = OnnxSentimentModel(onnx_path, num_threads=num_threads)
+                # The export step saves the tokenizer next to the graph
+                self.tokenizer = transformers.AutoTokenizer.from_pretrained(os.path.dirname(onnx_path))
+                self.cache_model_key = f"{self.model_name}@{os.path.basename(onnx_path)}"
+                self._transformers_ready = True
+            except Exception:
+                self.onnx_model = None
+
+        if self.use_transformers and not self._transformers_ready and not _HAS_TRANSFORMERS:
+            # ONNX graph failed to load and there is no torch to fall back on
+            self.use_transformers = False
+        if self.use_transformers and not self._transformers_ready:
+            try:
+                self.tokenizer = transformers.AutoTokenizer.from_pretrained(self.model_name)
+                self.model = transformers.AutoModelForSequenceClassification.from_pretrained(self.model_name)
                 self.model.eval()
+                if num_threads:
+                    # Intra-op parallelism is process-wide in torch
+                    torch.set_num_threads(int(num_threads))
                 self._transformers_ready = True
             except Exception:
                 self.use_transformers = False
@@ -40,39 +227,243 @@ class SentimentAnalyzer:
         if not self.use_transformers:
             if _HAS_VADER:
                 self.vader = SentimentIntensityAnalyzer()
-            else:
-                self.vader = None
 
-    def _softmax(self, x):
-        m = max(x)
-        exps = [math.exp(v - m) for v in x]
-        s = sum(exps)
-        return [v/s for v in exps]
+        if not use_transformers:
+            requested = 'vader'
+        else:
+            requested = 'onnx' if use_onnx else 'transformers'
+        self.fallback = None
+        if requested != self.backend:
+            self.fallback = f"{requested}->{self.backend}"
+            metrics.inc('analysis_sentiment_fallback_total', requested=requested, backend=self.backend)
+
+    @property
+    def backend(self) -> str:
+        """Backend actually serving predictions: 'transformers', 'onnx', 'vader' or 'neutral'."""
+        if self.use_transformers and self._transformers_ready:
+            return 'onnx' if self.onnx_model is not None else 'transformers'
+        if self.vader is not None:
+            return 'vader'
+        return 'neutral'
+
+    def _encode(self, texts: List[str], max_length: int = None):
+        with timed('tokenize'):
+            return self.tokenizer(list(texts), truncation=True, max_length=max_length or self.max_length)
+
+    def _transformers_batch(self, texts: List[str], encoded=None) -> List[Dict]:
+        """Score texts with length-sorted, dynamically padded mini-batches."""
+        if encoded is None:
+            encoded = self._encode(texts)
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        order = sorted(range(len(texts)), key=lengths.__getitem__)
+
+        results = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            chunk = order[start:start + self.batch_size]
+            features = {key: [values[i] for i in chunk] for key, values in encoded.items()}
+            record_batch('sentiment', len(chunk))
+            started = time.perf_counter()
+            with timed('forward'):
+                if self.onnx_model is not None:
+                    idx, scores = self.onnx_model.predict(self.tokenizer.pad(features, padding=True, return_tensors='np'))
+                else:
+                    idx, scores = self._torch_predict(self.tokenizer.pad(features, padding=True, return_tensors='pt'))
+            self.throughput.observe(len(chunk) * lengths[chunk[-1]], time.perf_counter() - started)
+            for i, label_idx, score in zip(chunk, idx, scores):
+                results[i] = {"label": _LABELS[label_idx], "score": float(score)}
+        return results
+
+    def _torch_predict(self, inputs):
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits  # [neg, neu, pos] (CardiffNLP)
+            scores, idx = torch.softmax(logits.float(), dim=-1).max(dim=-1)
+        return idx.tolist(), scores.tolist()
 
     def predict_one(self, text: str) -> Dict:
         # 1) Transformers (if available)
         if self.use_transformers and self._transformers_ready:
-            with torch.no_grad():
-                inputs = self.tokenizer(text, return_tensors='pt', truncation=True, padding=True)
-                logits = self.model(**inputs).logits[0].tolist()  # [neg, neu, pos] (CardiffNLP)
-                probs = self._softmax(logits)
-                labels = ['negative','neutral','positive']
-                idx = int(max(range(len(probs)), key=lambda i: probs[i]))
-                return {"label": labels[idx], "score": float(probs[idx])}
+            return self._transformers_batch([text])[0]
 
         # 2) VADER fallback
         if self.vader is not None:
             scores = self.vader.polarity_scores(text)
-            c = scores['compound']  # [-1,1]
-            if c >= 0.05:
-                return {"label": "positive", "score": float((c+1)/2)}
-            elif c <= -0.05:
-                return {"label": "negative", "score": float((1-c)/2)}
-            else:
-                return {"label": "neutral", "score": float(1-abs(c))}
+            return _vader_result(scores['compound'])
 
         # 3) Last resort
         return {"label": "neutral", "score": 0.5}
 
-    def batch_predict(self, texts: List[str]) -> List[Dict]:
-        return [self.predict_one(t) for t in texts]
+    def _score(self, texts: List[str]) -> List[Dict]:
+        """Run the active backend over texts (no dedup, no cache)."""
+        if self.use_transformers and self._transformers_ready:
+            return self._transformers_batch(texts)
+        with timed('vader'):
+            if self.vader is not None and self.vader_workers > 0 and len(texts) >= self.vader_min_batch:
+                try:
+                    return get_vader_pool(self.vader_workers).map(texts)
+                except Exception:
+                    record_event("VADER pool failed; scored in-process")
+            return [self.predict_one(t) for t in texts]
+
+    def _vader_scores(self, texts: List[str]) -> List[Dict]:
+        """VADER for texts routed away from the transformer (built on first use)."""
+        if self._router_vader is None:
+            self._router_vader = self.vader or SentimentIntensityAnalyzer()
+        started = time.perf_counter()
+        with timed('vader'):
+            results = [_vader_result(self._router_vader.polarity_scores(t)['compound']) for t in texts]
+        self.vader_rate.observe(len(texts), time.perf_counter() - started)
+        return results
+
+    def _score_within(self, texts: List[str], budget: float) -> Tuple[List[Dict], List[str]]:
+        """Transformer scoring bounded by `budget` seconds. Returns (results, backend per text).
+        Tokenizing first gives every text's cost in padded tokens; the shortest texts that fit
+        the throughput estimate are scored at full length, then as many as fit truncated to
+        `budget_truncate` tokens, and the rest with VADER (time for it is reserved up front).
+        Without VADER installed the rest is scored truncated regardless of the budget.
+        """
+        started = time.perf_counter()
+        encoded = self._encode(texts)
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        remaining = budget - (time.perf_counter() - started)
+        if _HAS_VADER:
+            remaining -= self.vader_rate.seconds(len(texts))
+        full, truncated, rest = plan_budget(lengths, self.throughput.units(remaining),
+                                            self.batch_size, self.budget_truncate)
+        if not _HAS_VADER:
+            truncated, rest = truncated + rest, []
+
+        results, backends = [None] * len(texts), [None] * len(texts)
+        parts = []
+        if full:
+            features = {key: [values[i] for i in full] for key, values in encoded.items()}
+            parts.append((full, self.backend, self._transformers_batch([texts[i] for i in full], features)))
+        if truncated:
+            subset = [texts[i] for i in truncated]
+            parts.append((truncated, f"{self.backend}_truncated",
+                          self._transformers_batch(subset, self._encode(subset, self.budget_truncate))))
+        if rest:
+            parts.append((rest, 'vader', self._vader_scores([texts[i] for i in rest])))
+        for indices, backend, scored in parts:
+            metrics.inc('analysis_sentiment_routed_total', len(indices), backend=backend)
+            for i, result in zip(indices, scored):
+                results[i], backends[i] = result, backend
+        if len(full) < len(texts):
+            record_event(f"latency budget: {len(full)}/{len(texts)} texts scored at full length")
+        return results, backends
+
+    def batch_predict(self, texts: List[str], budget: Optional[float] = None) -> List[Dict]:
+        """One result per text. With `budget` (seconds for this call) transformer work is
+        capped by the cost model and every result names its `backend`."""
+        if not texts:
+            return []
+        started = time.perf_counter()
+        # Score every distinct text once, then fan results back out to each copy
+        unique = list(dict.fromkeys(texts))
+        results = {}
+
+        backend = self.backend
+        if self.fallback:
+            record_event(f"sentiment fallback: {self.fallback}")
+        cache = self.cache if backend != 'neutral' else None
+        keys = {}
+        if cache is not None:
+            keys = {t: cache.key(backend, self.cache_model_key, t) for t in unique}
+            cached = cache.get_many(keys.values())
+            for t in unique:
+                if keys[t] in cached:
+                    results[t] = cached[keys[t]]
+
+        missing = [t for t in unique if t not in results]
+        timings = current_timings()
+        if timings is not None:
+            timings.count('sentiment_texts_unique', len(unique))
+            timings.count('sentiment_cache_hits', len(unique) - len(missing))
+        routes = {}
+        if missing:
+            if budget is not None and self.use_transformers and self._transformers_ready:
+                scored, backends = self._score_within(missing, budget - (time.perf_counter() - started))
+                routes = dict(zip(missing, backends))
+            else:
+                scored = self._score(missing)
+            results.update(zip(missing, scored))
+            if cache is not None:
+                # Only results of the analyzer's own backend are valid under its cache keys
+                cache.set_many({keys[t]: r for t, r in zip(missing, scored) if routes.get(t, backend) == backend})
+
+        if budget is None:
+            return [dict(results[t]) for t in texts]
+        return [dict(results[t], backend=routes.get(t, backend)) for t in texts]
+
+
+class RemoteSentimentAnalyzer:
+    """Client backend for a shared inference server (`manage.py inference_server`).
+    Texts are sent over the Unix socket at `socket_path` in chunks of `chunk_size`;
+    each thread keeps its own connection. When the server cannot be reached, fails or does
+    not answer within `timeout` seconds, the remaining texts are scored with a local VADER
+    analyzer and the server is not retried for `retry_after` seconds.
+    """
+    def __init__(self, socket_path: str, model_name: str = None, runtime: str = 'torch',
+                 timeout: float = 30.0, chunk_size: int = 1000, retry_after: float = 5.0):
+        self.socket_path = socket_path
+        self.model_name = model_name or 'cardiffnlp/twitter-xlm-roberta-base-sentiment'
+        self.runtime = runtime
+        self.timeout = timeout
+        self.chunk_size = max(1, int(chunk_size))
+        self.retry_after = retry_after
+        self.fallback = None
+        self.remote_backend = None      # backend reported by the server
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+        self._vader = None
+
+    @property
+    def backend(self) -> str:
+        return 'remote'
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            from .inference_server import InferenceClient
+            client = self._local.client = InferenceClient(self.socket_path, self.timeout)
+        return client
+
+    def _fallback_analyzer(self) -> SentimentAnalyzer:
+        with self._lock:
+            if self._vader is None:
+                self._vader = SentimentAnalyzer(use_transformers=False)
+            return self._vader
+
+    def _remote(self, texts: List[str], budget: Optional[float]) -> List[Dict]:
+        """Scores from the server, possibly fewer than `texts` if it became unavailable."""
+        results = []
+        if time.monotonic() < self._retry_at:
+            return results
+        started = time.perf_counter()
+        try:
+            with timed('remote'):
+                for start in range(0, len(texts), self.chunk_size):
+                    chunk = texts[start:start + self.chunk_size]
+                    remaining = None if budget is None else max(0.0, budget - (time.perf_counter() - started))
+                    reply = self._client().request({"op": "predict", "texts": chunk, "model_name": self.model_name,
+                                                    "runtime": self.runtime, "budget": remaining})
+                    results.extend(reply['results'])
+                    self.remote_backend = reply['backend']
+                    record_batch('remote', len(chunk))
+        except (OSError, ValueError, RuntimeError) as exc:
+            self._retry_at = time.monotonic() + self.retry_after
+            record_event(f"inference server failed: {exc}")
+        return results
+
+    def batch_predict(self, texts: List[str], budget: Optional[float] = None) -> List[Dict]:
+        if not texts:
+            return []
+        results = self._remote(list(texts), budget)
+        if len(results) < len(texts):
+            record_event("inference server unavailable; scored with VADER",
+                         counter='analysis_sentiment_fallback_total', requested='remote', backend='vader')
+            results.extend(self._fallback_analyzer().batch_predict(texts[len(results):], budget=budget))
+        return results
+
+    def predict_one(self, text: str) -> Dict:
+        return self.batch_predict([text])[0]
@@ -0,0 +1,100 @@
+import json
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+from .text_preprocess import PreprocessedBatch, preprocess_batch
+from .registry import get_analyzer
+from .pipeline import build_summary, run_clustering, sentiment_indices
+
+
+def parse_ndjson_comments(lines: Iterable[bytes]) -> Iterator[Optional[str]]:
+    """Yield comments from NDJSON lines.
+    Each line is a JSON string or an object with a "comment" field. Blank lines
+    are ignored; malformed lines or empty comments yield None so callers can count them.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        text = record.get('comment') if isinstance(record, dict) else record
+        if not isinstance(text, str) or not text.strip():
+            yield None
+            continue
+        yield text.strip()
+
+
+def stream_analysis(comments: Iterable[Optional[str]], options: Dict, warnings: List[str],
+                    batch_size: int, max_comments: int,
+                    limit_name: str = 'STREAM_MAX_COMMENTS') -> Iterator[Dict]:
+    """Analyze comments incrementally (None entries are skipped and counted).
+    Yields one {"type": "item"} record per comment as soon as its batch is scored,
+    then a final {"type": "summary"} record with the aspect clusters, the
+    cluster id of every item (aligned with `index`) and the warnings.
+    Only the cleaned texts are kept for clustering; originals are not retained.
+    """
+    analyzer = get_analyzer(
+        use_transformers=options.get('use_transformers', True),
+        model_name=settings.SENTIMENT_MODEL,
+        runtime=options.get('sentiment_runtime')
+    )
+    cleaned_all: List[str] = []
+    sentiment_idx: List[np.ndarray] = []
+    batch: List[str] = []
+    truncated_count = 0
+
+    def flush():
+        cleaned = preprocess_batch(batch)
+        sentiments = analyzer.batch_predict(cleaned)
+        sentiment_idx.append(sentiment_indices(sentiments))
+        start = len(cleaned_all)
+        cleaned_all.extend(cleaned)
+        for offset, (text, sentiment) in enumerate(zip(batch, sentiments)):
+            yield {"type": "item", "index": start + offset, "text": text, "sentiment": sentiment}
+        batch.clear()
+
+    n_seen = 0
+    skipped = 0
+    for text in comments:
+        if text is None:
+            skipped += 1
+            continue
+        if n_seen >= max_comments:
+            warnings.append(f"Too many comments provided; truncated to {limit_name}.")
+            break
+        n_seen += 1
+        if len(text) > settings.MAX_COMMENT_LENGTH:
+            text = text[:settings.MAX_COMMENT_LENGTH]
+            truncated_count += 1
+        batch.append(text)
+        if len(batch) >= batch_size:
+            yield from flush()
+    if batch:
+        yield from flush()
+
+    if truncated_count:
+        warnings.append(f"{truncated_count} comments were truncated due to MAX_COMMENT_LENGTH.")
+    if skipped:
+        warnings.append(f"{skipped} NDJSON lines were skipped (invalid JSON or empty comment).")
+    if not cleaned_all:
+        warnings.append("No comments provided.")
+
+    clusters, aspect_model = run_clustering(PreprocessedBatch(cleaned_all), options, warnings)
+    yield {
+        "type": "summary",
+        "summary": build_summary(len(cleaned_all), clusters, aspect_model,
+                                 np.concatenate(sentiment_idx) if sentiment_idx else np.zeros(0, dtype=np.int64)),
+        "cluster_ids": [int(label) if label is not None else None for label in clusters['labels']],
+        "warnings": warnings,
+    }
+
+
+def encode_ndjson(records: Iterable[Dict]) -> Iterator[bytes]:
+    for record in records:
+        yield (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
@@ -0,0 +1,67 @@
+from typing import List
+
+import numpy as np
+
+# Aspect vocabulary per topic; comments mix one topic with opinion words and filler
+TOPICS = {
+    "audio": "audio sound mic volume loud quiet noise music mix echo".split(),
+    "editing": "editing cuts transitions pacing intro outro effects jump cut".split(),
+    "humor": "jokes funny humor laugh hilarious cringe meme skit bit".split(),
+    "tutorial": "tutorial explanation learned helpful clear steps code example".split(),
+    "thumbnail": "thumbnail title clickbait misleading views algorithm".split(),
+    "creator": "voice energy personality host presenter channel".split(),
+}
+POSITIVE = "great love amazing awesome best perfect nice good excellent".split()
+NEGATIVE = "bad terrible awful boring worst annoying poor hate".split()
+FILLER = "the a this was is so really very and but i it video part just too".split()
+EMOJIS = ["😂", "🔥", "❤️", "👍", "😍", "🙏", "😭", "💀", "👏", "🤣"]
+STOCK = ["first!", "great video", "who's watching in 2024?", "love this", "lol", "❤️❤️❤️",
+         "underrated channel", "thanks for sharing", "this deserves more views"]
+URLS = ["https://youtu.be/dQw4w9WgXcQ", "https://example.com/blog/post?id=42", "http://bit.ly/3xYz"]
+
+
+def synthetic_comments(n: int, seed: int = 0) -> List[str]:
+    """Reproducible YouTube-like comments.
+    - Length: log-normal word count (median ~9 words, long tail up to ~150 words).
+    - ~12% exact repeats (stock phrases and copies of earlier comments).
+    - Emojis in ~25%, @mentions in ~8%, URLs in ~3%, timestamps in ~5%, some shouting.
+    """
+    rng = np.random.default_rng(seed)
+    topics = list(TOPICS.values())
+    texts: List[str] = []
+    lengths = np.clip(np.rint(rng.lognormal(mean=2.2, sigma=0.75, size=n)), 1, 150).astype(int)
+    for i in range(n):
+        r = rng.random()
+        if r < 0.05:
+            texts.append(STOCK[rng.integers(len(STOCK))])
+            continue
+        if r < 0.12 and texts:
+            texts.append(texts[rng.integers(len(texts))])
+            continue
+
+        vocab = topics[rng.integers(len(topics))]
+        opinion = POSITIVE if rng.random() < 0.6 else NEGATIVE
+        words = []
+        for _ in range(lengths[i]):
+            p = rng.random()
+            if p < 0.35:
+                words.append(vocab[rng.integers(len(vocab))])
+            elif p < 0.5:
+                words.append(opinion[rng.integers(len(opinion))])
+            else:
+                words.append(FILLER[rng.integers(len(FILLER))])
+        if rng.random() < 0.05:
+            words.insert(0, f"{rng.integers(0, 20)}:{rng.integers(0, 60):02d}")
+        if rng.random() < 0.08:
+            words.insert(0, f"@user{rng.integers(10000)}")
+        if rng.random() < 0.03:
+            words.append(URLS[rng.integers(len(URLS))])
+        if rng.random() < 0.25:
+            words.append(''.join(EMOJIS[j] for j in rng.integers(len(EMOJIS), size=rng.integers(1, 4))))
+        text = ' '.join(words)
+        if rng.random() < 0.1:
+            text = text.upper() + '!!!'
+        elif rng.random() < 0.5:
+            text = text.capitalize()
+        texts.append(text)
+    return texts
@@ -1,17 +1,99 @@
 import re
+from typing import List, Sequence
 
-URL_RE = re.compile(r'https?://\S+')
-MENTION_RE = re.compile(r'@\w+')
+import numpy as np
+
+# URLs, @mentions and whitespace runs collapse to one space in a single substitution.
+# A mention stops before an embedded URL so the result matches removing URLs first;
+# the leading lookahead lets the scan skip ordinary characters quickly.
+_CLEAN_RE = re.compile(r'(?=[\s@h])(?:\s|https?://\S+|@(?:(?!https?://\S)\w)+)+')
+# TfidfVectorizer's default token_pattern
+TOKEN_RE = re.compile(r'(?u)\b\w\w+\b')
 
 
 def preprocess_text(text: str) -> str:
     """Lowercase, strip URLs/mentions, normalize whitespace."""
     t = text.strip().lower()
-    t = URL_RE.sub(' ', t)
-    t = MENTION_RE.sub(' ', t)
-    t = re.sub(r'\s+', ' ', t)
-    return t
+    if '@' not in t and 'http' not in t:
+        # Most comments: only whitespace to collapse (str.split uses the same whitespace as \s)
+        return ' '.join(t.split())
+    return _CLEAN_RE.sub(' ', t)
 
 
 def preprocess_batch(texts):
     return [preprocess_text(t) for t in texts]
+
+
+def tokenize(doc) -> List[str]:
+    """Word tokens of a cleaned text; already tokenized documents (lists) pass through."""
+    return doc if isinstance(doc, list) else TOKEN_RE.findall(doc)
+
+
+# TfidfVectorizer arguments for cleaned texts, so PreprocessedBatch.tokens can be fed directly
+PRETOKENIZED = dict(tokenizer=tokenize, lowercase=False, token_pattern=None)
+
+
+def vectorizer_docs(vectorizer, texts: Sequence[str], tokens=None):
+    """Documents for a fitted vectorizer: cached tokens when it was built with PRETOKENIZED."""
+    if tokens is not None and getattr(vectorizer, 'tokenizer', None) is tokenize:
+        return tokens
+    return texts
+
+
+class PreprocessedBatch:
+    """Cleaned comments of one request plus their distinct texts.
+    - cleaned: one cleaned text per input comment
+    - unique: distinct cleaned texts in first-seen order
+    - inverse: index into `unique` for every input (numpy int array)
+    - counts: occurrences of every unique text
+    - tokens: word tokens of the unique texts, computed once on first use
+    - n_merged: distinct texts folded into a near-duplicate representative (see `merge`)
+    """
+    __slots__ = ('cleaned', 'unique', 'inverse', 'counts', 'n_merged', '_tokens')
+
+    def __init__(self, cleaned: List[str]):
+        index = {}
+        self.cleaned = cleaned
+        self.inverse = np.fromiter((index.setdefault(t, len(index)) for t in cleaned),
+                                   dtype=np.int64, count=len(cleaned))
+        self.unique = list(index)
+        self.counts = np.bincount(self.inverse, minlength=len(self.unique))
+        self.n_merged = 0
+        self._tokens = None
+
+    @classmethod
+    def from_texts(cls, texts: Sequence[str]) -> 'PreprocessedBatch':
+        return cls(preprocess_batch(texts))
+
+    def __len__(self):
+        return len(self.cleaned)
+
+    @property
+    def has_duplicates(self) -> bool:
+        return len(self.unique) < len(self.cleaned)
+
+    @property
+    def tokens(self) -> List[List[str]]:
+        if self._tokens is None:
+            self._tokens = [TOKEN_RE.findall(t) for t in self.unique]
+        return self._tokens
+
+    def merge(self, representative: np.ndarray) -> 'PreprocessedBatch':
+        """Batch whose distinct texts are only the representatives, where `representative[j]`
+        is the unique index standing in for unique text j (e.g. near_duplicate_groups).
+        Every input maps to its representative and `counts` become group sizes."""
+        keep = np.flatnonzero(representative == np.arange(len(self.unique)))
+        position = np.empty(len(self.unique), dtype=np.int64)
+        position[keep] = np.arange(len(keep))
+        merged = object.__new__(PreprocessedBatch)
+        merged.cleaned = self.cleaned
+        merged.unique = [self.unique[j] for j in keep.tolist()]
+        merged.inverse = position[representative[self.inverse]]
+        merged.counts = np.bincount(merged.inverse, minlength=len(keep))
+        merged.n_merged = self.n_merged + len(self.unique) - len(keep)
+        merged._tokens = None if self._tokens is None else [self._tokens[j] for j in keep.tolist()]
+        return merged
+
+    def expand(self, values: Sequence) -> list:
+        """Per-unique values -> per-input list."""
+        return [values[i] for i in self.inverse.tolist()]
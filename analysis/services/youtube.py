@@ -0,0 +1,294 @@
+import http.client
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from django.conf import settings
+
+from .streaming import stream_analysis
+
+VIDEO_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+
+def parse_video_id(value: str) -> str:
+    """Video id from a bare id or a youtube.com / youtu.be URL (watch, shorts, embed, live)."""
+    value = value.strip()
+    if VIDEO_ID_RE.match(value):
+        return value
+    parsed = urlsplit(value if '://' in value else 'https://' + value)
+    host = (parsed.hostname or '').lower()
+    parts = [p for p in parsed.path.split('/') if p]
+    candidate = ''
+    if host == 'youtu.be' and parts:
+        candidate = parts[0]
+    elif host == 'youtube.com' or host.endswith('.youtube.com'):
+        if 'v' in parse_qs(parsed.query):
+            candidate = parse_qs(parsed.query)['v'][0]
+        elif len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+            candidate = parts[1]
+    if VIDEO_ID_RE.match(candidate):
+        return candidate
+    raise ValueError(f"Not a YouTube video URL or id: {value!r}")
+
+
+class YouTubeAPIError(Exception):
+    def __init__(self, status: Optional[int], message: str):
+        super().__init__(f"{status} {message}" if status else message)
+        self.status = status
+
+
+class RateLimiter:
+    """Token bucket shared by all fetch threads; `rate` requests per second (<= 0 disables it)."""
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _error_message(body: bytes) -> str:
+    try:
+        return json.loads(body)['error']['message']
+    except Exception:
+        return body[:200].decode('utf-8', 'replace')
+
+
+class YouTubeClient:
+    """Minimal YouTube Data API v3 client.
+    - Keep-alive connections are pooled (up to `pool_size` idle) and shared across threads.
+    - 429/5xx responses and connection errors are retried with exponential backoff
+      (Retry-After is honoured); other errors raise YouTubeAPIError immediately.
+    - Every request, retries included, goes through one RateLimiter.
+    """
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    PAGE_SIZE = 100   # API maximum for commentThreads
+
+    def __init__(self, base_url: str, api_key: str = '', pool_size: int = 4, timeout: float = 10.0,
+                 max_retries: int = 3, backoff: float = 0.5, rate_limit: float = 10.0):
+        parsed = urlsplit(base_url)
+        self.base_url = base_url
+        self._connection_class = (http.client.HTTPSConnection if parsed.scheme == 'https'
+                                  else http.client.HTTPConnection)
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._prefix = parsed.path.rstrip('/')
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(rate_limit)
+        self._pool: "queue.LifoQueue" = queue.LifoQueue()
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connection_class(self._host, self._port, timeout=self.timeout)
+
+    def _release(self, conn):
+        if self._pool.qsize() < self.pool_size:
+            self._pool.put(conn)
+        else:
+            conn.close()
+
+    def get(self, endpoint: str, params: Dict) -> Dict:
+        if self.api_key:
+            params = {**params, 'key': self.api_key}
+        path = f'{self._prefix}/{endpoint}?{urlencode(params)}'
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            conn = self._acquire()
+            delay = None
+            try:
+                conn.request('GET', path, headers={'Accept': 'application/json'})
+                resp = conn.getresponse()
+                body = resp.read()
+            except (OSError, http.client.HTTPException) as exc:
+                conn.close()
+                error = YouTubeAPIError(None, f"Connection error: {exc}")
+            else:
+                self._release(conn)
+                if resp.status == 200:
+                    return json.loads(body)
+                error = YouTubeAPIError(resp.status, _error_message(body))
+                if resp.status not in self.RETRY_STATUSES:
+                    raise error
+                retry_after = resp.getheader('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    delay = float(retry_after)
+            if attempt == self.max_retries:
+                raise error
+            time.sleep(delay if delay is not None else self.backoff * 2 ** attempt)
+
+    def comment_pages(self, video_id: str, max_comments: int) -> Iterator[List[str]]:
+        """Top-level comment texts of a video, one list per API page."""
+        token, n = None, 0
+        while n < max_comments:
+            params = {
+                'part': 'snippet',
+                'videoId': video_id,
+                'maxResults': min(self.PAGE_SIZE, max_comments - n),
+                'textFormat': 'plainText',
+            }
+            if token:
+                params['pageToken'] = token
+            data = self.get('commentThreads', params)
+            texts = []
+            for item in data.get('items', []):
+                snippet = item.get('snippet', {}).get('topLevelComment', {}).get('snippet', {})
+                text = snippet.get('textOriginal') or snippet.get('textDisplay')
+                if text:
+                    texts.append(text)
+            texts = texts[:max_comments - n]
+            n += len(texts)
+            if texts:
+                yield texts
+            token = data.get('nextPageToken')
+            if not token:
+                break
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_DONE = object()
+
+
+def fetch_comments(client: YouTubeClient, video_ids: List[str], max_per_video: int, workers: int = 4,
+                   prefetch: int = 8, videos: Optional[Dict[str, Dict]] = None) -> Iterator[str]:
+    """Yield comments as pages arrive.
+    Videos are paged by up to `workers` threads at once (pages of one video follow
+    nextPageToken, so they are sequential); a queue of `prefetch` pages lets downloads
+    run ahead of the consumer. Per-video counts and errors are recorded in `videos`.
+    Closing the generator early stops the fetch threads after their current request.
+    """
+    videos = videos if videos is not None else {}
+    pages: "queue.Queue" = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch(video_id):
+        info = videos[video_id]
+        try:
+            for page in client.comment_pages(video_id, max_per_video):
+                if not put(page):
+                    return
+                info['n_comments'] += len(page)
+        except Exception as exc:
+            info['error'] = str(exc)
+        finally:
+            put(_DONE)
+
+    for video_id in video_ids:
+        videos[video_id] = {"video_id": video_id, "n_comments": 0, "error": None}
+    executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(video_ids))),
+                                  thread_name_prefix='youtube-fetch')
+    for video_id in video_ids:
+        executor.submit(fetch, video_id)
+    try:
+        remaining = len(video_ids)
+        while remaining:
+            page = pages.get()
+            if page is _DONE:
+                remaining -= 1
+                continue
+            yield from page
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
+
+
+def analyze_videos(video_ids: List[str], options: Dict, max_comments: int,
+                   client: Optional[YouTubeClient] = None, limit_name: str = 'YOUTUBE_MAX_COMMENTS') -> Dict:
+    """Fetch comments of the videos and analyze them while later pages are still downloading.
+    Pages flow through preprocess/sentiment in STREAM_BATCH_SIZE batches; clustering
+    runs once all comments are in. Same response shape as /api/analysis/comments/ plus `videos`.
+    `limit_name` is the limit that set `max_comments` (named in the truncation warning).
+    """
+    client = client or get_youtube_client()
+    video_ids = list(dict.fromkeys(video_ids))
+    warnings: List[str] = []
+    videos: Dict[str, Dict] = {}
+    comments = fetch_comments(client, video_ids, max_comments,
+                              workers=settings.YOUTUBE_FETCH_WORKERS, videos=videos)
+    items, summary = [], None
+    try:
+        for record in stream_analysis(comments, options, warnings, batch_size=settings.STREAM_BATCH_SIZE,
+                                      max_comments=max_comments, limit_name=limit_name):
+            if record['type'] == 'item':
+                items.append({"text": record['text'], "sentiment": record['sentiment']})
+            else:
+                summary = record
+    finally:
+        comments.close()
+
+    for item, label in zip(items, summary['cluster_ids']):
+        item['cluster_id'] = label
+    for info in videos.values():
+        if info['error']:
+            warnings.insert(0, f"Video {info['video_id']}: {info['error']}")
+    return {
+        "summary": summary['summary'],
+        "items": items,
+        "videos": [videos[v] for v in video_ids],
+        "warnings": warnings,
+    }
+
+
+_client = None
+_client_config = None
+_client_lock = threading.Lock()
+
+
+def get_youtube_client() -> YouTubeClient:
+    """Process-wide client (shared connection pool and rate limiter)."""
+    global _client, _client_config
+    config = dict(
+        base_url=settings.YOUTUBE_API_BASE_URL,
+        api_key=settings.YOUTUBE_API_KEY,
+        pool_size=settings.YOUTUBE_FETCH_WORKERS,
+        timeout=settings.YOUTUBE_TIMEOUT,
+        max_retries=settings.YOUTUBE_MAX_RETRIES,
+        backoff=settings.YOUTUBE_RETRY_BACKOFF,
+        rate_limit=settings.YOUTUBE_RATE_LIMIT,
+    )
+    with _client_lock:
+        if _client is None or _client_config != config:
+            if _client is not None:
+                _client.close()
+            _client = YouTubeClient(**config)
+            _client_config = config
+        return _client
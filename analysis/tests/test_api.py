@@ -1,8 +1,13 @@
 import json
+import threading
+from unittest import mock
+
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 
+from analysis.services import pipeline
+
 
 class CommentsAnalysisAPITests(TestCase):
     def setUp(self):
@@ -43,3 +48,63 @@ class CommentsAnalysisAPITests(TestCase):
         self.assertEqual(resp.status_code, 200)
         data = resp.json()
         self.assertIn('summary', data)
+
+    def test_sentiment_runtime_option(self):
+        payload = {"comments": ["nice", "bad"], "options": {"sentiment_runtime": "onnx"}}
+        resp = self.client.post(self.url, data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        payload["options"]["sentiment_runtime"] = "tensorflow"
+        resp = self.client.post(self.url, data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+
+
+class CommentsAnalysisAsyncAPITests(TestCase):
+    payload = {
+        "comments": ["Great content, learned a lot", "Too long and boring", "Audio was low but editing was good"],
+        "options": {"num_aspect_clusters": 2, "use_transformers": False}
+    }
+
+    def setUp(self):
+        self.url = reverse('analysis-comments-async')
+
+    async def test_same_response_as_sync_view(self):
+        resp = await self.async_client.post(self.url, data=self.payload, content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        sync = await self.async_client.post(reverse('analysis-comments'), data=self.payload,
+                                            content_type='application/json')
+        sync = sync.json()
+        # Identical input: the second request reuses the first one's clustering
+        data['summary'].pop('cluster_cache')
+        self.assertEqual(sync['summary'].pop('cluster_cache'), 'hit')
+        self.assertEqual(data, sync)
+
+    async def test_validation_errors(self):
+        resp = await self.async_client.post(self.url, data={"comments": []}, content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('comments', resp.json())
+        resp = await self.async_client.post(self.url, data='{not json', content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+
+    async def test_sentiment_and_clustering_run_concurrently(self):
+        # Each stage waits until the other one has started; sequential stages would time out
+        barrier = threading.Barrier(2, timeout=10)
+        run_clustering = pipeline.run_clustering
+
+        def clustering(*args):
+            barrier.wait()
+            return run_clustering(*args)
+
+        analyzer = pipeline.get_analyzer(use_transformers=False)
+        batch_predict = analyzer.batch_predict
+
+        def predict(texts, **kwargs):
+            barrier.wait()
+            return batch_predict(texts, **kwargs)
+
+        with mock.patch.object(pipeline, 'run_clustering', clustering), \
+                mock.patch.object(analyzer, 'batch_predict', predict), \
+                mock.patch.object(pipeline, 'get_analyzer', return_value=analyzer):
+            resp = await self.async_client.post(self.url, data=self.payload, content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()['items']), 3)
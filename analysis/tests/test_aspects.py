@@ -0,0 +1,151 @@
+import io
+import json
+import tempfile
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from analysis.services.aspect_models import AspectModelNotFound, AspectModelStore
+from analysis.services.aspects import AspectClusterer, LargeKMeansAspectModel, stratified_sample
+from analysis.services.pipeline import run_clustering
+from analysis.services.text_preprocess import PreprocessedBatch
+
+TEXTS = [
+    "great audio quality", "audio was too low", "bad audio mixing",
+    "funny jokes in the intro", "the jokes were hilarious", "jokes fell flat",
+    "editing was smooth", "nice editing and cuts",
+]
+
+
+class FittedAspectModelTests(SimpleTestCase):
+    def test_predict_reuses_fitted_clusters(self):
+        clusterer = AspectClusterer(algorithm='kmeans')
+        fitted = clusterer.cluster(TEXTS, n_clusters=3)
+        self.assertTrue(clusterer.fitted)
+
+        reused = AspectClusterer(model=clusterer.model)
+        predicted = reused.cluster(TEXTS, n_clusters=3)
+        self.assertFalse(reused.fitted)
+        self.assertEqual(predicted['labels'], fitted['labels'])
+        self.assertEqual(predicted['keywords'], fitted['keywords'])
+        self.assertEqual(sum(predicted['sizes']), len(TEXTS))
+
+    def test_duplicates_are_clustered_once(self):
+        texts = TEXTS + ["great audio quality"] * 5
+        batch = PreprocessedBatch.from_texts(texts)
+        clusters, _ = run_clustering(batch, {"num_aspect_clusters": 3}, [])
+        self.assertEqual(len(clusters['labels']), len(texts))
+        self.assertEqual(sum(clusters['sizes']), len(texts))
+        self.assertEqual(len(set(clusters['labels'][-6:])), 1)
+        for reps in clusters['representatives']:
+            self.assertEqual(len(reps), len(set(reps)))
+
+    def test_predict_on_new_texts(self):
+        clusterer = AspectClusterer(algorithm='fcm')
+        clusterer.cluster(TEXTS, n_clusters=3)
+        result = AspectClusterer(model=clusterer.model).cluster(["audio is low", "more jokes please"])
+        self.assertEqual(len(result['labels']), 2)
+        self.assertEqual(result['n_clusters'], clusterer.model.n_clusters)
+
+
+@override_settings(CLUSTER_LARGE_SAMPLE=6, CLUSTER_LARGE_CHUNK=3, CLUSTER_LARGE_DIM=4)
+class LargeCorpusClusteringTests(SimpleTestCase):
+    def test_stratified_sample_keeps_length_mix(self):
+        lengths = np.array([1] * 900 + [40] * 100)
+        sample = stratified_sample(lengths, 100)
+        self.assertEqual(len(sample), 100)
+        self.assertEqual(len(set(sample.tolist())), 100)
+        self.assertEqual(int((lengths[sample] == 40).sum()), 10)
+        self.assertEqual(stratified_sample(lengths[:50], 100).tolist(), list(range(50)))
+        # Frequent texts weigh their stratum
+        weights = np.array([1] * 900 + [9] * 100)
+        self.assertEqual(int((lengths[stratified_sample(lengths, 100, weights)] == 40).sum()), 50)
+
+    def test_large_mode_assigns_every_text(self):
+        weights = np.arange(1, len(TEXTS) + 1)
+        clusterer = AspectClusterer('kmeans', mode='large')
+        result = clusterer.cluster(TEXTS, n_clusters=3, weights=weights)
+        self.assertIsInstance(clusterer.model, LargeKMeansAspectModel)
+        self.assertTrue(all(label is not None for label in result['labels']))
+        self.assertEqual(sum(result['sizes']), int(weights.sum()))
+        self.assertTrue(any(result['keywords']))
+
+        predicted = AspectClusterer(model=clusterer.model).cluster(TEXTS)
+        self.assertEqual(predicted['labels'], result['labels'])
+
+    def test_auto_mode_switches_on_size(self):
+        clusterer = AspectClusterer('kmeans')
+        clusterer.cluster(TEXTS, n_clusters=3)
+        self.assertNotIsInstance(clusterer.model, LargeKMeansAspectModel)
+        with override_settings(CLUSTER_LARGE_MIN_TEXTS=len(TEXTS)):
+            clusterer = AspectClusterer('kmeans')
+            clusterer.cluster(TEXTS, n_clusters=3)
+        self.assertIsInstance(clusterer.model, LargeKMeansAspectModel)
+
+    def test_compare_command(self):
+        out = io.StringIO()
+        with override_settings(CLUSTER_LARGE_SAMPLE=100, CLUSTER_LARGE_CHUNK=64, CLUSTER_LARGE_DIM=20):
+            call_command('compare_clustering', sizes='300', clusters=3, no_memory=True, stdout=out)
+        row = json.loads(out.getvalue().splitlines()[-1])
+        self.assertEqual(row['n_comments'], 300)
+        for key in ('ari', 'nmi', 'keyword_overlap', 'exact_reseeded_ari'):
+            self.assertLessEqual(row[key], 1.0)
+
+
+class AspectModelStoreTests(SimpleTestCase):
+    def test_versions_and_load(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = AspectModelStore(root)
+            clusterer = AspectClusterer()
+            clusterer.cluster(TEXTS, n_clusters=2)
+            self.assertEqual(store.save('channel-a', clusterer.model), 1)
+            self.assertEqual(store.save('channel-a', clusterer.model), 2)
+
+            fresh = AspectModelStore(root)
+            model, version = fresh.load('channel-a')
+            self.assertEqual(version, 2)
+            self.assertEqual(model.n_clusters, 2)
+            self.assertEqual(fresh.load('channel-a', 1)[1], 1)
+            self.assertEqual([m['version'] for m in fresh.list()], [1, 2])
+            with self.assertRaises(AspectModelNotFound):
+                fresh.load('channel-b')
+            with self.assertRaises(ValueError):
+                fresh.load('../etc')
+
+
+class AspectModelAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('analysis-comments')
+        self.tmp = tempfile.TemporaryDirectory()
+        self.override = override_settings(ASPECT_MODEL_DIR=self.tmp.name)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        self.tmp.cleanup()
+
+    def _post(self, options):
+        payload = {"comments": TEXTS, "options": {"use_transformers": False, **options}}
+        resp = self.client.post(self.url, data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_save_then_reuse(self):
+        saved = self._post({"num_aspect_clusters": 3, "save_aspect_model": "demo"})
+        self.assertEqual(saved['summary']['aspect_model'], {"name": "demo", "version": 1, "mode": "fit"})
+
+        reused = self._post({"aspect_model": "demo"})
+        self.assertEqual(reused['summary']['aspect_model']['mode'], 'predict')
+        self.assertEqual([i['cluster_id'] for i in reused['items']], [i['cluster_id'] for i in saved['items']])
+
+        listed = self.client.get(reverse('analysis-aspect-models')).json()
+        self.assertEqual([m['name'] for m in listed['models']], ['demo'])
+
+    def test_unknown_model_falls_back_with_warning(self):
+        data = self._post({"aspect_model": "missing"})
+        self.assertNotIn('aspect_model', data['summary'])
+        self.assertTrue(any("not found" in w for w in data['warnings']))
@@ -0,0 +1,53 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from analysis.management.commands.benchmark import compare
+from analysis.services.synthetic import synthetic_comments
+
+
+class SyntheticCommentsTests(SimpleTestCase):
+    def test_reproducible_and_youtube_like(self):
+        texts = synthetic_comments(2000, seed=3)
+        self.assertEqual(texts, synthetic_comments(2000, seed=3))
+        self.assertNotEqual(texts, synthetic_comments(2000, seed=4))
+        self.assertLess(len(set(texts)), len(texts))
+        self.assertTrue(any('http' in t for t in texts))
+        self.assertTrue(any(t.startswith('@') for t in texts))
+        self.assertTrue(any(ord(c) > 0x1F000 for t in texts for c in t))
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+    def test_compare_flags_slowdowns(self):
+        baseline = [{"stage": "sentiment", "variant": "vader", "size": 100, "seconds": 1.0, "peak_mb": 10.0},
+                    {"stage": "clustering", "variant": "kmeans", "size": 100, "skipped": "x"}]
+        current = [{"stage": "sentiment", "variant": "vader", "size": 100, "seconds": 1.5, "peak_mb": 10.5},
+                   {"stage": "clustering", "variant": "kmeans", "size": 100, "seconds": 9.0}]
+        regressions = compare(current, baseline, threshold=0.2)
+        self.assertEqual([(r['metric'], r['ratio']) for r in regressions], [('seconds', 1.5)])
+
+    def test_run_and_compare_with_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.json')
+            args = ['--sizes', '50', '--backends', 'vader', '--algorithms', 'kmeans', '--no-memory']
+            call_command('benchmark', *args, '--output', output, stdout=io.StringIO())
+            with open(output) as fh:
+                report = json.load(fh)
+            stages = {(r['stage'], r['variant']) for r in report['results']}
+            self.assertEqual(stages, {('preprocess', 'batch'), ('sentiment', 'vader'),
+                                      ('clustering', 'kmeans'), ('end_to_end', 'vader+kmeans')})
+
+            # A baseline that is 1000x faster flags every stage
+            for r in report['results']:
+                r['seconds'] /= 1000
+            baseline = os.path.join(tmp, 'baseline.json')
+            with open(baseline, 'w') as fh:
+                json.dump(report, fh)
+            with self.assertRaises(CommandError):
+                call_command('benchmark', *args, '--output', output, '--baseline', baseline,
+                             stdout=io.StringIO(), stderr=io.StringIO())
@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from analysis.services import pipeline
+from analysis.services.cache import (ClusterCache, LRUCache, SQLiteStore, SentimentCache, TieredCache,
+                                     get_cluster_cache)
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set_many({"a": 1, "b": 2})
+        cache.get_many(["a"])
+        cache.set_many({"c": 3})
+        self.assertEqual(cache.get_many(["a", "b", "c"]), {"a": 1, "c": 3})
+
+
+class SentimentCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'sentiment.sqlite3')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_counts_hits_and_misses(self):
+        cache = SentimentCache(10)
+        key = SentimentCache.key('vader', 'm', 'first')
+        cache.set_many({key: {"label": "neutral", "score": 1.0}})
+        cache.get_many([key, SentimentCache.key('vader', 'm', 'second')])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_persistent_tier_survives_restart(self):
+        key = SentimentCache.key('vader', 'm', 'first')
+        store = SQLiteStore(self.path, table='sentiment')
+        SentimentCache(10, store=store).set_many({key: {"label": "positive", "score": 0.9}})
+        store.close()
+
+        store = SQLiteStore(self.path, table='sentiment')
+        cache = SentimentCache(10, store=store)
+        self.assertEqual(cache.get_many([key]), {key: {"label": "positive", "score": 0.9}})
+        self.assertEqual(cache.stats()['disk_hits'], 1)
+        # Promoted to memory: the second lookup is a memory hit
+        cache.get_many([key])
+        self.assertEqual(cache.stats()['hits'], 1)
+        store.close()
+
+
+class ClusterCacheTests(SimpleTestCase):
+    def test_ttl_expires_entries(self):
+        cache = TieredCache(10, ttl=60)
+        cache.set_many({"k": {"labels": [0, 1]}})
+        self.assertEqual(cache.get_many(["k"]), {"k": {"labels": [0, 1]}})
+        with mock.patch('analysis.services.cache.time.time', return_value=time.time() + 61):
+            self.assertEqual(cache.get_many(["k"]), {})
+        self.assertEqual(len(cache.memory), 0)
+        self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (1, 1))
+
+    def test_disk_tier_is_bounded_and_persistent(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'clusters.sqlite3')
+            store = SQLiteStore(path, table='clusters', max_entries=2)
+            cache = ClusterCache(1, store=store, ttl=60)
+            for i in range(3):
+                cache.set_many({f"k{i}": {"sizes": [np.int64(i)]}})
+            self.assertEqual(len(cache.memory), 1)
+            fresh = ClusterCache(1, store=SQLiteStore(path, table='clusters'), ttl=60)
+            self.assertEqual(fresh.get_many(["k0", "k1", "k2"]), {"k1": {"sizes": [1]}, "k2": {"sizes": [2]}})
+            self.assertEqual(fresh.stats()['disk_hits'], 2)
+            store.close()
+            fresh.store.close()
+
+    def test_fingerprint_covers_texts_weights_and_options(self):
+        fp = ClusterCache.fingerprint(["a", "b"], np.array([2, 1]))
+        self.assertEqual(fp, ClusterCache.fingerprint(["a", "b"], [2, 1]))
+        self.assertNotEqual(fp, ClusterCache.fingerprint(["a", "b"]))
+        self.assertNotEqual(fp, ClusterCache.fingerprint(["a\0b"], [2, 1]))
+        self.assertNotEqual(ClusterCache.key(fp, 'kmeans', 'auto', 3, 3), ClusterCache.key(fp, 'fcm', 'auto', 3, 3))
+        self.assertNotEqual(ClusterCache.key(fp, 'kmeans', 'auto', 3, 3, (20000,)),
+                            ClusterCache.key(fp, 'kmeans', 'auto', 3, 3, (10000,)))
+
+
+class ClusterCacheAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        get_cluster_cache().clear()
+
+    def _post(self, comments, **options):
+        return self.client.post(reverse('analysis-comments'), data=json.dumps({
+            "comments": comments,
+            "options": {"use_transformers": False, "num_aspect_clusters": 2, **options},
+        }), content_type='application/json').json()
+
+    def test_identical_requests_reuse_clustering(self):
+        comments = ["great video thanks", "audio too low", "great tutorial", "the audio is bad", "audio audio"]
+        first = self._post(comments)
+        self.assertEqual(first['summary'].pop('cluster_cache'), 'miss')
+        with mock.patch.object(pipeline.AspectClusterer, 'cluster') as cluster:
+            second = self._post(comments)
+        cluster.assert_not_called()
+        self.assertEqual(second['summary'].pop('cluster_cache'), 'hit')
+        self.assertEqual(first, second)
+        # Other options or texts are separate entries; the cache can be bypassed
+        self.assertEqual(self._post(comments, num_aspect_clusters=3)['summary']['cluster_cache'], 'miss')
+        self.assertEqual(self._post(comments[:4])['summary']['cluster_cache'], 'miss')
+        self.assertNotIn('cluster_cache', self._post(comments, cluster_cache=False)['summary'])
+        # Settings the result depends on are part of the key
+        with override_settings(CLUSTER_LARGE_MIN_TEXTS=2):
+            self.assertEqual(self._post(comments)['summary']['cluster_cache'], 'miss')
+        self.assertEqual(self._post(comments, clustering_algorithm='fcm')['summary']['cluster_cache'], 'miss')
+        with override_settings(FCM_MAX_ITER=5):
+            self.assertEqual(self._post(comments, clustering_algorithm='fcm')['summary']['cluster_cache'], 'miss')
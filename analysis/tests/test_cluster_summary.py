@@ -0,0 +1,50 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from analysis.services.cluster_summary import cluster_sizes, label_counts, representatives, summarize, top_terms
+
+
+class ClusterSummaryTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.n, self.k = 200, 6
+        self.labels = rng.integers(0, self.k, size=self.n)
+        self.distances = rng.random((self.n, self.k))
+        self.texts = [f"t{i}" for i in range(self.n)]
+
+    def test_top_terms_match_full_sort(self):
+        rng = np.random.default_rng(1)
+        centers = rng.random((4, 50)) - 0.3
+        names = [f"w{j}" for j in range(50)]
+        expected = [[names[j] for j in np.argsort(row)[::-1][:5] if row[j] > 0] for row in centers]
+        self.assertEqual(top_terms(names, centers, top_n=5), expected)
+        self.assertEqual(top_terms(names[:3], centers[:, :3], top_n=5)[0],
+                         [names[j] for j in np.argsort(centers[0, :3])[::-1] if centers[0, j] > 0])
+
+    def test_sizes_ignore_outliers(self):
+        labels = np.array([0, 2, 2, -1, 2])
+        self.assertEqual(cluster_sizes(labels, 4).tolist(), [1, 0, 3, 0])
+        self.assertEqual(cluster_sizes(labels, 4, weights=np.array([2, 1, 3, 5, 1])).tolist(), [2, 0, 5, 0])
+
+    def test_representatives_closest_to_own_centroid(self):
+        reps = representatives(self.texts, self.labels, self.k, 3, self.distances)
+        for c in range(self.k):
+            idxs = np.where(self.labels == c)[0]
+            order = idxs[np.argsort(self.distances[idxs, c])][:3]
+            self.assertEqual(reps[c], [self.texts[i] for i in order])
+        # Distances to the own centroid only give the same order
+        own = self.distances[np.arange(self.n), self.labels]
+        self.assertEqual(representatives(self.texts, self.labels, self.k, 3, own), reps)
+
+    def test_summarize_maps_unassigned_to_none(self):
+        result = summarize(["a", "b", "c"], [0, None, 0], 2, [["x"], []], n_reps=5)
+        self.assertEqual(result["labels"], [0, None, 0])
+        self.assertEqual(result["sizes"], [2, 0])
+        self.assertEqual(result["representatives"], [["a", "c"], []])
+
+    def test_label_counts(self):
+        labels = [0, 1, None, 1, 1]
+        classes = np.array([2, 0, 1, 2, 2])
+        overall, per_cluster = label_counts(labels, classes, 3, 3)
+        self.assertEqual(overall.tolist(), [1, 1, 3])
+        self.assertEqual(per_cluster.tolist(), [[0, 0, 1], [1, 0, 2], [0, 0, 0]])
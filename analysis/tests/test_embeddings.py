@@ -0,0 +1,47 @@
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+
+from analysis.services.embeddings import EmbeddingStore
+
+
+class _FakeEncoder:
+    """Deterministic 4-d embeddings; records which texts were encoded."""
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=64):
+        self.calls.append(list(texts))
+        return np.array([[len(t), t.count('a'), t.count(' '), 1.0] for t in texts])
+
+
+class EmbeddingStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_only_new_texts_are_encoded(self):
+        encoder = _FakeEncoder()
+        store = EmbeddingStore(self.tmp.name, encoder)
+        first = store.encode(["a cat", "banana", "a cat"])
+        second = store.encode(["banana", "new text", "a cat"])
+        self.assertEqual(encoder.calls, [["a cat", "banana"], ["new text"]])
+        self.assertEqual(first.dtype, np.float32)
+        np.testing.assert_array_equal(first[0], first[2])
+        np.testing.assert_array_equal(second[0], first[1])
+        np.testing.assert_array_equal(second[1], [8, 0, 1, 1])
+        self.assertEqual(store.stats()['size'], 3)
+        store.close()
+
+    def test_persists_across_instances(self):
+        store = EmbeddingStore(self.tmp.name, _FakeEncoder())
+        expected = store.encode(["persist me"])
+        store.close()
+
+        encoder = _FakeEncoder()
+        reopened = EmbeddingStore(self.tmp.name, encoder)
+        np.testing.assert_array_equal(reopened.encode(["persist me"]), expected)
+        self.assertEqual(encoder.calls, [])
+        reopened.close()
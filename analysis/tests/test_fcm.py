@@ -0,0 +1,41 @@
+import numpy as np
+from scipy import sparse
+from django.test import SimpleTestCase
+
+from analysis.services import fcm
+
+
+def _blobs(seed=0):
+    rng = np.random.default_rng(seed)
+    centers = np.array([[0, 0], [10, 10], [-10, 10]], dtype=np.float64)
+    x = np.vstack([c + rng.normal(scale=0.5, size=(50, 2)) for c in centers])
+    return x, np.repeat(np.arange(3), 50)
+
+
+class FuzzyCMeansTests(SimpleTestCase):
+    def test_recovers_separated_clusters_in_float32(self):
+        x, truth = _blobs()
+        centers, u, n_iter = fcm.fuzzy_cmeans(x, c=3, error=1e-4, maxiter=300)
+        self.assertEqual(centers.dtype, np.float32)
+        self.assertEqual(u.dtype, np.float32)
+        np.testing.assert_allclose(u.sum(axis=0), 1.0, rtol=1e-5)
+        labels = u.argmax(axis=0)
+        # Same partition as the ground truth, up to cluster renaming
+        for k in range(3):
+            self.assertEqual(len(set(labels[truth == k])), 1)
+        self.assertLess(n_iter, 300)
+
+    def test_memberships_match_reference_formula(self):
+        x, _ = _blobs(1)
+        centers = np.array([[0, 0], [5, 5]], dtype=np.float32)
+        u = fcm.memberships(x, centers, m=2.0)
+        d = np.linalg.norm(x[None, :, :] - centers[:, None, :], axis=2)
+        expected = 1.0 / ((d[:, None, :] / d[None, :, :]) ** 2).sum(axis=1)
+        np.testing.assert_allclose(u, expected, rtol=1e-3)
+
+    def test_weighted_centroids_single_product(self):
+        rng = np.random.default_rng(2)
+        X = sparse.random(20, 7, density=0.3, format='csr', random_state=3)
+        u = rng.random((3, 20)).astype(np.float32)
+        expected = np.vstack([(u[j] @ X.toarray()) / (u[j].sum() + 1e-9) for j in range(3)])
+        np.testing.assert_allclose(fcm.weighted_centroids(u, X), expected, rtol=1e-5)
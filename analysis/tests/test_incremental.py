@@ -0,0 +1,175 @@
+import json
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from analysis.services import incremental
+from analysis.services.incremental import CorpusStore, update_corpus
+
+OPTIONS = {"use_transformers": False, "num_aspect_clusters": 2}
+FIRST = ["great audio quality", "the audio is too quiet", "funny jokes", "jokes were hilarious"]
+SECOND = ["great audio quality", "audio mix is quiet", "more jokes please"]
+
+
+@override_settings(CORPUS_MIN_FIT_TEXTS=2)
+class IncrementalCorpusTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = CorpusStore(self.tmp.name)
+
+    def test_only_new_comments_are_scored(self):
+        first = update_corpus(self.store, 'video-1', FIRST, OPTIONS, [])
+        self.assertEqual(first['n_new'], 4)
+        self.assertEqual(first['summary']['n_clusters'], 2)
+
+        analyzer = incremental.get_analyzer(use_transformers=False)
+        with mock.patch.object(analyzer, 'batch_predict', wraps=analyzer.batch_predict) as predict, \
+                mock.patch.object(incremental, 'get_analyzer', return_value=analyzer):
+            second = update_corpus(self.store, 'video-1', SECOND, OPTIONS, [])
+        predict.assert_called_once_with(["audio mix is quiet", "more jokes please"])
+        self.assertEqual(second['n_new'], 2)
+        summary = second['summary']
+        self.assertEqual(summary['n_comments'], 6)
+        self.assertEqual(sum(a['size'] for a in summary['aspects']), 6)
+        self.assertEqual(sum(summary['sentiment'].values()), 6)
+        self.assertEqual(len(second['items']), 3)
+        # The repeated comment keeps the result it got the first time
+        self.assertEqual(second['items'][0]['cluster_id'], first['items'][0]['cluster_id'])
+
+        # Nothing new: no scoring at all
+        with mock.patch.object(incremental, 'get_analyzer') as get:
+            third = update_corpus(self.store, 'video-1', FIRST, OPTIONS, [])
+        get.assert_not_called()
+        self.assertEqual(third['n_new'], 0)
+
+    def test_state_survives_a_new_store(self):
+        update_corpus(self.store, 'video-1', FIRST, OPTIONS, [])
+        reopened = CorpusStore(self.tmp.name)
+        result = update_corpus(reopened, 'video-1', SECOND, OPTIONS, [])
+        self.assertEqual(result['n_new'], 2)
+        self.assertEqual(result['summary']['n_comments'], 6)
+
+    def test_duplicate_comments_are_counted(self):
+        comments = ["first", "first", "first", "great audio quality", "funny jokes", "jokes were hilarious"]
+        summary = update_corpus(self.store, 'video-3', comments, OPTIONS, [])['summary']
+        self.assertEqual(summary['n_comments'], 6)
+        self.assertEqual(sum(a['size'] for a in summary['aspects']), 6)
+        self.assertEqual(sum(summary['sentiment'].values()), 6)
+        result = update_corpus(self.store, 'video-3', ["more jokes please"] * 3, OPTIONS, [])
+        self.assertEqual(result['summary']['n_comments'], 9)
+        self.assertEqual(sum(a['size'] for a in result['summary']['aspects']), 9)
+        self.assertEqual(sum(sum(a['sentiment'].values()) for a in result['summary']['aspects']), 9)
+
+    def test_stores_see_each_others_saves(self):
+        # Two stores on one directory stand in for two worker processes
+        other = CorpusStore(self.tmp.name)
+        update_corpus(self.store, 'video-1', FIRST, OPTIONS, [])
+        self.assertEqual(other.load('video-1').n_comments, 4)
+        update_corpus(other, 'video-1', SECOND, OPTIONS, [])
+        result = update_corpus(self.store, 'video-1', ["something else entirely"], OPTIONS, [])
+        self.assertEqual(result['n_new'], 1)
+        self.assertEqual(result['summary']['n_comments'], 7)
+        self.assertTrue(other.delete('video-1'))
+        self.assertIsNone(self.store.load('video-1'))
+
+    def test_single_comment_waits_for_a_first_fit(self):
+        result = update_corpus(self.store, 'video-2', ["only one"], OPTIONS, [])
+        self.assertEqual(result['summary']['n_clusters'], 0)
+        self.assertIsNone(result['items'][0]['cluster_id'])
+        result = update_corpus(self.store, 'video-2', ["and another one"], OPTIONS, [])
+        self.assertEqual(result['summary']['n_clusters'], 2)
+        self.assertEqual(sum(a['size'] for a in result['summary']['aspects']), 2)
+
+    def test_near_identical_texts_still_fit(self):
+        update_corpus(self.store, 'video-5', ["great video"], OPTIONS, [])
+        result = update_corpus(self.store, 'video-5', ["great video!"], OPTIONS, [])
+        self.assertEqual(result['summary']['n_comments'], 2)
+        self.assertEqual(result['summary']['n_clusters'], 2)
+        self.assertIsNotNone(result['items'][0]['cluster_id'])
+
+    def test_unusable_texts_stay_pending(self):
+        # Nothing survives tokenization: no vocabulary, so nothing can be fitted yet
+        update_corpus(self.store, 'video-6', ["!!"], OPTIONS, [])
+        result = update_corpus(self.store, 'video-6', ["??"], OPTIONS, [])
+        self.assertEqual(result['summary']['n_clusters'], 0)
+        self.assertEqual(result['summary']['n_comments'], 2)
+        result = update_corpus(self.store, 'video-6', FIRST, OPTIONS, [])
+        self.assertEqual(result['summary']['n_comments'], 6)
+        self.assertEqual(sum(a['size'] for a in result['summary']['aspects']), 6)
+
+    def test_failed_update_leaves_saved_state(self):
+        update_corpus(self.store, 'video-7', FIRST, OPTIONS, [])
+
+        def fail_halfway(state, hashes, *args, **kwargs):
+            state.n_comments += len(hashes)
+            raise MemoryError
+
+        with mock.patch.object(incremental.CorpusState, 'assign', fail_halfway), \
+                self.assertRaises(MemoryError):
+            update_corpus(self.store, 'video-7', SECOND, OPTIONS, [])
+        self.assertEqual(update_corpus(self.store, 'video-7', SECOND, OPTIONS, [])['summary']['n_comments'], 6)
+
+    def test_pending_duplicates_are_counted_at_first_fit(self):
+        update_corpus(self.store, 'video-4', ["only one"] * 3, OPTIONS, [])
+        result = update_corpus(self.store, 'video-4', ["and another one"], OPTIONS, [])
+        self.assertEqual(result['summary']['n_comments'], 4)
+        self.assertEqual(sum(a['size'] for a in result['summary']['aspects']), 4)
+
+
+class MinimumFitTests(TestCase):
+    def test_texts_are_collected_before_the_first_fit(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = CorpusStore(tmp)
+            # Default: 5 x num_aspect_clusters distinct texts
+            result = update_corpus(store, 'video-1', FIRST + SECOND[1:], OPTIONS, [])
+            self.assertEqual(result['summary']['n_clusters'], 0)
+            self.assertEqual(result['summary']['n_comments'], 6)
+            more = ["the intro was great", "the outro was long", "nice jokes", "quiet audio again"]
+            result = update_corpus(store, 'video-1', more, OPTIONS, [])
+            self.assertEqual(result['summary']['n_clusters'], 2)
+            self.assertEqual(sum(a['size'] for a in result['summary']['aspects']), 10)
+            self.assertTrue(all(a['keywords'] for a in result['summary']['aspects']))
+
+
+class CorpusAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings_override = override_settings(CORPUS_STATE_DIR=self.tmp.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_post_get_delete(self):
+        url = reverse('analysis-corpus-comments', args=['video-1'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        payload = {"comments": FIRST, "options": OPTIONS}
+        resp = self.client.post(url, data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['n_new'], 4)
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['summary']['n_comments'], 4)
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_invalid_corpus_id(self):
+        url = reverse('analysis-corpus-comments', args=['.hidden'])
+        payload = {"comments": FIRST, "options": OPTIONS}
+        resp = self.client.post(url, data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_internal_errors_are_not_bad_requests(self):
+        url = reverse('analysis-corpus-comments', args=['video-1'])
+        payload = {"comments": FIRST, "options": OPTIONS}
+        with mock.patch.object(incremental.CorpusState, 'assign', side_effect=ValueError("numpy says no")):
+            client = APIClient(raise_request_exception=False)
+            resp = client.post(url, data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(resp.status_code, 500)
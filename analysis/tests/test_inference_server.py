@@ -0,0 +1,114 @@
+import os
+import shutil
+import socket
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from analysis.services.inference_server import InferenceClient, InferenceServer, serve_in_thread
+from analysis.services.metrics import request_timings
+from analysis.services.registry import ModelRegistry
+from analysis.services.sentiment import RemoteSentimentAnalyzer, SentimentAnalyzer
+
+TEXTS = ["i love this video", "worst upload ever", "it is a video", "great", "awful audio"]
+
+
+class _SlowAnalyzer:
+    backend = 'transformers'
+
+    def batch_predict(self, texts, budget=None):
+        time.sleep(0.5)
+        return [{"label": "neutral", "score": 0.5} for _ in texts]
+
+
+class _Registry:
+    def __init__(self, analyzer=None, error=None):
+        self.analyzer, self.error = analyzer, error
+
+    def get(self, model_name, use_transformers=True, runtime='torch'):
+        if self.error:
+            raise self.error
+        return self.analyzer
+
+    def status(self):
+        return []
+
+
+class InferenceServerTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'sentiment.sock')
+        self.addCleanup(shutil.rmtree, self.dir, True)
+
+    def _serve(self, registry):
+        server = InferenceServer(self.path, registry)
+        serve_in_thread(server)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_remote_predictions_match_local(self):
+        # Without transformers installed the server's own analyzer is VADER
+        self._serve(ModelRegistry(remote=False))
+        client = RemoteSentimentAnalyzer(self.path, model_name='m', chunk_size=2)
+        with request_timings() as timings:
+            results = client.batch_predict(TEXTS)
+        self.assertEqual(results, SentimentAnalyzer(use_transformers=False).batch_predict(TEXTS))
+        self.assertEqual(timings.counts['remote_batches'], 3)
+        self.assertEqual(client.remote_backend, 'vader')
+        self.assertEqual(timings.events, [])
+
+    def test_ping_and_connection_reuse(self):
+        self._serve(_Registry())
+        client = InferenceClient(self.path)
+        self.assertEqual(client.request({"op": "ping"})['pid'], os.getpid())
+        sock = client._sock
+        with self.assertRaises(RuntimeError):
+            client.request({"op": "unknown"})
+        self.assertIs(client._sock, sock)
+        client.close()
+
+    def test_unavailable_server_falls_back_to_vader(self):
+        client = RemoteSentimentAnalyzer(self.path, retry_after=60)
+        with request_timings() as timings:
+            results = client.batch_predict(TEXTS)
+        self.assertEqual(results, SentimentAnalyzer(use_transformers=False).batch_predict(TEXTS))
+        self.assertIn("inference server unavailable; scored with VADER", timings.events)
+        # Not retried within retry_after
+        with mock.patch('analysis.services.inference_server.InferenceClient.request') as request:
+            client.batch_predict(TEXTS)
+        request.assert_not_called()
+
+    def test_timeout_falls_back(self):
+        self._serve(_Registry(analyzer=_SlowAnalyzer()))
+        client = RemoteSentimentAnalyzer(self.path, timeout=0.1)
+        started = time.perf_counter()
+        self.assertEqual(len(client.batch_predict(TEXTS)), len(TEXTS))
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+    def test_server_error_falls_back(self):
+        self._serve(_Registry(error=OSError("model files missing")))
+        client = RemoteSentimentAnalyzer(self.path)
+        with request_timings() as timings:
+            results = client.batch_predict(TEXTS[:2])
+        self.assertEqual([r['label'] for r in results], ['positive', 'negative'])
+        self.assertTrue(any('model files missing' in e for e in timings.events))
+
+    def test_refuses_live_socket_and_replaces_stale_one(self):
+        self._serve(_Registry())
+        with self.assertRaises(OSError):
+            InferenceServer(self.path, _Registry())
+        stale = os.path.join(self.dir, 'stale.sock')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(stale)
+        sock.close()
+        InferenceServer(stale, _Registry()).server_close()
+
+    def test_registry_hands_out_remote_client_for_transformers(self):
+        with override_settings(SENTIMENT_SERVER_SOCKET=self.path):
+            reg = ModelRegistry()
+            self.assertIsInstance(reg.get('m', use_transformers=True), RemoteSentimentAnalyzer)
+            self.assertIsInstance(reg.get('m', use_transformers=False), SentimentAnalyzer)
+            self.assertIsInstance(ModelRegistry(remote=False).get('m'), SentimentAnalyzer)
@@ -0,0 +1,146 @@
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from analysis.services.jobs import DONE, FAILED, RUNNING, JobManager, MemoryJobStore, SQLiteJobStore
+
+COMMENTS = ["great video", "bad audio", "excellent tutorial", "boring and slow", "great editing"]
+
+
+def _wait_for(manager, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class JobManagerTests(TestCase):
+    def _check_store(self, store):
+        manager = JobManager(store, workers=1, poll_interval=0.05)
+        job_id = manager.submit(COMMENTS, {"use_transformers": False, "num_aspect_clusters": 2})
+        job = _wait_for(manager, job_id)
+        self.assertEqual(job['status'], DONE)
+        self.assertEqual(job['progress'], 1.0)
+        result = manager.result(job_id)
+        self.assertEqual(len(result['items']), len(COMMENTS))
+        self.assertEqual(result['summary']['n_comments'], len(COMMENTS))
+
+    def test_memory_store(self):
+        self._check_store(MemoryJobStore())
+
+    def test_sqlite_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._check_store(SQLiteJobStore(os.path.join(tmp, 'jobs.sqlite3')))
+
+    def test_stale_running_job_is_requeued(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'jobs.sqlite3')
+            crashed = SQLiteJobStore(path)
+            job_id = crashed.create({"comments": COMMENTS, "options": {}, "warnings": []})
+            crashed.claim()
+            store = SQLiteJobStore(path)
+            # Fresh heartbeat: still owned by the other worker
+            self.assertIsNone(store.claim(stale_before=time.time() - 60))
+            self.assertEqual(store.get(job_id)['status'], RUNNING)
+            claimed_id, payload = store.claim(stale_before=time.time() + 1)
+            self.assertEqual((claimed_id, payload['comments']), (job_id, COMMENTS))
+            # Give up after MAX_ATTEMPTS runs
+            store.claim(stale_before=time.time() + 1)
+            self.assertIsNone(store.claim(stale_before=time.time() + 1))
+            job = store.get(job_id)
+            self.assertEqual(job['status'], FAILED)
+            self.assertIn('3 attempts', job['error'])
+
+    def test_worker_survives_store_errors(self):
+        store = MemoryJobStore()
+        claim = store.claim
+        calls = []
+
+        def flaky_claim(stale_before=None):
+            calls.append(stale_before)
+            if len(calls) == 1:
+                raise RuntimeError("database is locked")
+            return claim(stale_before)
+
+        manager = JobManager(store, workers=1, poll_interval=0.05)
+        with mock.patch.object(store, 'claim', side_effect=flaky_claim), \
+                self.assertLogs('analysis.services.jobs', 'ERROR') as logs:
+            job_id = manager.submit(COMMENTS, {"use_transformers": False, "num_aspect_clusters": 2})
+            self.assertEqual(_wait_for(manager, job_id)['status'], DONE)
+        self.assertIn('database is locked', logs.output[0])
+
+    def test_heartbeat_runs_during_long_stages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteJobStore(os.path.join(tmp, 'jobs.sqlite3'))
+            manager = JobManager(store, workers=1, poll_interval=0.05, stale_after=0.4)
+            other_worker = SQLiteJobStore(store.path)
+            claims = []
+
+            def slow_analysis(comments, options, warnings=None, progress=None):
+                # No progress callbacks for longer than stale_after, like a long clustering stage
+                for _ in range(6):
+                    time.sleep(0.15)
+                    claims.append(other_worker.claim(stale_before=time.time() - 0.4))
+                return {"summary": {}, "items": [], "warnings": []}
+
+            with mock.patch('analysis.services.jobs.analyze_comments', side_effect=slow_analysis):
+                job = _wait_for(manager, manager.submit(COMMENTS, {}))
+            self.assertEqual(job['status'], DONE)
+            self.assertEqual(claims, [None] * 6)
+
+    def test_failed_finish_marks_the_job_failed(self):
+        store = MemoryJobStore()
+        manager = JobManager(store, workers=1, poll_interval=0.05)
+        with mock.patch.object(store, 'finish', side_effect=TypeError("not JSON serializable")), \
+                self.assertLogs('analysis.services.jobs', 'ERROR'):
+            job = _wait_for(manager, manager.submit(COMMENTS, {"use_transformers": False}))
+        self.assertEqual(job['status'], FAILED)
+        self.assertIn('not JSON serializable', job['error'])
+
+    def test_summary_response_is_ignored(self):
+        manager = JobManager(MemoryJobStore(), workers=1, poll_interval=0.05)
+        job_id = manager.submit(COMMENTS, {"use_transformers": False, "response": "summary"})
+        self.assertEqual(_wait_for(manager, job_id)['status'], DONE)
+        result = manager.result(job_id)
+        self.assertNotIn('result_id', result)
+        self.assertEqual(len(result['items']), len(COMMENTS))
+        self.assertTrue(any("response='summary'" in w for w in result['warnings']))
+
+
+class AnalysisJobsAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    @override_settings(MAX_COMMENTS=2, JOB_MAX_COMMENTS=1000)
+    def test_submit_poll_and_fetch(self):
+        payload = {"comments": COMMENTS, "options": {"use_transformers": False, "num_aspect_clusters": 2}}
+        resp = self.client.post(reverse('analysis-jobs'), data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.json()['job_id']
+
+        deadline = time.time() + 30
+        while True:
+            status_resp = self.client.get(reverse('analysis-job', args=[job_id]))
+            self.assertEqual(status_resp.status_code, 200)
+            if status_resp.json()['status'] == 'done' or time.time() > deadline:
+                break
+            result_resp = self.client.get(reverse('analysis-job-result', args=[job_id]))
+            self.assertIn(result_resp.status_code, (200, 409))
+            time.sleep(0.05)
+
+        result = self.client.get(reverse('analysis-job-result', args=[job_id])).json()
+        # Jobs use JOB_MAX_COMMENTS, not MAX_COMMENTS
+        self.assertEqual(len(result['items']), len(COMMENTS))
+
+    def test_unknown_job(self):
+        resp = self.client.get(reverse('analysis-job', args=['nope']))
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,42 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from analysis.services.lazy import LazyModule, available, import_times
+
+
+class LazyImportTests(SimpleTestCase):
+    def test_available_does_not_import(self):
+        self.assertTrue(available('json', 'sqlite3'))
+        self.assertFalse(available('json', 'no_such_module_xyz'))
+        self.assertFalse(available('no_such_package_xyz.sub'))
+
+    def test_lazy_module_loads_on_first_use(self):
+        module = LazyModule('colorsys')
+        self.assertFalse(module.loaded)
+        self.assertEqual(module.rgb_to_hsv(0, 0, 0), (0.0, 0.0, 0.0))
+        self.assertTrue(module.loaded)
+        with self.assertRaises(ImportError):
+            LazyModule('no_such_module_xyz').anything
+        self.assertNotIn('no_such_module_xyz', import_times())
+
+
+class ImportReportCommandTests(SimpleTestCase):
+    def test_report_and_no_eager_heavy_imports(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'imports.json')
+            call_command('import_report', modules='analysis.services.sentiment,analysis.services.aspects',
+                         repeat=1, output=output, stdout=io.StringIO())
+            with open(output, encoding='utf-8') as fh:
+                report = json.load(fh)
+        records = {r['variant']: r for r in report['results']}
+        self.assertEqual(set(records), {'analysis.urls', 'analysis.services.sentiment', 'analysis.services.aspects'})
+        for record in records.values():
+            self.assertGreater(record['seconds'], 0)
+            # torch, transformers, bertopic and scikit-learn load on first use only
+            self.assertEqual(record['heavy_modules'], [])
+        self.assertIn('torch', report['meta']['available'])
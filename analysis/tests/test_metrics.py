@@ -0,0 +1,86 @@
+import json
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from analysis.services.metrics import MetricsRegistry, request_timings, timed
+from analysis.services.registry import registry
+
+COMMENTS = ["Great audio quality!", "The audio was terrible", "Editing was smooth",
+            "Bad editing choices", "Loved the jokes", "great audio quality!"]
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def test_render_counters_and_histograms(self):
+        m = MetricsRegistry()
+        m.describe('jobs_total', 'counter', 'Jobs.')
+        m.inc('jobs_total', endpoint='a')
+        m.inc('jobs_total', 2, endpoint='a')
+        m.observe('latency_seconds', 0.003, stage='x')
+        m.observe('latency_seconds', 100, stage='x')
+        text = m.render()
+        self.assertIn('# HELP jobs_total Jobs.', text)
+        self.assertIn('jobs_total{endpoint="a"} 3', text)
+        self.assertIn('latency_seconds_bucket{stage="x",le="0.0025"} 0', text)
+        self.assertIn('latency_seconds_bucket{stage="x",le="0.005"} 1', text)
+        self.assertIn('latency_seconds_bucket{stage="x",le="+Inf"} 2', text)
+        self.assertIn('latency_seconds_count{stage="x"} 2', text)
+
+    def test_timed_accumulates_per_request(self):
+        with request_timings() as timings:
+            for _ in range(3):
+                with timed('stage_a'):
+                    pass
+        self.assertEqual(list(timings.as_dict()['stages_ms']), ['stage_a'])
+        self.assertRegex(timings.server_timing(0.5), r'^stage_a;dur=[\d.]+, total;dur=500\.0$')
+        with timed('outside'):   # no request: only the global histogram
+            pass
+
+
+class MetricsAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        registry.clear()
+        self.addCleanup(registry.clear)
+
+    def _post(self, options):
+        return self.client.post(reverse('analysis-comments'), data=json.dumps({
+            "comments": COMMENTS, "options": {"num_aspect_clusters": 2, **options}
+        }), content_type='application/json')
+
+    def test_server_timing_header(self):
+        resp = self._post({"use_transformers": False})
+        self.assertEqual(resp.status_code, 200)
+        header = resp['Server-Timing']
+        for stage in ('preprocess', 'sentiment', 'clustering', 'serialize', 'total'):
+            self.assertIn(f'{stage};dur=', header)
+        self.assertNotIn('timings', resp.json())
+
+    def test_timings_block_reports_fallback(self):
+        # transformers is not installed here, or the model is unavailable: VADER (or neutral) serves
+        resp = self._post({"use_transformers": True, "timings": True})
+        self.assertEqual(resp.status_code, 200)
+        timings = resp.json()['timings']
+        self.assertIn('sentiment', timings['stages_ms'])
+        self.assertEqual(timings['counts']['sentiment_texts_unique'], 5)
+        if not any(e.startswith('sentiment fallback: transformers->') for e in timings['events']):
+            self.skipTest("transformers backend available")
+
+    def test_async_endpoint_timings(self):
+        resp = self.client.post(reverse('analysis-comments-async'), data=json.dumps({
+            "comments": COMMENTS, "options": {"use_transformers": False, "timings": True}
+        }), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('clustering', resp.json()['timings']['stages_ms'])
+        self.assertIn('clustering;dur=', resp['Server-Timing'])
+
+    def test_metrics_endpoint(self):
+        self._post({"use_transformers": False})
+        resp = self.client.get(reverse('analysis-metrics'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = resp.content.decode()
+        self.assertIn('analysis_stage_seconds_bucket{stage="clustering",le="+Inf"}', text)
+        self.assertIn('analysis_requests_total{endpoint="analysis-comments",status="200"}', text)
+        self.assertIn('# TYPE analysis_request_seconds histogram', text)
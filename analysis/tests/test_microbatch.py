@@ -0,0 +1,104 @@
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from analysis.services.metrics import metrics, request_timings
+from analysis.services.microbatch import MicroBatcher
+from analysis.services.registry import ModelRegistry
+
+
+class _RecordingAnalyzer:
+    backend = 'transformers'
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def batch_predict(self, texts, budget=None):
+        self.calls.append((list(texts), budget))
+        if self.fail:
+            raise RuntimeError("forward failed")
+        return [{"label": "positive", "score": len(t) / 100} for t in texts]
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def _batcher(self, analyzer, **kwargs):
+        batcher = MicroBatcher(analyzer, **kwargs)
+        self.addCleanup(batcher.close)
+        return batcher
+
+    def _concurrently(self, batcher, requests):
+        results = [None] * len(requests)
+
+        def call(i):
+            results[i] = batcher.batch_predict(requests[i])
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_concurrent_requests_share_batches(self):
+        analyzer = _RecordingAnalyzer()
+        batcher = self._batcher(analyzer, max_batch=16, max_wait_ms=200)
+        requests = [[f"comment {i}-{j}" + "!" * i for j in range(2)] for i in range(8)]
+        results = self._concurrently(batcher, requests)
+        self.assertLess(len(analyzer.calls), len(requests))
+        self.assertTrue(all(len(texts) <= 16 for texts, _ in analyzer.calls))
+        # Each caller gets the results for its own texts, in order
+        for texts, result in zip(requests, results):
+            self.assertEqual([r['score'] for r in result], [len(t) / 100 for t in texts])
+        stats = batcher.stats()
+        self.assertEqual(stats['batches'], len(analyzer.calls))
+        self.assertGreater(stats['mean_fill_ratio'], 1 / 16)
+
+    def test_full_batch_flushes_without_waiting(self):
+        analyzer = _RecordingAnalyzer()
+        batcher = self._batcher(analyzer, max_batch=4, max_wait_ms=10000)
+        started = time.perf_counter()
+        self._concurrently(batcher, [["a", "b"], ["c", "d"]])
+        self.assertLess(time.perf_counter() - started, 5)
+
+    def test_lone_request_flushes_after_max_wait(self):
+        batcher = self._batcher(_RecordingAnalyzer(), max_batch=64, max_wait_ms=50)
+        with request_timings() as timings:
+            self.assertEqual(len(batcher.batch_predict(["only one"])), 1)
+        self.assertGreaterEqual(timings.stages['batch_wait'], 0.04)
+        self.assertIn('analysis_microbatch_wait_seconds_count', metrics.render())
+        self.assertIn('analysis_microbatch_queue_depth 0', metrics.render())
+
+    def test_large_and_budgeted_calls_bypass_the_queue(self):
+        analyzer = _RecordingAnalyzer()
+        batcher = self._batcher(analyzer, max_batch=2, max_wait_ms=10000)
+        batcher.batch_predict(["a", "b", "c"])
+        batcher.batch_predict(["a"], budget=0.5)
+        self.assertEqual(analyzer.calls, [(["a", "b", "c"], None), (["a"], 0.5)])
+        self.assertIsNone(batcher._worker)
+        self.assertEqual(batcher.backend, 'transformers')
+
+    def test_errors_reach_every_caller(self):
+        batcher = self._batcher(_RecordingAnalyzer(fail=True), max_batch=8, max_wait_ms=1)
+        with self.assertRaisesMessage(RuntimeError, "forward failed"):
+            batcher.batch_predict(["x"])
+
+    def test_closed_batcher_scores_directly(self):
+        analyzer = _RecordingAnalyzer()
+        batcher = MicroBatcher(analyzer, max_batch=8, max_wait_ms=10000)
+        batcher.close()
+        self.assertEqual(len(batcher.batch_predict(["x"])), 1)
+
+
+class MicroBatchRegistryTests(SimpleTestCase):
+    @override_settings(SENTIMENT_MICROBATCH=True, SENTIMENT_SERVER_SOCKET='/nonexistent/sentiment.sock')
+    def test_registry_wraps_batching_backends_only(self):
+        reg = ModelRegistry()
+        remote = reg.get('m', use_transformers=True)
+        self.assertIsInstance(remote, MicroBatcher)
+        self.assertEqual(remote.backend, 'remote')
+        self.assertNotIsInstance(reg.get('m', use_transformers=False), MicroBatcher)
+        status = {s['backend']: s for s in reg.status()}
+        self.assertEqual(status['transformers']['microbatch']['batches'], 0)
+        self.assertIsNone(status['vader']['microbatch'])
+        remote.close()
@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from analysis.services.near_duplicates import lsh_params, minhash_signatures, near_duplicate_groups
+from analysis.services.text_preprocess import PreprocessedBatch
+
+SPAM = [
+    "check out my channel for a free giveaway now!!!",
+    "check out my channel for a free giveaway now!!",
+    "Check out my channel for a FREE giveaway now",
+    "check out my channel for free giveaway now!!!",
+]
+
+
+def _shingles(text, k=5):
+    return {text[i:i + k] for i in range(max(1, len(text) - k + 1))}
+
+
+def _jaccard(a, b, k=5):
+    return len(_shingles(a, k) & _shingles(b, k)) / len(_shingles(a, k) | _shingles(b, k))
+
+
+class MinHashTests(SimpleTestCase):
+    def test_signature_agreement_estimates_jaccard(self):
+        pairs = [("the best tutorial on this topic so far", "the best tutorial on this topic by far"),
+                 ("i really enjoyed the editing in this one", "i really enjoyed the music in this one"),
+                 ("first comment", "great explanation of the algorithm")]
+        signatures = minhash_signatures([t for pair in pairs for t in pair], num_perm=256)
+        for i, (a, b) in enumerate(pairs):
+            estimate = (signatures[2 * i] == signatures[2 * i + 1]).mean()
+            self.assertAlmostEqual(estimate, _jaccard(a, b), delta=0.12)
+
+    def test_lsh_params_fit_signature(self):
+        for threshold in (0.5, 0.8, 0.95):
+            bands, rows = lsh_params(threshold, 64)
+            self.assertLessEqual(bands * rows, 64)
+        # Stricter thresholds need longer bands
+        self.assertLess(lsh_params(0.5, 64)[1], lsh_params(0.95, 64)[1])
+
+    def test_groups_near_duplicates_with_heaviest_representative(self):
+        texts = [t.lower() for t in SPAM] + ["this video is awesome", "i hate this video so much", "ok", ""]
+        weights = [1, 5, 1, 1, 1, 1, 1, 1]
+        groups = near_duplicate_groups(texts, 0.7, weights=weights)
+        self.assertEqual(groups.tolist(), [1, 1, 1, 1, 4, 5, 6, 7])
+        self.assertEqual(near_duplicate_groups(texts, 1.0).tolist(), list(range(len(texts))))
+
+
+class MergeTests(SimpleTestCase):
+    def test_merge_maps_every_input_to_its_representative(self):
+        batch = PreprocessedBatch.from_texts(["ab cd", "nice", "ab cd!", "ab cd", "nice"])
+        self.assertEqual(len(batch.tokens), 3)
+        merged = batch.merge(np.array([0, 1, 0]))
+        self.assertEqual(merged.unique, ["ab cd", "nice"])
+        self.assertEqual(merged.inverse.tolist(), [0, 1, 0, 0, 1])
+        self.assertEqual(merged.counts.tolist(), [3, 2])
+        # Tokens already computed are carried over for the representatives
+        self.assertEqual(merged.tokens, [["ab", "cd"], ["nice"]])
+        self.assertEqual(merged.n_merged, 1)
+        self.assertEqual(merged.expand(["x", "y"]), ["x", "y", "x", "x", "y"])
+        self.assertEqual(merged.cleaned, batch.cleaned)
+
+
+class NearDuplicateAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.comments = SPAM * 3 + ["great explanation, thanks", "the audio is terrible",
+                                    "loved the examples", "too long and boring"]
+
+    def _post(self, **options):
+        return self.client.post(reverse('analysis-comments'), data=json.dumps({
+            "comments": self.comments,
+            "options": {"use_transformers": False, "num_aspect_clusters": 2, **options},
+        }), content_type='application/json')
+
+    def test_collapsed_response_covers_every_comment(self):
+        data = self._post(near_duplicate_threshold=0.7).json()
+        info = data['summary']['near_duplicates']
+        self.assertEqual(info['n_analyzed'], 5)
+        self.assertEqual(info['n_merged'], len(set(t.lower() for t in SPAM)) - 1)
+        self.assertEqual(len(data['items']), len(self.comments))
+        self.assertEqual([i['text'] for i in data['items']], self.comments)
+        self.assertEqual(sum(a['size'] for a in data['summary']['aspects']), len(self.comments))
+        spam_items = data['items'][:len(SPAM) * 3]
+        self.assertEqual(len({(i['cluster_id'], i['sentiment']['label']) for i in spam_items}), 1)
+
+    def test_disabled_by_default(self):
+        data = self._post().json()
+        self.assertNotIn('near_duplicates', data['summary'])
+        self.assertEqual(self._post(near_duplicate_threshold=1.5).status_code, 400)
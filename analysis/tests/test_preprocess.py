@@ -0,0 +1,36 @@
+import random
+import re
+
+from django.test import SimpleTestCase
+
+from analysis.services.text_preprocess import PreprocessedBatch, TOKEN_RE, preprocess_text
+
+
+def _legacy_preprocess(text):
+    """The previous multi-pass implementation."""
+    t = text.strip().lower()
+    t = re.sub(r'https?://\S+', ' ', t)
+    t = re.sub(r'@\w+', ' ', t)
+    return re.sub(r'\s+', ' ', t)
+
+
+class PreprocessTests(SimpleTestCase):
+    def test_matches_previous_implementation(self):
+        cases = [
+            "  Great VIDEO!!  ", "see https://x.com/a?b=1 now", "@Bob thanks\n\tfor this",
+            "@bobhttps://x.com", "@bobhttp:// x", "@https://x y", "mail@example.com", "a @b@c d", "",
+        ]
+        pieces = ['@', 'http', 's', '://', ' ', '\n', 'a', 'B', '_', 'Ü', '.', '/']
+        rng = random.Random(0)
+        cases += [''.join(rng.choice(pieces) for _ in range(rng.randint(0, 12))) for _ in range(5000)]
+        for text in cases:
+            self.assertEqual(preprocess_text(text), _legacy_preprocess(text), repr(text))
+
+    def test_batch_unique_inverse_and_tokens(self):
+        batch = PreprocessedBatch.from_texts(["Nice video", "nice   VIDEO", "bad audio @me", "Nice video"])
+        self.assertEqual(batch.unique, ["nice video", "bad audio "])
+        self.assertEqual(batch.inverse.tolist(), [0, 0, 1, 0])
+        self.assertEqual(batch.counts.tolist(), [3, 1])
+        self.assertEqual(batch.tokens, [TOKEN_RE.findall(t) for t in batch.unique])
+        self.assertEqual(batch.expand(["p", "n"]), ["p", "p", "n", "p"])
+        self.assertTrue(batch.has_duplicates)
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import threading
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from analysis.services.metrics import request_timings
+from analysis.services.registry import ModelRegistry, _analyzer_options
+
+
+class ModelRegistryTests(TestCase):
+    def test_loads_each_key_once(self):
+        reg = ModelRegistry()
+        first = reg.get('some-model', use_transformers=False)
+        second = reg.get('some-model', use_transformers=False)
+        self.assertIs(first, second)
+        self.assertIsNot(first, reg.get('other-model', use_transformers=False))
+
+    def test_concurrent_first_use_shares_one_instance(self):
+        reg = ModelRegistry()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(reg.get('m', use_transformers=False)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len({id(a) for a in results}), 1)
+
+    def test_status_reports_load_state(self):
+        reg = ModelRegistry()
+        reg.warm_up('m', use_transformers=False)
+        (entry,) = reg.status()
+        self.assertEqual(entry['backend'], 'vader')
+        self.assertEqual(entry['state'], 'ready')
+        self.assertIsInstance(entry['load_time'], float)
+
+    def test_models_endpoint(self):
+        client = APIClient()
+        resp = client.get(reverse('analysis-models'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('models', resp.json())
+
+
+class OnnxGraphSelectionTests(TestCase):
+    def test_falls_back_to_the_exported_graph(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            model_dir = os.path.join(tmp, 'org__m')
+            os.makedirs(model_dir)
+            open(os.path.join(model_dir, 'model.onnx'), 'w').close()
+            with override_settings(SENTIMENT_ONNX_DIR=tmp, SENTIMENT_ONNX_QUANTIZED=False):
+                self.assertEqual(_analyzer_options('org/m', 'onnx')['onnx_path'], os.path.join(model_dir, 'model.onnx'))
+            with override_settings(SENTIMENT_ONNX_DIR=tmp, SENTIMENT_ONNX_QUANTIZED=True), \
+                    request_timings() as timings:
+                self.assertEqual(_analyzer_options('org/m', 'onnx')['onnx_path'], os.path.join(model_dir, 'model.onnx'))
+            self.assertEqual(timings.events, ["ONNX graph model.int8.onnx not found; using model.onnx"])
+            # Neither exists: the configured path is kept (the analyzer reports the fallback)
+            with override_settings(SENTIMENT_ONNX_DIR=tmp, SENTIMENT_ONNX_QUANTIZED=True):
+                self.assertTrue(_analyzer_options('org/x', 'onnx')['onnx_path'].endswith('model.int8.onnx'))
@@ -0,0 +1,112 @@
+import json
+from unittest import mock, skipUnless
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from analysis import renderers
+from analysis.renderers import FastJSONRenderer
+from analysis.services.results import ResultStore, decode_cursor, encode_cursor
+
+COMMENTS = ["Great audio quality!", "The audio was terrible", "Editing was smooth",
+            "Bad editing choices", "Loved the jokes ❤️", "great audio quality!", "meh"]
+
+
+class ResultStoreTests(SimpleTestCase):
+    def test_pages_and_expiry(self):
+        store = ResultStore(max_results=2, ttl=60)
+        sentiments = [{"label": "positive", "score": 0.9}, {"label": "negative", "score": 0.8}]
+        first = store.put(["a", "b", "a"], sentiments, np.array([0, 1, 0]), [1, None, 1])
+        items, count = store.page(first, 1, 5)
+        self.assertEqual(count, 3)
+        self.assertEqual(items, [{"text": "b", "sentiment": sentiments[1], "cluster_id": None},
+                                 {"text": "a", "sentiment": sentiments[0], "cluster_id": 1}])
+        items[1]["sentiment"]["score"] = 0   # pages are copies
+        self.assertEqual(sentiments[0]["score"], 0.9)
+
+        store.put([], [], np.array([], dtype=np.int64), [])
+        store.put([], [], np.array([], dtype=np.int64), [])
+        self.assertIsNone(store.page(first, 0, 5))
+        with mock.patch('analysis.services.results.time.time', return_value=10 ** 12):
+            self.assertEqual(len(store._results), 2)
+            store.put([], [], np.array([], dtype=np.int64), [])
+            self.assertEqual(len(store._results), 1)
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(1234)), 1234)
+        for bad in ("", "!!", "bz0tMQ", "eD0x"):   # "o=-1", "x=1"
+            with self.assertRaises(ValueError):
+                decode_cursor(bad)
+
+
+class SummaryResponseAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def _post(self, **options):
+        return self.client.post(reverse('analysis-comments'), data=json.dumps({
+            "comments": COMMENTS,
+            "options": {"use_transformers": False, "num_aspect_clusters": 2, **options},
+        }), content_type='application/json')
+
+    def test_summary_has_sentiment_distributions(self):
+        full = self._post().json()
+        summary = full['summary']
+        self.assertEqual(sum(summary['sentiment'].values()), len(COMMENTS))
+        expected = {label: sum(item['sentiment']['label'] == label for item in full['items'])
+                    for label in ('negative', 'neutral', 'positive')}
+        self.assertEqual(summary['sentiment'], expected)
+        for aspect in summary['aspects']:
+            members = [i for i in full['items'] if i['cluster_id'] == aspect['cluster_id']]
+            self.assertEqual(sum(aspect['sentiment'].values()), aspect['size'])
+            self.assertEqual(aspect['sentiment']['positive'],
+                             sum(i['sentiment']['label'] == 'positive' for i in members))
+
+    def test_summary_mode_and_paged_items(self):
+        full = self._post().json()
+        resp = self._post(response='summary')
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertNotIn('items', data)
+        self.assertEqual(data['summary'], full['summary'])
+
+        url = reverse('analysis-result-items', args=[data['result_id']])
+        items, cursor, pages = [], None, 0
+        while True:
+            page = self.client.get(url, {"limit": 3, **({"cursor": cursor} if cursor else {})}).json()
+            self.assertEqual(page['count'], len(COMMENTS))
+            items.extend(page['items'])
+            pages += 1
+            cursor = page['next_cursor']
+            if cursor is None:
+                self.assertIsNone(page['next'])
+                break
+            self.assertIn(f"cursor={cursor}", page['next'])
+        self.assertEqual(pages, 3)
+        self.assertEqual(items, full['items'])
+
+    def test_item_page_errors(self):
+        result_id = self._post(response='summary').json()['result_id']
+        url = reverse('analysis-result-items', args=[result_id])
+        self.assertEqual(self.client.get(url, {"cursor": "not-a-cursor"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"limit": "0"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('analysis-result-items', args=['missing'])).status_code, 404)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    @skipUnless(renderers._HAS_ORJSON, "orjson not installed")
+    def test_matches_drf_renderer(self):
+        data = {"text": "árbol ❤️", "n": np.int64(3), "lazy": gettext_lazy("Invalid"), "items": [None, 1.5]}
+        fast = FastJSONRenderer().render(data)
+        self.assertEqual(json.loads(fast), json.loads(JSONRenderer().render({**data, "n": 3})))
+        self.assertIn("árbol ❤️".encode(), fast)
+        indented = FastJSONRenderer().render(data, 'application/json; indent=2', {})
+        self.assertIn(b'\n  "text"', indented)
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch.object(renderers, '_HAS_ORJSON', False):
+            self.assertEqual(json.loads(FastJSONRenderer().render({"a": "é"})), {"a": "é"})
@@ -0,0 +1,240 @@
+from unittest import mock, skipUnless
+from django.test import SimpleTestCase
+
+from analysis.services import sentiment
+from analysis.services.sentiment import SentimentAnalyzer
+
+
+class _FakeTokenizer:
+    """One token per word plus BOS/EOS, padded with id 0."""
+    def __call__(self, texts, truncation=True, max_length=None):
+        ids = [[1] + [len(w) + 2 for w in t.split()] + [2] for t in texts]
+        if max_length:
+            ids = [x[:max_length] for x in ids]
+        return {"input_ids": ids, "attention_mask": [[1] * len(x) for x in ids]}
+
+    def pad(self, features, padding=True, return_tensors='pt'):
+        width = max(len(x) for x in features['input_ids'])
+        return {
+            key: sentiment.torch.tensor([x + [0] * (width - len(x)) for x in values])
+            for key, values in features.items()
+        }
+
+
+class _FakeModel:
+    """Logits depend only on the unpadded tokens, so batching must not change them."""
+    def __init__(self):
+        self.batch_shapes = []
+
+    def __call__(self, input_ids, attention_mask):
+        torch = sentiment.torch
+        self.batch_shapes.append(tuple(input_ids.shape))
+        n_tokens = attention_mask.sum(dim=-1).float()
+        total = (input_ids * attention_mask).sum(dim=-1).float()
+        logits = torch.stack([n_tokens, total / n_tokens, 6 - n_tokens], dim=-1)
+        return type('Output', (), {'logits': logits})()
+
+
+@skipUnless(sentiment._HAS_TRANSFORMERS, "transformers/torch not installed")
+class BatchedTransformersTests(SimpleTestCase):
+    def _analyzer(self, batch_size):
+        analyzer = SentimentAnalyzer(use_transformers=False, batch_size=batch_size)
+        analyzer.use_transformers = True
+        analyzer._transformers_ready = True
+        analyzer.tokenizer = _FakeTokenizer()
+        analyzer.model = _FakeModel()
+        return analyzer
+
+    def test_batched_matches_one_by_one(self):
+        texts = ["a much longer comment with many words in it", "ok", "nice video", "meh", "so so so good"]
+        analyzer = self._analyzer(batch_size=2)
+        batched = analyzer.batch_predict(texts)
+        single = [analyzer.predict_one(t) for t in texts]
+        self.assertEqual([r['label'] for r in batched], [r['label'] for r in single])
+        for b, s in zip(batched, single):
+            self.assertAlmostEqual(b['score'], s['score'], places=5)
+
+    def test_batches_are_length_sorted(self):
+        texts = ["one two three four five six", "a", "b c", "d", "e f"]
+        analyzer = self._analyzer(batch_size=2)
+        analyzer.batch_predict(texts)
+        # Short texts are grouped together, so the first batch pads to 3 tokens only
+        self.assertEqual(analyzer.model.batch_shapes, [(2, 3), (2, 4), (1, 8)])
+
+
+class VaderBatchTests(SimpleTestCase):
+    def test_batch_predict_matches_predict_one(self):
+        analyzer = SentimentAnalyzer(use_transformers=False)
+        texts = ["i love this", "worst video ever", "it is a video"]
+        self.assertEqual(analyzer.batch_predict(texts), [analyzer.predict_one(t) for t in texts])
+        self.assertEqual(analyzer.batch_predict([]), [])
+
+
+class _CountingAnalyzer(SentimentAnalyzer):
+    def __init__(self, **kwargs):
+        super().__init__(use_transformers=False, **kwargs)
+        self.scored = []
+
+    def _score(self, texts):
+        self.scored.extend(texts)
+        return super()._score(texts)
+
+
+class DeduplicationTests(SimpleTestCase):
+    def test_each_unique_text_scored_once(self):
+        analyzer = _CountingAnalyzer()
+        texts = ["first", "great video", "first", "first", "great video"]
+        results = analyzer.batch_predict(texts)
+        self.assertEqual(analyzer.scored, ["first", "great video"])
+        self.assertEqual(results, [analyzer.predict_one(t) for t in texts])
+        # Copies are independent dicts
+        self.assertIsNot(results[0], results[2])
+
+    def test_cache_skips_backend_on_repeat(self):
+        from analysis.services.cache import SentimentCache
+        analyzer = _CountingAnalyzer(cache=SentimentCache(100))
+        analyzer.batch_predict(["first", "nice"])
+        analyzer.batch_predict(["nice", "first", "new one"])
+        self.assertEqual(analyzer.scored, ["first", "nice", "new one"])
+        self.assertEqual(analyzer.cache.stats()['hits'], 2)
+
+
+class ParallelVaderTests(SimpleTestCase):
+    def test_pool_matches_in_process(self):
+        texts = [f"comment {i} is {'great' if i % 3 else 'awful'}" for i in range(60)]
+        inline = SentimentAnalyzer(use_transformers=False).batch_predict(texts)
+        pooled = SentimentAnalyzer(use_transformers=False, vader_workers=2, vader_min_batch=10)
+        self.assertEqual(pooled.batch_predict(texts), inline)
+
+    def test_small_batches_stay_in_process(self):
+        analyzer = SentimentAnalyzer(use_transformers=False, vader_workers=2, vader_min_batch=1000)
+        with mock.patch.object(sentiment, 'get_vader_pool') as get_pool:
+            analyzer.batch_predict(["just a few", "comments"])
+        get_pool.assert_not_called()
+
+
+class OnnxBackendTests(SimpleTestCase):
+    def test_missing_graph_falls_back(self):
+        # Without torch: straight to VADER
+        with mock.patch.object(sentiment, '_HAS_TRANSFORMERS', False), \
+                mock.patch.object(sentiment, '_HAS_ONNX_RUNTIME', True):
+            analyzer = SentimentAnalyzer(runtime='onnx', onnx_path='/nonexistent/model.int8.onnx')
+        self.assertIsNone(analyzer.onnx_model)
+        self.assertEqual(analyzer.fallback, 'onnx->vader')
+        # With torch: the PyTorch model (loader mocked, nothing is downloaded)
+        transformers = mock.MagicMock()
+        with mock.patch.object(sentiment, '_HAS_TRANSFORMERS', True), \
+                mock.patch.object(sentiment, '_HAS_ONNX_RUNTIME', True), \
+                mock.patch.object(sentiment, 'transformers', transformers), \
+                mock.patch.object(sentiment, 'torch', mock.MagicMock()):
+            analyzer = SentimentAnalyzer(runtime='onnx', onnx_path='/nonexistent/model.int8.onnx')
+        self.assertIsNone(analyzer.onnx_model)
+        self.assertEqual(analyzer.fallback, 'onnx->transformers')
+        transformers.AutoModelForSequenceClassification.from_pretrained.assert_called_once_with(analyzer.model_name)
+
+    def test_onnx_runtime_does_not_need_torch(self):
+        transformers = mock.MagicMock()
+        transformers.AutoTokenizer.from_pretrained.return_value = _NumpyTokenizer()
+        with mock.patch.object(sentiment, '_HAS_TRANSFORMERS', False), \
+                mock.patch.object(sentiment, '_HAS_ONNX_RUNTIME', True), \
+                mock.patch('analysis.services.onnx_backend.OnnxSentimentModel', return_value=_FakeOnnxModel()), \
+                mock.patch.object(sentiment, 'transformers', transformers):
+            analyzer = SentimentAnalyzer(runtime='onnx', onnx_path='/models/m/model.int8.onnx')
+        self.assertEqual(analyzer.backend, 'onnx')
+        self.assertIsNone(analyzer.fallback)
+        transformers.AutoTokenizer.from_pretrained.assert_called_once_with('/models/m')
+        self.assertEqual([r['label'] for r in analyzer.batch_predict(["great", "this is far too long"])],
+                         ['positive', 'negative'])
+
+    def test_compare_backends_reports_parity(self):
+        from analysis.services.onnx_backend import compare_backends
+        texts = ["i love it", "awful", "fine"]
+        report = compare_backends(SentimentAnalyzer(use_transformers=False),
+                                  SentimentAnalyzer(use_transformers=False), texts)
+        self.assertEqual(report['n_comments'], 3)
+        self.assertEqual(report['label_agreement'], 1.0)
+        self.assertEqual(report['max_score_delta'], 0.0)
+        self.assertIn('comments_per_second', report['candidate'])
+
+    def test_model_path_layout(self):
+        from analysis.services.onnx_backend import onnx_model_path
+        self.assertEqual(onnx_model_path('/m', 'org/name', quantized=True), '/m/org__name/model.int8.onnx')
+        self.assertEqual(onnx_model_path('/m', 'org/name', quantized=False), '/m/org__name/model.onnx')
+
+
+class _FakeOnnxModel:
+    """Stands in for OnnxSentimentModel: positive for short inputs, negative for long ones."""
+    def __init__(self):
+        self.widths = []
+
+    def predict(self, inputs):
+        ids = inputs['input_ids']
+        self.widths.append(ids.shape[1])
+        lengths = (ids != 0).sum(axis=1)
+        return [2 if n <= 4 else 0 for n in lengths], [0.9] * len(lengths)
+
+
+class _NumpyTokenizer(_FakeTokenizer):
+    def pad(self, features, padding=True, return_tensors='np'):
+        import numpy as np
+        width = max(len(x) for x in features['input_ids'])
+        return {key: np.array([x + [0] * (width - len(x)) for x in values]) for key, values in features.items()}
+
+
+class LatencyBudgetTests(SimpleTestCase):
+    def _analyzer(self, **kwargs):
+        analyzer = SentimentAnalyzer(use_transformers=False, batch_size=2, budget_truncate=4, **kwargs)
+        analyzer.use_transformers = True
+        analyzer._transformers_ready = True
+        analyzer.tokenizer = _NumpyTokenizer()
+        analyzer.onnx_model = _FakeOnnxModel()
+        return analyzer
+
+    def test_plan_budget_prefers_short_texts(self):
+        lengths = [10, 2, 50, 3, 4]
+        # Unlimited: everything at full length
+        self.assertEqual(sentiment.plan_budget(lengths, 1e9, 2, 8), ([1, 3, 4, 0, 2], [], []))
+        # Batches [2, 3] -> 6 tokens, then [4] -> 4: the next would pad [4, 10] to 20
+        full, truncated, rest = sentiment.plan_budget(lengths, 12, 2, 8)
+        self.assertEqual(full, [1, 3, 4])
+        self.assertEqual((truncated, rest), ([], [0, 2]))
+        # Leftover budget goes to truncated copies of the longer texts
+        self.assertEqual(sentiment.plan_budget(lengths, 22, 2, 8), ([1, 3, 4], [0], [2]))
+        self.assertEqual(sentiment.plan_budget(lengths, 26, 2, 8), ([1, 3, 4, 0], [], [2]))
+        self.assertEqual(sentiment.plan_budget(lengths, 0, 2, 8), ([], [], [1, 3, 4, 0, 2]))
+
+    def test_no_budget_keeps_results_unchanged(self):
+        analyzer = self._analyzer()
+        results = analyzer.batch_predict(["good", "a much longer comment here"])
+        self.assertNotIn('backend', results[0])
+
+    def test_generous_budget_scores_everything_at_full_length(self):
+        analyzer = self._analyzer(tokens_per_second=1e9)
+        texts = ["short one", "a much longer comment with many words"]
+        results = analyzer.batch_predict(texts, budget=10.0)
+        self.assertEqual([r['backend'] for r in results], ['onnx', 'onnx'])
+        self.assertEqual([r['label'] for r in results], ['positive', 'negative'])
+
+    @skipUnless(sentiment._HAS_VADER, "vaderSentiment not installed")
+    def test_tight_budget_routes_long_texts_away(self):
+        from analysis.services.metrics import request_timings
+        # 60 padded tokens: two short texts at full length (4 + 4), the medium one truncated (4)
+        analyzer = self._analyzer(tokens_per_second=60)
+        analyzer.vader_rate.rate = 1e9
+        texts = ["good", "nice", "this is five words long", "i love this video so much it is the best"]
+        with mock.patch.object(analyzer.throughput, 'observe'), request_timings() as timings:
+            results = analyzer.batch_predict(texts, budget=0.2)
+        backends = [r['backend'] for r in results]
+        self.assertEqual(backends[:2], ['onnx', 'onnx'])
+        self.assertIn('onnx_truncated', backends)
+        self.assertEqual(backends[3], 'vader')
+        self.assertEqual(results[3]['label'], 'positive')
+        self.assertTrue(any('latency budget' in e for e in timings.events))
+
+    def test_only_full_results_are_cached(self):
+        from analysis.services.cache import SentimentCache
+        analyzer = self._analyzer(tokens_per_second=1, cache=SentimentCache(100))
+        analyzer.batch_predict(["good", "a much longer comment"], budget=0.001)
+        self.assertEqual(len(analyzer.cache.get_many(
+            [analyzer.cache.key('onnx', analyzer.cache_model_key, t) for t in ["good", "a much longer comment"]]
+        )), 0)
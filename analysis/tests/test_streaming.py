@@ -0,0 +1,54 @@
+import json
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+
+def _ndjson(*records):
+    return '\n'.join(json.dumps(r) for r in records) + '\n'
+
+
+def _read(resp):
+    body = b''.join(resp.streaming_content).decode('utf-8')
+    return [json.loads(line) for line in body.splitlines()]
+
+
+class CommentsStreamAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('analysis-comments-stream')
+
+    @override_settings(STREAM_BATCH_SIZE=2)
+    def test_items_then_summary(self):
+        body = _ndjson(
+            {"options": {"num_aspect_clusters": 2, "use_transformers": False}},
+            {"comment": "Great content, learned a lot"},
+            "Too long and boring",
+            {"comment": "Audio was low but editing was good"},
+        )
+        resp = self.client.post(self.url, data=body, content_type='application/x-ndjson')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        records = _read(resp)
+        items, summary = records[:-1], records[-1]
+        self.assertEqual([r['type'] for r in items], ['item'] * 3)
+        self.assertEqual([r['index'] for r in items], [0, 1, 2])
+        self.assertEqual(items[1]['text'], "Too long and boring")
+        self.assertIn('label', items[0]['sentiment'])
+        self.assertEqual(summary['type'], 'summary')
+        self.assertEqual(summary['summary']['n_comments'], 3)
+        self.assertEqual(len(summary['cluster_ids']), 3)
+
+    @override_settings(STREAM_MAX_COMMENTS=2)
+    def test_limits_and_bad_lines_are_warned(self):
+        body = '"first"\nnot json\n"second"\n"third"\n'
+        records = _read(self.client.post(self.url, data=body, content_type='application/x-ndjson'))
+        summary = records[-1]
+        self.assertEqual(summary['summary']['n_comments'], 2)
+        self.assertTrue(any("STREAM_MAX_COMMENTS" in w for w in summary['warnings']))
+        self.assertTrue(any("skipped" in w for w in summary['warnings']))
+
+    def test_invalid_options_rejected(self):
+        body = _ndjson({"options": {"clustering_algorithm": "nope"}}, "a comment")
+        resp = self.client.post(self.url, data=body, content_type='application/x-ndjson')
+        self.assertEqual(resp.status_code, 400)
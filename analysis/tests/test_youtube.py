@@ -0,0 +1,156 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from analysis.services.youtube import YouTubeAPIError, YouTubeClient, fetch_comments, parse_video_id
+
+VIDEO_A = "aaaaaaaaaaa"
+VIDEO_B = "bbbbbbbbbbb"
+MISSING = "ccccccccccc"
+
+COMMENTS = {
+    VIDEO_A: [f"great audio in part {i}" for i in range(5)],
+    VIDEO_B: [f"boring editing in part {i}" for i in range(3)],
+}
+
+
+class FakeYouTubeHandler(BaseHTTPRequestHandler):
+    """commentThreads stand-in: 2 comments per page, and one 503 before the first page of VIDEO_B."""
+    protocol_version = 'HTTP/1.1'
+    failed_once = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        video_id = query.get('videoId')
+        if url.path != '/youtube/v3/commentThreads' or video_id not in COMMENTS:
+            return self._send(404, {"error": {"message": "Video not found."}})
+        if video_id == VIDEO_B and video_id not in self.failed_once:
+            self.failed_once.add(video_id)
+            return self._send(503, {"error": {"message": "Backend error."}})
+        start = int(query.get('pageToken', 0))
+        size = min(2, int(query['maxResults']))
+        page = COMMENTS[video_id][start:start + size]
+        body = {"items": [{"snippet": {"topLevelComment": {"snippet": {"textOriginal": t}}}} for t in page]}
+        if start + size < len(COMMENTS[video_id]):
+            body["nextPageToken"] = str(start + size)
+        self._send(200, body)
+
+
+class FakeServerMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeYouTubeHandler)
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}/youtube/v3'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        FakeYouTubeHandler.failed_once = set()
+
+
+class ParseVideoIdTests(SimpleTestCase):
+    def test_urls_and_ids(self):
+        for value in ["dQw4w9WgXcQ", "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10",
+                      "youtu.be/dQw4w9WgXcQ", "https://m.youtube.com/shorts/dQw4w9WgXcQ"]:
+            self.assertEqual(parse_video_id(value), "dQw4w9WgXcQ")
+        with self.assertRaises(ValueError):
+            parse_video_id("https://example.com/watch?v=dQw4w9WgXcQ")
+
+
+class YouTubeClientTests(FakeServerMixin, SimpleTestCase):
+    def _client(self, **kwargs):
+        client = YouTubeClient(self.base_url, backoff=0.01, rate_limit=0, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_pages_and_retry(self):
+        client = self._client()
+        self.assertEqual(list(client.comment_pages(VIDEO_A, 100)),
+                         [COMMENTS[VIDEO_A][0:2], COMMENTS[VIDEO_A][2:4], COMMENTS[VIDEO_A][4:]])
+        # First request answers 503 and is retried
+        self.assertEqual(sum(client.comment_pages(VIDEO_B, 100), []), COMMENTS[VIDEO_B])
+        self.assertEqual(sum(client.comment_pages(VIDEO_A, 3), []), COMMENTS[VIDEO_A][:3])
+
+    def test_client_errors_are_not_retried(self):
+        client = self._client(max_retries=0)
+        with self.assertRaises(YouTubeAPIError) as ctx:
+            list(client.comment_pages(MISSING, 10))
+        self.assertEqual(ctx.exception.status, 404)
+        with self.assertRaises(YouTubeAPIError):
+            list(client.comment_pages(VIDEO_B, 10))
+
+    def test_fetch_comments_concurrently(self):
+        videos = {}
+        comments = list(fetch_comments(self._client(), [VIDEO_A, VIDEO_B, MISSING], 100, workers=3, videos=videos))
+        self.assertCountEqual(comments, COMMENTS[VIDEO_A] + COMMENTS[VIDEO_B])
+        self.assertEqual(videos[VIDEO_A]['n_comments'], 5)
+        self.assertEqual(videos[VIDEO_B]['n_comments'], 3)
+        self.assertIn("404", videos[MISSING]['error'])
+
+
+class YouTubeAnalysisAPITests(FakeServerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        override = override_settings(YOUTUBE_API_BASE_URL=self.base_url, YOUTUBE_RETRY_BACKOFF=0.01,
+                                     YOUTUBE_RATE_LIMIT=0, STREAM_BATCH_SIZE=2)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _post(self, payload):
+        return self.client.post(reverse('analysis-youtube'), data=json.dumps(payload),
+                                content_type='application/json')
+
+    def test_fetch_and_analyze(self):
+        payload = {
+            "videos": [f"https://www.youtube.com/watch?v={VIDEO_A}", VIDEO_B, MISSING],
+            "options": {"use_transformers": False, "num_aspect_clusters": 2},
+        }
+        resp = self._post(payload)
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data['summary']['n_comments'], 8)
+        self.assertEqual(len(data['items']), 8)
+        self.assertIn('cluster_id', data['items'][0])
+        self.assertEqual([v['n_comments'] for v in data['videos']], [5, 3, 0])
+        self.assertTrue(any(w.startswith(f"Video {MISSING}") for w in data['warnings']))
+
+    def test_max_comments(self):
+        resp = self._post({"videos": [VIDEO_A], "max_comments": 3, "options": {"use_transformers": False}})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()['items']), 3)
+        # The warning names the limit that applied
+        payload = {"videos": [VIDEO_A, VIDEO_B], "max_comments": 3,
+                   "options": {"use_transformers": False, "num_aspect_clusters": 2}}
+        self.assertIn("Too many comments provided; truncated to max_comments.", self._post(payload).json()['warnings'])
+        with override_settings(YOUTUBE_MAX_COMMENTS=2):
+            warnings = self._post(payload).json()['warnings']
+        self.assertIn("Too many comments provided; truncated to YOUTUBE_MAX_COMMENTS.", warnings)
+
+    def test_invalid_url_and_unreachable_videos(self):
+        self.assertEqual(self._post({"videos": ["https://example.com/x"]}).status_code, 400)
+        resp = self._post({"videos": [MISSING], "options": {"use_transformers": False}})
+        self.assertEqual(resp.status_code, 502)
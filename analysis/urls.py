@@ -1,6 +1,31 @@
 from django.urls import path
-from .views import CommentsAnalysisView
+from .views import (
+    AnalysisJobResultView,
+    AnalysisJobsView,
+    AnalysisJobView,
+    AspectModelsView,
+    CommentsAnalysisAsyncView,
+    CommentsAnalysisView,
+    CorpusCommentsView,
+    CommentsStreamView,
+    MetricsView,
+    ResultItemsView,
+    ModelsStatusView,
+    YouTubeAnalysisView,
+)
 
 urlpatterns = [
     path('analysis/comments/', CommentsAnalysisView.as_view(), name='analysis-comments'),
+    path('analysis/comments/async/', CommentsAnalysisAsyncView.as_view(), name='analysis-comments-async'),
+    path('analysis/comments/stream/', CommentsStreamView.as_view(), name='analysis-comments-stream'),
+    path('analysis/youtube/', YouTubeAnalysisView.as_view(), name='analysis-youtube'),
+    path('analysis/metrics/', MetricsView.as_view(), name='analysis-metrics'),
+    path('analysis/results/<str:result_id>/items/', ResultItemsView.as_view(), name='analysis-result-items'),
+    path('analysis/models/', ModelsStatusView.as_view(), name='analysis-models'),
+    path('analysis/aspect-models/', AspectModelsView.as_view(), name='analysis-aspect-models'),
+    path('analysis/jobs/', AnalysisJobsView.as_view(), name='analysis-jobs'),
+    path('analysis/jobs/<str:job_id>/', AnalysisJobView.as_view(), name='analysis-job'),
+    path('analysis/jobs/<str:job_id>/result/', AnalysisJobResultView.as_view(), name='analysis-job-result'),
+    path('analysis/corpora/<str:corpus_id>/comments/', CorpusCommentsView.as_view(),
+         name='analysis-corpus-comments'),
 ]
@@ -1,12 +1,41 @@
+import itertools
+import json
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.reverse import reverse
 from django.conf import settings
 
-from .serializers import CommentsAnalysisRequestSerializer
-from .services.text_preprocess import preprocess_batch
-from .services.sentiment import SentimentAnalyzer
-from .services.aspects import AspectClusterer
+from .renderers import NDJSONRenderer, render_json
+from .serializers import (
+    AnalysisOptionsSerializer,
+    CommentsAnalysisRequestSerializer,
+    YouTubeAnalysisRequestSerializer,
+)
+from .services.pipeline import analyze_comments, analyze_comments_async, limit_comments
+from .services.registry import registry
+from .services.cache import get_cluster_cache, get_sentiment_cache
+from .services.aspect_models import get_aspect_model_store
+from .services.jobs import DONE, FAILED, get_job_manager
+from .services.incremental import InvalidCorpusId, get_corpus_store, update_corpus
+from .services.youtube import analyze_videos
+from .services.streaming import encode_ndjson, parse_ndjson_comments, stream_analysis
+from .services.metrics import current_timings, metrics
+from .services.results import decode_cursor, encode_cursor, get_result_store
+
+
+def with_timings(response, options):
+    """Attach the request's stage timings when options.timings is set."""
+    timings = current_timings()
+    if options.get('timings') and timings is not None:
+        response["timings"] = timings.as_dict()
+    return response
 
 
 class CommentsAnalysisView(APIView):
@@ -21,7 +50,8 @@ class CommentsAnalysisView(APIView):
           "clustering_algorithm": "kmeans"
         }
       }
-    Response includes summary, items, and warnings.
+    Response includes summary, items, and warnings; with options.response = "summary"
+    only the summary (with per-aspect sentiment) and a `result_id` for paging the items.
     """
     def post(self, request):
         serializer = CommentsAnalysisRequestSerializer(data=request.data)
@@ -31,70 +61,260 @@ class CommentsAnalysisView(APIView):
         comments = payload['comments']
         options = payload.get('options', {})
 
-        warnings = []
+        limited_comments, warnings = limit_comments(comments, settings.MAX_COMMENTS)
+        response = analyze_comments(limited_comments, options, warnings=warnings)
+        return Response(with_timings(response, options), status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class CommentsAnalysisAsyncView(View):
+    """Async (ASGI) version of CommentsAnalysisView, same body and response.
+    POST /api/analysis/comments/async/
+    Sentiment and clustering run concurrently on worker threads while the event loop
+    stays free. Plain Django view: DRF views are sync-only, the DRF serializer still validates.
+    """
+    @staticmethod
+    def _json(data, status_code):
+        return HttpResponse(render_json(data), status=status_code, content_type='application/json')
+
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b'null')
+        except ValueError as exc:
+            return self._json({"detail": f"JSON parse error - {exc}"}, status.HTTP_400_BAD_REQUEST)
+        serializer = CommentsAnalysisRequestSerializer(data=data)
+        if not serializer.is_valid():
+            return self._json(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        payload = serializer.validated_data
+
+        limited_comments, warnings = limit_comments(payload['comments'], settings.MAX_COMMENTS)
+        options = dict(payload.get('options', {}))
+        response = await analyze_comments_async(limited_comments, options, warnings=warnings)
+        return self._json(with_timings(response, options), status.HTTP_200_OK)
+
+
+class CommentsStreamView(APIView):
+    """Analyze comments streamed as NDJSON, emitting results as they are ready.
+    POST /api/analysis/comments/stream/   (Content-Type: application/x-ndjson)
+    Body, one JSON value per line:
+      {"options": {...}}          optional, first line only
+      {"comment": "..."}          or just "..." per comment
+    Response (application/x-ndjson):
+      {"type": "item", "index": 0, "text": ..., "sentiment": {...}}   per comment, per batch
+      {"type": "summary", "summary": {...}, "cluster_ids": [...], "warnings": [...]}   last
+    """
+    renderer_classes = [NDJSONRenderer, JSONRenderer]
+
+    def post(self, request):
+        stream = request.stream
+        lines = iter(stream.readline, b'') if stream is not None else iter(())
 
-        # Validate number of comments
-        if len(comments) > settings.MAX_COMMENTS:
-            comments = comments[:settings.MAX_COMMENTS]
-            warnings.append("Too many comments provided; truncated to MAX_COMMENTS.")
-
-        # Validate per-comment length (truncate, do not reject)
-        limited_comments = []
-        truncated_count = 0
-        for c in comments:
-            if len(c) > settings.MAX_COMMENT_LENGTH:
-                limited_comments.append(c[:settings.MAX_COMMENT_LENGTH])
-                truncated_count += 1
+        # The first non-blank line may carry the options
+        first = b''
+        for first in lines:
+            if first.strip():
+                break
+        head, options_data = [], {}
+        if first.strip():
+            try:
+                record = json.loads(first)
+            except ValueError:
+                record = None
+            if isinstance(record, dict) and 'options' in record:
+                options_data = record['options']
             else:
-                limited_comments.append(c)
-        if truncated_count:
-            warnings.append(f"{truncated_count} comments were truncated due to MAX_COMMENT_LENGTH.")
-
-        # 1) Preprocess
-        cleaned = preprocess_batch(limited_comments)
-
-        # 2) Sentiment (default try Transformers)
-        use_transformers = options.get('use_transformers', True)
-        sentiment_analyzer = SentimentAnalyzer(
-            use_transformers=use_transformers,
-            model_name=settings.SENTIMENT_MODEL
-        )
-        sentiments = sentiment_analyzer.batch_predict(cleaned)
-
-        # 3) Aspects (algorithm param)
-        clustering_algorithm = options.get('clustering_algorithm', 'kmeans')
-        clusterer = AspectClusterer(algorithm=clustering_algorithm)
-        clusters = clusterer.cluster(
-            cleaned,
-            n_clusters=options.get('num_aspect_clusters', 3)
+                head = [first]
+        options = AnalysisOptionsSerializer(data=options_data)
+        options.is_valid(raise_exception=True)
+
+        warnings = []
+        records = stream_analysis(
+            parse_ndjson_comments(itertools.chain(head, lines)),
+            dict(options.validated_data),
+            warnings,
+            batch_size=settings.STREAM_BATCH_SIZE,
+            max_comments=settings.STREAM_MAX_COMMENTS,
         )
+        return StreamingHttpResponse(encode_ndjson(records), content_type=NDJSONRenderer.media_type)
 
-        # Compose response
-        items = []
-        for i, original_text in enumerate(limited_comments):
-            label = clusters['labels'][i]
-            items.append({
-                "text": original_text,
-                "sentiment": sentiments[i],
-                "cluster_id": int(label) if label is not None else None
-            })
-
-        summary = {
-            "n_comments": len(limited_comments),
-            "n_clusters": clusters.get('n_clusters', 0),
-            "aspects": [
-                {
-                    "cluster_id": int(cid),
-                    "keywords": kw,
-                    "size": int(sz),
-                    "representatives": reps
-                }
-                for cid, kw, sz, reps in zip(clusters.get('cluster_ids', []),
-                                             clusters.get('keywords', []),
-                                             clusters.get('sizes', []),
-                                             clusters.get('representatives', []))
-            ]
-        }
 
-        response = {"summary": summary, "items": items, "warnings": warnings}
+class ModelsStatusView(APIView):
+    """Load state of the process-wide sentiment models and result caches.
+    GET /api/analysis/models/
+    """
+    def get(self, request):
+        cache = get_sentiment_cache()
+        cluster_cache = get_cluster_cache()
+        response = {
+            "models": registry.status(),
+            "sentiment_cache": cache.stats() if cache is not None else None,
+            "cluster_cache": cluster_cache.stats() if cluster_cache is not None else None,
+        }
         return Response(response, status=status.HTTP_200_OK)
+
+
+class AspectModelsView(APIView):
+    """Saved fitted aspect models (name, version, algorithm, n_clusters, ...).
+    GET /api/analysis/aspect-models/
+    """
+    def get(self, request):
+        return Response({"models": get_aspect_model_store().list()}, status=status.HTTP_200_OK)
+
+
+class AnalysisJobsView(APIView):
+    """Submit a large comment set for background analysis.
+    POST /api/analysis/jobs/
+    Same body as /api/analysis/comments/, limited by JOB_MAX_COMMENTS instead of MAX_COMMENTS.
+    Responds 202 with the job id; poll the status URL, then fetch the result URL.
+    """
+    def post(self, request):
+        serializer = CommentsAnalysisRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+
+        limited_comments, warnings = limit_comments(
+            payload['comments'], settings.JOB_MAX_COMMENTS, limit_name='JOB_MAX_COMMENTS'
+        )
+        job_id = get_job_manager().submit(limited_comments, dict(payload.get('options', {})), warnings)
+        response = {
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": reverse('analysis-job', args=[job_id], request=request),
+            "result_url": reverse('analysis-job-result', args=[job_id], request=request),
+        }
+        return Response(response, status=status.HTTP_202_ACCEPTED)
+
+
+class AnalysisJobView(APIView):
+    """Status and progress of a job.
+    GET /api/analysis/jobs/<job_id>/
+    """
+    def get(self, request, job_id):
+        job = get_job_manager().get(job_id)
+        if job is None:
+            return Response({"detail": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job, status=status.HTTP_200_OK)
+
+
+class AnalysisJobResultView(APIView):
+    """Result of a finished job (same shape as /api/analysis/comments/).
+    GET /api/analysis/jobs/<job_id>/result/
+    Responds 409 while the job is queued/running or if it failed.
+    """
+    def get(self, request, job_id):
+        manager = get_job_manager()
+        job = manager.get(job_id)
+        if job is None:
+            return Response({"detail": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+        if job['status'] != DONE:
+            detail = job['error'] if job['status'] == FAILED else "Job has not finished yet."
+            return Response({"status": job['status'], "detail": detail}, status=status.HTTP_409_CONFLICT)
+        return Response(manager.result(job_id), status=status.HTTP_200_OK)
+
+
+class CorpusCommentsView(APIView):
+    """Incremental analysis of a growing comment set (e.g. one video).
+    POST /api/analysis/corpora/<corpus_id>/comments/
+      Same body as /api/analysis/comments/, limited by CORPUS_MAX_COMMENTS. Only comments
+      the corpus has not seen are scored and folded into its clusters; the response has
+      the refreshed aggregate summary, items for this request and n_new.
+    GET    -> current aggregate summary
+    DELETE -> drop the corpus state
+    """
+    def post(self, request, corpus_id):
+        serializer = CommentsAnalysisRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+
+        limited_comments, warnings = limit_comments(
+            payload['comments'], settings.CORPUS_MAX_COMMENTS, limit_name='CORPUS_MAX_COMMENTS'
+        )
+        options = dict(payload.get('options', {}))
+        try:
+            response = update_corpus(get_corpus_store(), corpus_id, limited_comments, options, warnings)
+        except InvalidCorpusId as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(with_timings(response, options), status=status.HTTP_200_OK)
+
+    def get(self, request, corpus_id):
+        try:
+            state = get_corpus_store().load(corpus_id)
+        except InvalidCorpusId as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if state is None:
+            return Response({"detail": "Corpus not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"corpus_id": corpus_id, "summary": state.summary()}, status=status.HTTP_200_OK)
+
+    def delete(self, request, corpus_id):
+        try:
+            deleted = get_corpus_store().delete(corpus_id)
+        except InvalidCorpusId as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if not deleted:
+            return Response({"detail": "Corpus not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class YouTubeAnalysisView(APIView):
+    """Fetch the comments of YouTube videos and analyze them.
+    POST /api/analysis/youtube/
+    Body:
+      {"videos": ["https://www.youtube.com/watch?v=...", "dQw4w9WgXcQ"], "max_comments": 500, "options": {...}}
+    Pages are analyzed as they download. Response: summary, items, warnings and
+    per-video `videos` ({video_id, n_comments, error}); 502 if no video could be fetched.
+    """
+    def post(self, request):
+        serializer = YouTubeAnalysisRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+
+        max_comments, limit_name = settings.YOUTUBE_MAX_COMMENTS, 'YOUTUBE_MAX_COMMENTS'
+        if payload.get('max_comments') is not None and payload['max_comments'] < max_comments:
+            max_comments, limit_name = payload['max_comments'], 'max_comments'
+        options = dict(payload.get('options', {}))
+        response = analyze_videos(payload['videos'], options, max_comments, limit_name=limit_name)
+        if all(v['error'] for v in response['videos']):
+            return Response({"detail": "Comments could not be fetched.", "videos": response['videos']},
+                            status=status.HTTP_502_BAD_GATEWAY)
+        return Response(with_timings(response, options), status=status.HTTP_200_OK)
+
+
+class ResultItemsView(APIView):
+    """Items of a summary-only analysis, page by page.
+    GET /api/analysis/results/<result_id>/items/?cursor=<next_cursor>&limit=500
+    Response: {"result_id", "count", "items": [...], "next_cursor", "next"}; `next_cursor`
+    is null on the last page. 404 once the result expired (RESULT_TTL).
+    """
+    def get(self, request, result_id):
+        cursor = request.query_params.get('cursor')
+        try:
+            offset = decode_cursor(cursor) if cursor else 0
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        limit = request.query_params.get('limit', str(settings.RESULT_PAGE_SIZE))
+        if not limit.isdigit() or int(limit) < 1:
+            return Response({"detail": "Invalid limit."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = int(limit)
+        page = get_result_store().page(result_id, offset, min(limit, settings.RESULT_MAX_PAGE_SIZE))
+        if page is None:
+            return Response({"detail": "Result not found or expired."}, status=status.HTTP_404_NOT_FOUND)
+        items, count = page
+        end = offset + len(items)
+        next_cursor = encode_cursor(end) if end < count else None
+        next_url = None
+        if next_cursor is not None:
+            next_url = request.build_absolute_uri(
+                reverse('analysis-result-items', args=[result_id]) + f"?cursor={next_cursor}&limit={limit}"
+            )
+        return Response({"result_id": result_id, "count": count, "items": items,
+                         "next_cursor": next_cursor, "next": next_url}, status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """Process-local metrics in the Prometheus text format.
+    GET /api/analysis/metrics/
+    Stage latency histograms, request latency/counts per endpoint, sentiment batch sizes
+    and backend fallbacks. Each worker process keeps its own registry.
+    """
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'analysis.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,8 +69,13 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# JSON responses through orjson when it is installed; FAST_JSON=false keeps DRF's stdlib encoder
+FAST_JSON = os.getenv("FAST_JSON", "true").lower() == "true"
+
 REST_FRAMEWORK = {
-    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'analysis.renderers.FastJSONRenderer' if FAST_JSON else 'analysis.renderers.TimedJSONRenderer'
+    ],
     'DEFAULT_PARSER_CLASSES': ['rest_framework.parsers.JSONParser'],
 }
 
@@ -78,3 +84,109 @@ MAX_COMMENTS = int(os.getenv("MAX_COMMENTS", 100))
 MAX_COMMENT_LENGTH = int(os.getenv("MAX_COMMENT_LENGTH", 500))
 CLUSTER_REPRESENTATIVES = int(os.getenv("CLUSTER_REPRESENTATIVES", 3))
 SENTIMENT_MODEL = os.getenv("SENTIMENT_MODEL", "cardiffnlp/twitter-xlm-roberta-base-sentiment")
+# Load the sentiment model at startup (AnalysisConfig.ready) instead of on first request
+SENTIMENT_WARMUP = os.getenv("SENTIMENT_WARMUP", "false").lower() == "true"
+# Transformer inference: comments per forward pass, token truncation (0 = model max), torch intra-op threads (0 = torch default)
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", 32))
+SENTIMENT_MAX_LENGTH = int(os.getenv("SENTIMENT_MAX_LENGTH", 0))
+SENTIMENT_NUM_THREADS = int(os.getenv("SENTIMENT_NUM_THREADS", 0))
+# Cross-request micro-batching of transformer sentiment: small concurrent requests share one batch
+# of up to SENTIMENT_MICROBATCH_MAX_SIZE texts (0 = SENTIMENT_BATCH_SIZE), flushed after MAX_WAIT_MS
+SENTIMENT_MICROBATCH = os.getenv("SENTIMENT_MICROBATCH", "false").lower() == "true"
+SENTIMENT_MICROBATCH_MAX_SIZE = int(os.getenv("SENTIMENT_MICROBATCH_MAX_SIZE", 0))
+SENTIMENT_MICROBATCH_MAX_WAIT_MS = float(os.getenv("SENTIMENT_MICROBATCH_MAX_WAIT_MS", 5))
+# Latency-budget routing (options.latency_budget_ms): prior transformer throughput in padded tokens/s
+# (refined by measured batches) and the token length texts are cut to when full length does not fit
+SENTIMENT_TOKENS_PER_SECOND = float(os.getenv("SENTIMENT_TOKENS_PER_SECOND", 4000))
+SENTIMENT_BUDGET_TRUNCATE = int(os.getenv("SENTIMENT_BUDGET_TRUNCATE", 64))
+# Sentiment result cache: in-memory LRU entries (0 disables) and optional SQLite file for a persistent tier
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", 50000))
+SENTIMENT_CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH", "")
+# Shared inference server (`manage.py inference_server`): when the socket path is set, web workers
+# forward transformer scoring to it instead of loading the model; VADER is used if it is unavailable
+SENTIMENT_SERVER_SOCKET = os.getenv("SENTIMENT_SERVER_SOCKET", "")
+SENTIMENT_SERVER_TIMEOUT = float(os.getenv("SENTIMENT_SERVER_TIMEOUT", 30))
+SENTIMENT_SERVER_CHUNK = int(os.getenv("SENTIMENT_SERVER_CHUNK", 1000))
+SENTIMENT_SERVER_RETRY = float(os.getenv("SENTIMENT_SERVER_RETRY", 5))
+# VADER process pool: worker count (0 = in-process) and minimum batch size that is sent to the pool
+VADER_WORKERS = int(os.getenv("VADER_WORKERS", 0))
+VADER_PARALLEL_MIN_BATCH = int(os.getenv("VADER_PARALLEL_MIN_BATCH", 1000))
+
+# Asynchronous analysis jobs (POST /api/analysis/jobs/)
+JOB_MAX_COMMENTS = int(os.getenv("JOB_MAX_COMMENTS", 100000))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_BACKEND = os.getenv("JOB_BACKEND", "memory")  # memory | sqlite
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", str(BASE_DIR / "jobs.sqlite3"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", 3600))
+# Running jobs without progress for this many seconds are requeued (their worker process is gone)
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", 1800))
+
+# Streaming NDJSON analysis (POST /api/analysis/comments/stream/)
+STREAM_MAX_COMMENTS = int(os.getenv("STREAM_MAX_COMMENTS", 100000))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 64))
+
+# Clustering result cache for identical input and options: in-memory entries (0 disables), seconds
+# an entry stays valid (0 = no expiry), optional SQLite file for a persistent tier and its row limit
+CLUSTER_CACHE_SIZE = int(os.getenv("CLUSTER_CACHE_SIZE", 32))
+CLUSTER_CACHE_TTL = int(os.getenv("CLUSTER_CACHE_TTL", 3600))
+CLUSTER_CACHE_PATH = os.getenv("CLUSTER_CACHE_PATH", "")
+CLUSTER_CACHE_DISK_SIZE = int(os.getenv("CLUSTER_CACHE_DISK_SIZE", 1000))
+
+# Near-duplicate collapsing (options.near_duplicate_threshold): similarity threshold (0 = off),
+# MinHash signature size and character shingle length
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0))
+NEAR_DUPLICATE_NUM_PERM = int(os.getenv("NEAR_DUPLICATE_NUM_PERM", 64))
+NEAR_DUPLICATE_SHINGLE = int(os.getenv("NEAR_DUPLICATE_SHINGLE", 5))
+
+# Items of summary-only responses (options.response=summary), paged via /results/<id>/items/
+RESULT_STORE_SIZE = int(os.getenv("RESULT_STORE_SIZE", 100))
+RESULT_TTL = int(os.getenv("RESULT_TTL", 600))
+RESULT_PAGE_SIZE = int(os.getenv("RESULT_PAGE_SIZE", 500))
+RESULT_MAX_PAGE_SIZE = int(os.getenv("RESULT_MAX_PAGE_SIZE", 5000))
+
+# Transformer runtime: "torch" (eager PyTorch) or "onnx" (ONNX Runtime on a graph exported with
+# `manage.py export_sentiment_onnx`); SENTIMENT_ONNX_QUANTIZED selects the int8 graph (written with --quantize);
+# if the selected graph is missing, the other one is used
+SENTIMENT_RUNTIME = os.getenv("SENTIMENT_RUNTIME", "torch")
+SENTIMENT_ONNX_DIR = os.getenv("SENTIMENT_ONNX_DIR", str(BASE_DIR / "models" / "onnx"))
+SENTIMENT_ONNX_QUANTIZED = os.getenv("SENTIMENT_ONNX_QUANTIZED", "false").lower() == "true"
+
+# Saved fitted aspect models (options.save_aspect_model / options.aspect_model)
+ASPECT_MODEL_DIR = os.getenv("ASPECT_MODEL_DIR", str(BASE_DIR / "models" / "aspects"))
+# Fuzzy C-Means convergence: max membership change to stop at, and iteration cap
+FCM_ERROR = float(os.getenv("FCM_ERROR", 0.005))
+FCM_MAX_ITER = int(os.getenv("FCM_MAX_ITER", 300))
+
+# Large-corpus KMeans: from CLUSTER_LARGE_MIN_TEXTS distinct texts (or clustering_mode=large),
+# fit on a stratified sample with a capped vocabulary and SVD, then assign in chunks
+CLUSTER_LARGE_MIN_TEXTS = int(os.getenv("CLUSTER_LARGE_MIN_TEXTS", 20000))
+CLUSTER_LARGE_SAMPLE = int(os.getenv("CLUSTER_LARGE_SAMPLE", 20000))
+CLUSTER_LARGE_MAX_FEATURES = int(os.getenv("CLUSTER_LARGE_MAX_FEATURES", 20000))
+CLUSTER_LARGE_DIM = int(os.getenv("CLUSTER_LARGE_DIM", 100))
+CLUSTER_LARGE_CHUNK = int(os.getenv("CLUSTER_LARGE_CHUNK", 5000))
+
+# BERTopic embeddings: sentence-transformers model and on-disk store (memory-mapped float32 + index)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", str(BASE_DIR / "models" / "embeddings"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+
+# Incremental per-corpus analysis (POST /api/analysis/corpora/<corpus_id>/comments/): state directory and per-call limit
+CORPUS_STATE_DIR = os.getenv("CORPUS_STATE_DIR", str(BASE_DIR / "models" / "corpora"))
+CORPUS_MAX_COMMENTS = int(os.getenv("CORPUS_MAX_COMMENTS", 10000))
+# Distinct texts collected before a corpus is first clustered (its TF-IDF vocabulary is frozen then);
+# 0 = 5 x num_aspect_clusters
+CORPUS_MIN_FIT_TEXTS = int(os.getenv("CORPUS_MIN_FIT_TEXTS", 0))
+
+# YouTube comment retrieval (POST /api/analysis/youtube/). The base URL can point to a local stand-in server
+YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
+YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
+YOUTUBE_MAX_COMMENTS = int(os.getenv("YOUTUBE_MAX_COMMENTS", 10000))
+# Videos fetched at once (also the number of pooled connections), requests per second, retries and backoff base (s)
+YOUTUBE_FETCH_WORKERS = int(os.getenv("YOUTUBE_FETCH_WORKERS", 4))
+YOUTUBE_RATE_LIMIT = float(os.getenv("YOUTUBE_RATE_LIMIT", 10))
+YOUTUBE_MAX_RETRIES = int(os.getenv("YOUTUBE_MAX_RETRIES", 3))
+YOUTUBE_RETRY_BACKOFF = float(os.getenv("YOUTUBE_RETRY_BACKOFF", 0.5))
+YOUTUBE_TIMEOUT = float(os.getenv("YOUTUBE_TIMEOUT", 10))
+
+# Async endpoint (POST /api/analysis/comments/async/): threads running the sentiment and clustering stages
+ANALYSIS_STAGE_WORKERS = int(os.getenv("ANALYSIS_STAGE_WORKERS", 4))